@@ -1,5 +1,8 @@
+from multiprocessing import freeze_support
 from sys import exit
 from fightsticker.main import main
 
 if __name__ == "__main__":
+    # Frozen builds start plugin worker processes through this executable
+    freeze_support()
     exit(main())
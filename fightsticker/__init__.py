@@ -1,5 +1,4 @@
-from json import dumps, loads
-from os.path import dirname, join
+from os.path import dirname
 
 from platformdirs import user_config_dir
 
@@ -22,6 +21,15 @@ DEFAULT = {
     "leve": "",
     "pad": ""
 }
+# Types of the configuration parameters
+SCHEMA = {
+    "dark": bool,
+    "stic": float,
+    "trig": float,
+    "trad": str,
+    "leve": str,
+    "pad": str
+}
 # Available layouts
 LAYOUTS = ("Traditional", "Leverless", "Pad")
 # Traditional layout parameters
@@ -137,56 +145,74 @@ IMAGES_PAD = {
     "rt": "trigger.png",
     "lt": "trigger.png"
 }
+# Controller buttons, in dispatch table order
+BUTTONS = (
+    "back",
+    "start",
+    "guide",
+    "x",
+    "y",
+    "rightshoulder",
+    "leftshoulder",
+    "a",
+    "b",
+    "righttrigger",
+    "lefttrigger",
+    "leftstick",
+    "rightstick"
+)
+# Index of each button in the scene dispatch tables
+BUTTON_INDEX = {button: i for i, button in enumerate(BUTTONS)}
+# Default mapping of controller buttons to layout sprites
+MAPPING = {
+    "back": ("select",),
+    "start": ("start",),
+    "guide": ("guide",),
+    "x": ("x",),
+    "y": ("y",),
+    "rightshoulder": ("rb",),
+    "leftshoulder": ("lb",),
+    "a": ("a",),
+    "b": ("b",),
+    "righttrigger": ("rt",),
+    "lefttrigger": ("lt",),
+    "leftstick": (),
+    "rightstick": ()
+}
+# Numpad notation of the buttons used in motions
+NOTATION = {
+    "x": "P",
+    "y": "P",
+    "rightshoulder": "P",
+    "leftshoulder": "P",
+    "a": "K",
+    "b": "K",
+    "righttrigger": "K",
+    "lefttrigger": "K"
+}
+# Game frames per second
+FRAME_RATE = 60
+# Frames a direction must be held to count as a charge
+CHARGE_FRAMES = 30
+# Default press and release animation: durations in seconds, scale reached
+# once released and curve, linear, ease or smooth
+ANIMATION = {"press": 0.0, "release": 0.0, "scale": 1.0, "curve": "linear"}
 # Window width
 WINDOW_WIDTH = 680
 # Window height
 WINDOW_HEIGHT = 390
+# Input history panel width
+HISTORY_WIDTH = 200
 
-
-def read_config(filename):
-    """
-    Given a filename `filename`, return the configuration dictionary or
-    the default configuration if `filename` is not found
-    
-    :param filename: Filename
-    :type filename: str
-    :return: Configuration dictionary
-    :rtype: dict
-    """
-    try:
-        config = loads(open(join(CONF, filename), "r").read())
-    except FileNotFoundError:
-        config = DEFAULT
-    return config
-
-
-def validate_config(filename, default="RESET"):
-    """
-    Given a filename `filename`, replace the file with filename `default`
-    if it is not valid
-    
-    :param filename: Config filename
-    :type filename: str
-    :param default: Default filename
-    :type default: str
-    """
-    overwrite = False
-    default_config = read_config(default)
-    config = read_config(filename)
-    # Remove invalid keys
-    for key in [k for k in config.keys() if k not in DEFAULT.keys()]:
-        config.pop(key)
-        overwrite = True
-    # Add missing keys
-    for key in [k for k in DEFAULT.keys() if k not in config.keys()]:
-        config[key] = default_config[key]
-        overwrite = True
-    # Validate config options
-    if not isinstance(config["dark"], int):
-        config["dark"] = default_config["dark"]
-        overwrite = True
-    # Overwrite filename if there is an error
-    if overwrite:
-        with open(join(CONF, filename), "w") as c:
-            c.write(dumps(config))
-            c.close()
+# Layout scenes kept warm for switching
+SCENE_POOL = 3
+# Texture memory kept for scenes no longer in use, in MiB
+TEXTURE_BUDGET = 64
+# Time budget of each plugin per frame in milliseconds
+PLUGIN_BUDGET = 1.0
+# Display modes of the analog triggers
+TRIGGER_MODES = ("threshold", "fill", "ramp")
+# Levels the analog triggers are quantized to
+TRIGGER_STEPS = 64
+# Scales of the pre-scaled image variants
+SCALES = (1, 1.5, 2, 3, 4)
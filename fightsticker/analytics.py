@@ -0,0 +1,271 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from csv import DictWriter
+from json import dumps
+from os.path import basename
+from sys import exit
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import *
+from .recorder import (
+    DPAD, INPUT_INDEX, PRESS, RECORD, RELEASE, STICK, TRIGGER
+)
+
+# Columnar layout matching the recorder's records
+DTYPE = [
+    ("time", "<f8"),
+    ("kind", "u1"),
+    ("input", "u1"),
+    ("x", "<f4"),
+    ("y", "<f4")
+]
+# Numpad notation of each direction, indexed by 5 + x + 3 * y
+DIRECTIONS = tuple(str(i) for i in range(1, 10))
+
+
+def load_session(filename):
+    """
+    Load a session file into a structured array, one column per field
+
+    :param filename: Session filename
+    :type filename: str
+    :return: Events
+    :rtype: numpy.ndarray
+    """
+    events = np.fromfile(filename, dtype=np.dtype(DTYPE))
+    if events.dtype.itemsize != RECORD.size:
+        raise ValueError("Session record layout does not match the recorder")
+    return events
+
+
+def _held_time(time, active, end):
+    """
+    Return the total time `active` is true, each sample lasting until the
+    next one or `end`
+    """
+    if not len(time):
+        return 0.0
+    duration = np.diff(time, append=end)
+    return float(duration[active].sum())
+
+
+def _directions(events, mask, deadzone, end):
+    """
+    Return how many times each direction was entered and how long it was
+    held, in numpad notation, over the events of one input
+
+    :param events: Events
+    :type events: numpy.ndarray
+    :param mask: Events of the input
+    :type mask: numpy.ndarray
+    :param deadzone: Deadzone of the input
+    :type deadzone: float
+    :param end: Time the session ends
+    :type end: float
+    :return: Entries and seconds keyed by direction
+    :rtype: tuple
+    """
+    x = events["x"][mask]
+    y = events["y"][mask]
+    direction = (
+        5
+        + (x > deadzone).astype(np.int8) - (x < -deadzone)
+        + 3 * ((y > deadzone).astype(np.int8) - (y < -deadzone))
+    )
+    entered = np.ones(len(direction), dtype=bool)
+    entered[1:] = direction[1:] != direction[:-1]
+    counts = np.bincount(direction[entered], minlength=10)[1:]
+    seconds = np.bincount(
+        direction,
+        weights=np.diff(events["time"][mask], append=end),
+        minlength=10
+    )[1:]
+    return (
+        dict(zip(DIRECTIONS, counts.tolist())),
+        dict(zip(DIRECTIONS, seconds.tolist()))
+    )
+
+
+def analyze(filename, deadzone=DEFAULT["stic"], threshold=DEFAULT["trig"]):
+    """
+    Compute the statistics of a session file
+
+    :param filename: Session filename
+    :type filename: str
+    :param deadzone: Stick deadzone
+    :type deadzone: float
+    :param threshold: Trigger threshold
+    :type threshold: float
+    :return: Statistics
+    :rtype: dict
+    """
+    events = load_session(filename)
+    time = events["time"]
+    kind = events["kind"]
+    code = events["input"]
+    end = float(time[-1]) if len(time) else 0.0
+    duration = end - float(time[0]) if len(time) else 0.0
+
+    # Press counts and actions per minute
+    presses = kind == PRESS
+    counts = np.bincount(code[presses], minlength=len(BUTTONS))
+    total = int(presses.sum())
+    apm = total * 60 / duration if duration else 0.0
+
+    # Pair every press with the following release of the same button
+    buttons = presses | (kind == RELEASE)
+    order = np.argsort(code[buttons], kind="stable")
+    b_time = time[buttons][order]
+    b_kind = kind[buttons][order]
+    b_code = code[buttons][order]
+    held = (
+        (b_kind[:-1] == PRESS)
+        & (b_kind[1:] == RELEASE)
+        & (b_code[:-1] == b_code[1:])
+    )
+    holds = (b_time[1:] - b_time[:-1])[held]
+    hold_counts = np.bincount(b_code[:-1][held], minlength=len(BUTTONS))
+    hold_sums = np.bincount(
+        b_code[:-1][held], weights=holds, minlength=len(BUTTONS)
+    )
+    hold_means = np.divide(
+        hold_sums, hold_counts,
+        out=np.zeros(len(hold_sums)), where=hold_counts > 0
+    )
+    if len(holds):
+        percentiles = np.percentile(holds, (50, 90, 99))
+    else:
+        percentiles = np.zeros(3)
+
+    # Direction heatmaps of the dpad and left stick, each following its
+    # own timeline as both can be held at once
+    direction_counts = {}
+    direction_time = {}
+    stick = (kind == STICK) & (code == INPUT_INDEX["leftstick_axis"])
+    for name, mask in (("dpad", kind == DPAD), ("leftstick", stick)):
+        direction_counts[name], direction_time[name] = _directions(
+            events, mask, deadzone, end
+        )
+
+    # Trigger pulls and time held past the threshold
+    triggers = {}
+    for name in ("lefttrigger", "righttrigger"):
+        mask = (kind == TRIGGER) & (code == INPUT_INDEX[name])
+        pulled = events["x"][mask] > threshold
+        rising = np.count_nonzero(pulled[1:] & ~pulled[:-1])
+        triggers[name] = {
+            "pulls": int(rising + (pulled[0] if len(pulled) else 0)),
+            "time": _held_time(time[mask], pulled, end)
+        }
+
+    return {
+        "session": basename(filename),
+        "duration": duration,
+        "events": len(events),
+        "presses": total,
+        "apm": apm,
+        "press_counts": dict(zip(BUTTONS, counts[:len(BUTTONS)].tolist())),
+        "hold_mean": dict(zip(BUTTONS, hold_means[:len(BUTTONS)].tolist())),
+        "hold_percentiles": dict(
+            zip(("p50", "p90", "p99"), percentiles.tolist())
+        ),
+        "direction_counts": direction_counts,
+        "direction_time": direction_time,
+        "triggers": triggers
+    }
+
+
+def _flatten(stats):
+    """
+    Flatten nested statistics into a single CSV row
+    """
+    row = {}
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            for subkey, subvalue in _flatten(value).items():
+                row[f"{key}_{subkey}"] = subvalue
+        else:
+            row[key] = value
+    return row
+
+
+def _print_summary(results):
+    """
+    Print a summary table of the analyzed sessions
+    """
+    print(
+        f"{'Session':<24} {'Minutes':>8} {'Presses':>8} {'APM':>7} "
+        f"{'Hold p50':>9} {'Hold p99':>9}"
+    )
+    for stats in results:
+        holds = stats["hold_percentiles"]
+        print(
+            f"{stats['session'][:24]:<24} {stats['duration'] / 60:>8.1f} "
+            f"{stats['presses']:>8} {stats['apm']:>7.1f} "
+            f"{holds['p50'] * 1000:>7.1f}ms {holds['p99'] * 1000:>7.1f}ms"
+        )
+
+
+def main(argv=None):
+    """
+    Analyze recorded sessions
+
+    :param argv: Command line arguments
+    :type argv: list
+    :return: Return code
+    :rtype: int
+    """
+    parser = ArgumentParser(
+        prog="fightsticker.analytics",
+        description="Fightsticker - Analyze recorded input sessions"
+    )
+    parser.add_argument("files", nargs="+", help="Session files")
+    parser.add_argument(
+        "-c", "--csv",
+        action="store",
+        help="Write the statistics to a CSV file",
+        dest="CSV",
+        default=None
+    )
+    parser.add_argument(
+        "-j", "--json",
+        action="store",
+        help="Write the statistics to a JSON file",
+        dest="JSON",
+        default=None
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        action="store",
+        type=int,
+        help="Number of worker processes",
+        dest="WORKERS",
+        default=None
+    )
+    option = parser.parse_args(argv)
+    if np is None:
+        print("The analytics command requires numpy")
+        return 1
+
+    with ProcessPoolExecutor(max_workers=option.WORKERS) as pool:
+        results = list(pool.map(analyze, option.files))
+
+    _print_summary(results)
+    if option.CSV:
+        rows = [_flatten(stats) for stats in results]
+        with open(option.CSV, "w", newline="") as c:
+            writer = DictWriter(c, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    if option.JSON:
+        with open(option.JSON, "w") as j:
+            j.write(dumps(results, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
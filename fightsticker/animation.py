@@ -0,0 +1,212 @@
+from time import perf_counter
+
+import pyglet
+
+from . import *
+
+# Curves of the press and release animations
+CURVES = {"linear": 0, "ease": 1, "smooth": 2}
+# Time of the animations in seconds, counted from the start of the app to
+# keep them precise in single precision floats
+EPOCH = perf_counter()
+# Press and release time of a sprite that was never pressed
+NEVER = -1e6
+
+vertex_source = """#version 150 core
+    in vec3 translate;
+    in vec4 colors;
+    in vec3 tex_coords;
+    in vec2 scale;
+    in vec3 position;
+    in float rotation;
+    in vec4 animation;
+
+    out vec4 vertex_colors;
+    out vec3 texture_coords;
+
+    uniform WindowBlock
+    {
+        mat4 projection;
+        mat4 view;
+    } window;
+
+    uniform float time;
+    uniform float press_duration;
+    uniform float release_duration;
+    uniform float release_scale;
+    uniform int curve;
+
+    mat4 m_scale = mat4(1.0);
+    mat4 m_rotation = mat4(1.0);
+    mat4 m_translate = mat4(1.0);
+
+    float progress(float elapsed, float duration)
+    {
+        float t = duration > 0.0 ? clamp(elapsed / duration, 0.0, 1.0)
+                                 : 1.0;
+        if (curve == 1) {
+            return 1.0 - (1.0 - t) * (1.0 - t);
+        } else if (curve == 2) {
+            return smoothstep(0.0, 1.0, t);
+        }
+        return t;
+    }
+
+    void main()
+    {
+        // animation holds the press and release times, then the center
+        float alpha;
+        float grow;
+        if (animation.x > animation.y) {
+            alpha = progress(time - animation.x, press_duration);
+            grow = 1.0;
+        } else {
+            // Fade out from where the press left off
+            float t = progress(time - animation.y, release_duration);
+            alpha = (1.0 - t)
+                * progress(animation.y - animation.x, press_duration);
+            grow = mix(1.0, release_scale, t);
+        }
+        vec2 center = animation.zw;
+        vec2 point = center + (position.xy - center) * grow;
+
+        m_scale[0][0] = scale.x;
+        m_scale[1][1] = scale.y;
+        m_translate[3][0] = translate.x;
+        m_translate[3][1] = translate.y;
+        m_translate[3][2] = translate.z;
+        m_rotation[0][0] =  cos(-radians(rotation));
+        m_rotation[0][1] =  sin(-radians(rotation));
+        m_rotation[1][0] = -sin(-radians(rotation));
+        m_rotation[1][1] =  cos(-radians(rotation));
+
+        gl_Position = window.projection * window.view * m_translate
+            * m_rotation * m_scale * vec4(point, position.z, 1.0);
+
+        vertex_colors = vec4(colors.rgb, colors.a * alpha);
+        texture_coords = tex_coords;
+    }
+"""
+
+
+def get_program():
+    """
+    Return the shader program of the animated sprites, created once per
+    context
+    """
+    return pyglet.gl.current_context.create_program(
+        (vertex_source, "vertex"),
+        (pyglet.sprite.fragment_source, "fragment")
+    )
+
+
+class AnimationGroup(pyglet.graphics.Group):
+    """
+    Group setting the clock and curve of the animated sprites it holds.
+    Setting the clock is the only work done while the animations play,
+    once per drawn frame
+
+    :param animation: Press and release durations in seconds, scale
+        reached on release and curve name
+    :type animation: dict
+    :param order: Draw order
+    :type order: int
+    """
+    def __init__(self, animation, order=0):
+        """
+        Constructor
+        """
+        super().__init__(order)
+        self.press = animation["press"]
+        self.release = animation["release"]
+        self.scale = animation["scale"]
+        self.curve = CURVES.get(animation["curve"], 0)
+
+    def set_state(self):
+        program = get_program()
+        program["time"] = perf_counter() - EPOCH
+        program["press_duration"] = self.press
+        program["release_duration"] = self.release
+        program["release_scale"] = self.scale
+        program["curve"] = self.curve
+
+
+class AnimatedSprite(pyglet.sprite.Sprite):
+    """
+    Sprite fading in when shown and fading out when hidden, the curve
+    being computed by the shader from the time of the last change.
+    Showing or hiding it only writes that time to its vertices
+
+    :param img: Image
+    :type img: pyglet.image.AbstractImage
+    :param x: X coordinate
+    :type x: float
+    :param y: Y coordinate
+    :type y: float
+    :param batch: Batch
+    :type batch: pyglet.graphics.Batch
+    :param group: Parent group, an AnimationGroup
+    :type group: AnimationGroup
+    :param group_class: Sprite group class, the default one if None
+    :type group_class: type
+    """
+    def __init__(
+        self, img, x=0, y=0, batch=None, group=None, group_class=None
+    ):
+        """
+        Constructor
+        """
+        if group_class:
+            self.group_class = group_class
+        self._pressed = False
+        self._times = [NEVER, NEVER]
+        super().__init__(
+            img, x, y, batch=batch, group=group, program=get_program()
+        )
+
+    def _animation_data(self):
+        """
+        Return the animation attribute of the vertices
+        """
+        texture = self._texture
+        center = (
+            texture.width / 2 - texture.anchor_x,
+            texture.height / 2 - texture.anchor_y
+        )
+        return (*self._times, *center) * 4
+
+    def _create_vertex_list(self):
+        self._vertex_list = self.program.vertex_list_indexed(
+            4, pyglet.gl.GL_TRIANGLES, [0, 1, 2, 0, 2, 3],
+            self._batch, self._group,
+            position=("f", self._get_vertices()),
+            colors=("Bn", self._rgba * 4),
+            translate=("f", (self._x, self._y, self._z) * 4),
+            scale=(
+                "f",
+                (self._scale * self._scale_x, self._scale * self._scale_y) * 4
+            ),
+            rotation=("f", (self._rotation,) * 4),
+            tex_coords=("f", self._texture.tex_coords),
+            animation=("f", self._animation_data())
+        )
+
+    def _set_texture(self, texture):
+        super()._set_texture(texture)
+        # The center moves with the size of the texture
+        self._vertex_list.animation[:] = self._animation_data()
+
+    @property
+    def visible(self):
+        """
+        Whether the sprite is shown, or fading out once hidden
+        """
+        return self._pressed
+
+    @visible.setter
+    def visible(self, visible):
+        if visible == self._pressed:
+            return
+        self._pressed = visible
+        self._times[0 if visible else 1] = perf_counter() - EPOCH
+        self._vertex_list.animation[:] = self._animation_data()
@@ -1,14 +1,15 @@
-from json import dumps
-from os import mkdir
-from os.path import exists, join
+from os import makedirs
+from os.path import join
 from platform import system
-from shutil import copy, copytree
 
 from gi import require_versions
 require_versions({"Gtk": "4.0", "Adw": "1"})
 from gi.repository import Gtk, Gdk, Gio, GLib, Adw
 
 from . import *
+from .assets import sync_assets
+from .image_cache import prune
+from .settings import settings
 from .window import Window
 
 
@@ -24,6 +25,8 @@ class Application(Adw.Application):
             application_id=ID,
             flags=Gio.ApplicationFlags.FLAGS_NONE
         )
+        # Exit status of the last layout window
+        self.status = 0
 
         # Set application name
         GLib.set_application_name(APPNAME)
@@ -37,42 +40,15 @@ class Application(Adw.Application):
         """
         Gtk.Application.do_startup(self)
         
-        # Restore any missing files and folders
-        if not exists(CONF):
-            mkdir(CONF)
-        if not exists(join(CONF, "images")):
-            copytree(
-                join(APPDIR, "images"),
-                join(CONF, "images")
-            )
-        if not exists(join(CONF, "layouts")):
-            copytree(
-                join(APPDIR, "layouts"),
-                join(CONF, "layouts")
-            )
-        for file in ("traditional.ini", "leverless.ini", "pad.ini"):
-            if not exists(join(CONF, "layouts", file)):
-                copy(
-                    join(APPDIR, "layouts", file),
-                    join(CONF, "layouts")
-                )
-        if not exists(join(CONF, "default.json")):
-            with open(join(CONF, "default.json"), "w") as d:
-                d.write(dumps(DEFAULT))
-                d.close()
-        if not exists(join(CONF, "settings.json")):
-            with open(join(CONF, "settings.json"), "w") as s:
-                default = read_config("default.json")
-                s.write(dumps(default))
-                s.close()
-        
-        # Validate config files
-        validate_config("default.json")
-        validate_config("settings.json", "default.json")
+        # Restore any missing or outdated files and folders
+        makedirs(CONF, exist_ok=True)
+        sync_assets()
+        # Drop decoded images of modified or deleted files
+        prune()
 
-        # Set color scheme
-        appearance = read_config("settings.json")["dark"]
-        if appearance:
+        # Set color scheme. Reading the settings creates or repairs the
+        # config files
+        if settings["dark"]:
             self.get_style_manager().set_color_scheme(
                 Adw.ColorScheme.FORCE_DARK
             )
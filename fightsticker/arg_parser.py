@@ -1,6 +1,24 @@
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 
-from . import __version__
+from . import (
+    __version__, FRAME_RATE, PLUGIN_BUDGET, TEXTURE_BUDGET, TRIGGER_MODES
+)
+
+
+def _per_class(classes):
+    """
+    Return a parser of CLASS=VALUE arguments for the input `classes`
+    """
+    def parse(text):
+        name, _, value = text.partition("=")
+        if name not in classes:
+            raise ArgumentTypeError(f"invalid input class: {name}")
+        try:
+            return name, float(value)
+        except ValueError:
+            raise ArgumentTypeError(f"invalid value: {value}") from None
+
+    return parse
 
 
 class ArgParser(ArgumentParser):
@@ -28,3 +46,174 @@ class ArgParser(ArgumentParser):
             dest="DEBUG",
             default=False
         )
+        self.add_argument(
+            "-b", "--backend",
+            action="store",
+            help="Controller input backend (evdev is Linux only)",
+            dest="BACKEND",
+            choices=("pyglet", "evdev"),
+            default="pyglet"
+        )
+        self.add_argument(
+            "-r", "--record",
+            action="store",
+            help="Record controller events to a session file",
+            dest="RECORD",
+            default=None
+        )
+        self.add_argument(
+            "--history",
+            action="store_true",
+            help="Show the input history beside the layout",
+            dest="HISTORY",
+            default=False
+        )
+        self.add_argument(
+            "--diagnostics",
+            action="store",
+            help="Show polling diagnostics and save a report to a file",
+            dest="DIAGNOSTICS",
+            default=None
+        )
+        self.add_argument(
+            "--profile",
+            action="store",
+            help="Time the hot paths and save a report to a file",
+            dest="PROFILE",
+            default=None
+        )
+        self.add_argument(
+            "--profile-window",
+            action="store",
+            nargs=2,
+            type=float,
+            help="Also capture a cProfile from START for DURATION seconds",
+            metavar=("START", "DURATION"),
+            dest="PROFILE_WINDOW",
+            default=None
+        )
+        self.add_argument(
+            "-g", "--geometry",
+            action="store",
+            help="Fit the layout by resizing the window to its aspect "
+                 "ratio, with bars around it, or with bars and whole "
+                 "number scaling",
+            dest="GEOMETRY",
+            choices=("aspect", "letterbox", "integer"),
+            default="aspect"
+        )
+        self.add_argument(
+            "-f", "--frame-lock",
+            action="store",
+            nargs="?",
+            type=float,
+            const=FRAME_RATE,
+            help="Quantize the inputs to game frames, 60 per second unless "
+                 "given, and draw once per frame",
+            metavar="RATE",
+            dest="FRAME_LOCK",
+            default=None
+        )
+        self.add_argument(
+            "-t", "--transparent",
+            action="store_true",
+            help="Draw on a transparent window with premultiplied alpha",
+            dest="TRANSPARENT",
+            default=False
+        )
+        self.add_argument(
+            "--hide-background",
+            action="store_true",
+            help="Hide the background image of the layout",
+            dest="HIDE_BACKGROUND",
+            default=False
+        )
+        self.add_argument(
+            "--triggers",
+            action="store",
+            help="Show the triggers once pulled past the deadzone, filled "
+                 "or faded in as far as they are pulled",
+            dest="TRIGGERS",
+            choices=TRIGGER_MODES,
+            default="threshold"
+        )
+        self.add_argument(
+            "--hysteresis",
+            action="append",
+            type=_per_class(("sticks", "triggers")),
+            help="Only turn sticks or triggers on past their deadzone by "
+                 "BAND and off below it by BAND, can be repeated",
+            metavar="CLASS=BAND",
+            dest="HYSTERESIS",
+            default=[]
+        )
+        self.add_argument(
+            "--debounce",
+            action="append",
+            type=_per_class(("buttons", "triggers", "sticks", "dpad")),
+            help="Keep buttons, triggers, sticks or the dpad in a state for "
+                 "at least MS milliseconds, can be repeated",
+            metavar="CLASS=MS",
+            dest="DEBOUNCE",
+            default=[]
+        )
+        self.add_argument(
+            "--asyncio",
+            action="store_true",
+            help="Run the window and controllers on an asyncio loop",
+            dest="ASYNCIO",
+            default=False
+        )
+        self.add_argument(
+            "--no-plugins",
+            action="store_true",
+            help="Do not load the plugins",
+            dest="NO_PLUGINS",
+            default=False
+        )
+        self.add_argument(
+            "--plugin-budget",
+            action="store",
+            type=float,
+            help="Time in milliseconds each plugin may take per frame",
+            metavar="MS",
+            dest="PLUGIN_BUDGET",
+            default=PLUGIN_BUDGET
+        )
+        self.add_argument(
+            "--soak",
+            action="store",
+            help="Drive synthetic input and controller reconnections in "
+                 "accelerated time, save a leak report to a file and exit",
+            metavar="REPORT",
+            dest="SOAK",
+            default=None
+        )
+        self.add_argument(
+            "--soak-hours",
+            action="store",
+            type=float,
+            help="Simulated length of the soak test, 8 hours by default",
+            metavar="HOURS",
+            dest="SOAK_HOURS",
+            default=8
+        )
+        self.add_argument(
+            "--soak-speed",
+            action="store",
+            type=float,
+            help="Simulated seconds per second of the soak test, 600 by "
+                 "default",
+            metavar="SPEED",
+            dest="SOAK_SPEED",
+            default=600
+        )
+        self.add_argument(
+            "--texture-budget",
+            action="store",
+            type=int,
+            help="Texture memory in MiB kept for layouts not shown",
+            metavar="MIB",
+            dest="TEXTURE_BUDGET",
+            default=TEXTURE_BUDGET
+        )
@@ -0,0 +1,146 @@
+from hashlib import sha256
+from json import dumps, loads
+from os import makedirs, replace, scandir, stat
+from os.path import join
+from shutil import copy2
+
+from . import *
+from . import __version__
+from .logger import logger
+
+# Asset directories kept in sync with the configuration directory
+ASSET_DIRS = ("images", "layouts")
+# Record of the bundled and installed assets
+MANIFEST = join(CONF, "assets.json")
+
+
+def _hash_file(path):
+    """
+    Return the SHA-256 digest of the file at `path`
+
+    :param path: File path
+    :type path: str
+    :return: Hex digest
+    :rtype: str
+    """
+    digest = sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _scan(root):
+    """
+    Scan the asset directories under `root` once
+
+    :param root: Root directory
+    :type root: str
+    :return: (size, mtime) of each asset keyed by relative path
+    :rtype: dict
+    """
+    files = {}
+    for directory in ASSET_DIRS:
+        try:
+            with scandir(join(root, directory)) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        st = entry.stat()
+                        files[f"{directory}/{entry.name}"] = (
+                            st.st_size, st.st_mtime_ns
+                        )
+        except FileNotFoundError:
+            continue
+    return files
+
+
+def _stat(path):
+    """
+    Return the (size, mtime) of the file at `path`, or None if it is
+    missing
+
+    :param path: File path
+    :type path: str
+    :return: Size and modification time
+    :rtype: tuple or None
+    """
+    try:
+        st = stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def build_manifest(root=APPDIR):
+    """
+    Build the size and hash manifest of the assets under `root`
+
+    :param root: Root directory
+    :type root: str
+    :return: [size, digest] of each asset keyed by relative path
+    :rtype: dict
+    """
+    return {
+        path: [size, _hash_file(join(root, path))]
+        for path, (size, mtime) in _scan(root).items()
+    }
+
+
+def _read_manifest():
+    """
+    Read the sync record, or an empty one if it is missing or invalid
+    """
+    try:
+        with open(MANIFEST, "r") as m:
+            record = loads(m.read())
+        if isinstance(record.get("bundled"), dict):
+            return record
+    except (FileNotFoundError, ValueError, AttributeError):
+        pass
+    return {"version": None, "bundled": {}, "installed": {}}
+
+
+def sync_assets():
+    """
+    Copy bundled assets missing from or outdated in the configuration
+    directory, leaving files modified by the user untouched. When nothing
+    has changed this costs one stat of each bundled asset, however many
+    files the user added
+    """
+    record = _read_manifest()
+    changed = False
+    # The bundled assets only change with the application version
+    if record["version"] != __version__:
+        record["version"] = __version__
+        record["bundled"] = build_manifest()
+        changed = True
+    installed = record["installed"]
+    for path, (size, digest) in record["bundled"].items():
+        target = join(CONF, path)
+        state = _stat(target)
+        known = installed.get(path)
+        if state is None:
+            # Missing file, restore it
+            pass
+        elif known and list(state) == known[:2]:
+            # Untouched since it was installed, update it if outdated
+            if known[2] == digest:
+                continue
+        elif state[0] == size and _hash_file(target) == digest:
+            # Identical to the bundled file but not recorded yet
+            installed[path] = [*state, digest]
+            changed = True
+            continue
+        else:
+            # Modified by the user
+            continue
+        logger.debug(f"Installing asset: {path}")
+        makedirs(join(CONF, path.split("/")[0]), exist_ok=True)
+        copy2(join(APPDIR, path), target)
+        st = stat(target)
+        installed[path] = [st.st_size, st.st_mtime_ns, digest]
+        changed = True
+    if changed:
+        with open(f"{MANIFEST}.tmp", "w") as m:
+            m.write(dumps(record))
+        replace(f"{MANIFEST}.tmp", MANIFEST)
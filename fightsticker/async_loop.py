@@ -0,0 +1,148 @@
+import asyncio
+
+import pyglet
+
+from .logger import logger
+
+# Seconds between checks for window and controller events on platforms
+# whose events cannot be waited on from asyncio
+POLL_INTERVAL = 0.002
+
+
+class AsyncEventLoop:
+    """
+    pyglet event loop running as tasks on the current asyncio loop, so
+    that asynchronous servers, recorders and watchers share it. The clock
+    task calls the scheduled functions, drawing the windows included. On
+    platforms whose window and controller events come from file
+    descriptors, the asyncio loop waits on them directly, and elsewhere a
+    task polls them. The lateness of each clock tick is measured against
+    the asyncio loop time
+
+    :param interval: Seconds between window redraws, or None if the
+        windows are drawn by the app
+    :type interval: float
+    """
+    def __init__(self, interval=1 / 60):
+        """
+        Constructor
+        """
+        self.interval = interval
+        # Clock ticks, and their mean and maximum lateness in seconds
+        self.jitter = {"ticks": 0, "mean": 0.0, "max": 0.0}
+        self._loop = None
+        self._wake = None
+        # File descriptors waited on, keyed by device
+        self._readers = {}
+
+    async def run(self):
+        """
+        Process the events, scheduled functions and window redraws until
+        pyglet exits, like `pyglet.app.run`
+        """
+        self._loop = asyncio.get_running_loop()
+        event_loop = pyglet.app.event_loop
+        platform_event_loop = pyglet.app.platform_event_loop
+        if self.interval:
+            event_loop.clock.schedule_interval(
+                event_loop._redraw_windows, self.interval
+            )
+        event_loop.has_exit = False
+        pyglet.window.Window._enable_event_queue = False
+        for window in pyglet.app.windows:
+            window.switch_to()
+            window.dispatch_pending_events()
+        platform_event_loop.start()
+        event_loop.dispatch_event("on_enter")
+        event_loop.is_running = True
+        poller = None
+        if not hasattr(platform_event_loop, "select_devices"):
+            poller = self._loop.create_task(self._poll())
+        try:
+            await self._tick()
+        finally:
+            if poller:
+                poller.cancel()
+            for fd in self._readers.values():
+                self._loop.remove_reader(fd)
+            self._readers.clear()
+            event_loop.clock.unschedule(event_loop._redraw_windows)
+            event_loop.is_running = False
+            event_loop.dispatch_event("on_exit")
+            platform_event_loop.stop()
+            logger.debug(
+                f"Loop jitter mean {self.jitter['mean'] * 1000:.3f} ms, "
+                f"max {self.jitter['max'] * 1000:.3f} ms over "
+                f"{self.jitter['ticks']} ticks"
+            )
+
+    async def _tick(self):
+        """
+        Call the scheduled functions, then sleep until the next one is due
+        or an event arrives
+        """
+        loop = self._loop
+        event_loop = pyglet.app.event_loop
+        jitter = self.jitter
+        while not event_loop.has_exit:
+            timeout = event_loop.idle()
+            self._watch()
+            self._wake = loop.create_future()
+            handle = None
+            if timeout is not None:
+                deadline = loop.time() + timeout
+                handle = loop.call_later(timeout, self._wake_up, True)
+            on_time = await self._wake
+            if handle:
+                handle.cancel()
+            if on_time:
+                late = max(0.0, loop.time() - deadline)
+                jitter["ticks"] += 1
+                jitter["mean"] += (late - jitter["mean"]) / jitter["ticks"]
+                if late > jitter["max"]:
+                    jitter["max"] = late
+
+    def _wake_up(self, on_time=False):
+        """
+        Wake the clock task, on time or early for an event
+        """
+        if self._wake and not self._wake.done():
+            self._wake.set_result(on_time)
+
+    def _watch(self):
+        """
+        Wait on the devices of the platform event loop, which change as
+        controllers are plugged in and out, and dispatch the events they
+        already queued
+        """
+        devices = getattr(
+            pyglet.app.platform_event_loop, "select_devices", None
+        )
+        if devices is None:
+            return
+        for device in [d for d in self._readers if d not in devices]:
+            self._loop.remove_reader(self._readers.pop(device))
+        for device in list(devices):
+            if device not in self._readers:
+                fd = device.fileno()
+                self._loop.add_reader(fd, self._on_readable, device)
+                self._readers[device] = fd
+            elif device.poll():
+                device.select()
+
+    def _on_readable(self, device):
+        """
+        Dispatch the events of a device
+        """
+        device.select()
+        self._wake_up()
+
+    async def _poll(self):
+        """
+        Dispatch the window and controller events regularly
+        """
+        platform_event_loop = pyglet.app.platform_event_loop
+        while True:
+            if platform_event_loop.step(0):
+                self._wake_up()
+            await asyncio.sleep(POLL_INTERVAL)
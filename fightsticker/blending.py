@@ -0,0 +1,98 @@
+import pyglet
+from pyglet.gl import GL_ONE, GL_ONE_MINUS_SRC_ALPHA, GL_SRC_ALPHA
+from pyglet.gl import glBlendFuncSeparate
+from pyglet.shapes import _ShapeGroup
+from pyglet.text.layout import TextDecorationGroup, TextLayoutGroup
+
+
+def _blend_premultiplied():
+    """
+    Blend colors over their alpha and keep the alpha channel summed, so
+    that over a transparent clear the framebuffer holds premultiplied
+    alpha ready to composite
+    """
+    glBlendFuncSeparate(
+        GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_ONE, GL_ONE_MINUS_SRC_ALPHA
+    )
+
+
+class PremultipliedSpriteGroup(pyglet.sprite.SpriteGroup):
+    """
+    Sprite group drawn with premultiplied alpha output
+    """
+    def set_state(self):
+        super().set_state()
+        _blend_premultiplied()
+
+
+class PremultipliedSprite(pyglet.sprite.Sprite):
+    """
+    Sprite drawn with premultiplied alpha output
+    """
+    group_class = PremultipliedSpriteGroup
+
+
+class PremultipliedLabelGroup(TextLayoutGroup):
+    """
+    Glyph group drawn with premultiplied alpha output
+    """
+    def set_state(self):
+        super().set_state()
+        _blend_premultiplied()
+
+
+class PremultipliedDecorationGroup(TextDecorationGroup):
+    """
+    Text decoration group drawn with premultiplied alpha output
+    """
+    def set_state(self):
+        super().set_state()
+        _blend_premultiplied()
+
+
+class PremultipliedLabel(pyglet.text.Label):
+    """
+    Label drawn with premultiplied alpha output
+    """
+    group_class = PremultipliedLabelGroup
+    decoration_class = PremultipliedDecorationGroup
+
+
+class PremultipliedShapeGroup(_ShapeGroup):
+    """
+    Shape group drawn with premultiplied alpha output
+    """
+    def set_state(self):
+        super().set_state()
+        _blend_premultiplied()
+
+
+class PremultipliedRectangle(pyglet.shapes.Rectangle):
+    """
+    Rectangle drawn with premultiplied alpha output
+    """
+    group_class = PremultipliedShapeGroup
+
+
+def label_class(transparent):
+    """
+    Return the label class to draw with on a window
+
+    :param transparent: Whether the window is transparent
+    :type transparent: bool
+    :return: Label class
+    :rtype: type
+    """
+    return PremultipliedLabel if transparent else pyglet.text.Label
+
+
+def rectangle_class(transparent):
+    """
+    Return the rectangle class to draw with on a window
+
+    :param transparent: Whether the window is transparent
+    :type transparent: bool
+    :return: Rectangle class
+    :rtype: type
+    """
+    return PremultipliedRectangle if transparent else pyglet.shapes.Rectangle
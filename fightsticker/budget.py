@@ -0,0 +1,305 @@
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from json import dumps
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter_ns
+
+import pyglet
+from pyglet.math import Vec2
+
+from . import *
+from .profiler import HANDLERS
+
+# Synthetic events handled per round, and rounds timed for each handler,
+# the fastest round being kept
+EVENTS = 512
+ROUNDS = 15
+# Budget of each handler of each scene type, as the mean bytes allocated
+# while handling an event and the mean nanoseconds it takes. The byte
+# budgets are tight, and the time budgets leave room for slower machines
+BUDGETS = {
+    "Traditional": {
+        "on_button_press": {"bytes": 112, "ns": 5000},
+        "on_button_release": {"bytes": 112, "ns": 3000},
+        "on_stick_motion": {"bytes": 96, "ns": 3000},
+        "on_dpad_motion": {"bytes": 96, "ns": 5000},
+        "on_trigger_motion": {"bytes": 96, "ns": 3000}
+    },
+    "Leverless": {
+        "on_button_press": {"bytes": 112, "ns": 5000},
+        "on_button_release": {"bytes": 112, "ns": 3000},
+        "on_stick_motion": {"bytes": 96, "ns": 5000},
+        "on_dpad_motion": {"bytes": 96, "ns": 8000},
+        "on_trigger_motion": {"bytes": 96, "ns": 3000}
+    },
+    "Pad": {
+        "on_button_press": {"bytes": 112, "ns": 5000},
+        "on_button_release": {"bytes": 112, "ns": 3000},
+        "on_stick_motion": {"bytes": 96, "ns": 5000},
+        "on_dpad_motion": {"bytes": 96, "ns": 12000},
+        "on_trigger_motion": {"bytes": 96, "ns": 3000}
+    }
+}
+
+
+def synthetic_events(count, seed=0):
+    """
+    Build the arguments of `count` synthetic events for each handler,
+    following the controller the scenes are passed
+
+    :param count: Events per handler
+    :type count: int
+    :param seed: Seed of the synthetic input
+    :type seed: int
+    :return: Lists of event arguments keyed by handler
+    :rtype: dict
+    """
+    random = Random(seed)
+    buttons = [random.choice(BUTTONS[:9]) for _ in range(count)]
+    return {
+        "on_button_press": [(None, button) for button in buttons],
+        "on_button_release": [(None, button) for button in buttons],
+        "on_stick_motion": [
+            (
+                None,
+                random.choice(("leftstick", "rightstick")),
+                Vec2(random.uniform(-1.2, 1.2), random.uniform(-1.2, 1.2))
+            )
+            for _ in range(count)
+        ],
+        "on_dpad_motion": [
+            (None, Vec2(random.randint(-1, 1), random.randint(-1, 1)))
+            for _ in range(count)
+        ],
+        "on_trigger_motion": [
+            (
+                None,
+                random.choice(("lefttrigger", "righttrigger")),
+                random.random()
+            )
+            for _ in range(count)
+        ]
+    }
+
+
+class _IdleScene:
+    """
+    Scene whose handlers do nothing, measuring the cost of the measurement
+    itself
+    """
+    def on_button_press(self, controller, button):
+        pass
+
+    def on_button_release(self, controller, button):
+        pass
+
+    def on_stick_motion(self, controller, stick, vector):
+        pass
+
+    def on_dpad_motion(self, controller, vector):
+        pass
+
+    def on_trigger_motion(self, controller, trigger, value):
+        pass
+
+
+def _allocated(handler, events):
+    """
+    Return the mean bytes allocated at the peak of handling an event
+    """
+    total = 0
+    for args in events:
+        tracemalloc.reset_peak()
+        # Memory the handler keeps counts as well as what it frees
+        before = tracemalloc.get_traced_memory()[0]
+        handler(*args)
+        total += tracemalloc.get_traced_memory()[1] - before
+    return total / len(events)
+
+
+def _elapsed(handler, events):
+    """
+    Return the mean nanoseconds it takes to handle an event
+    """
+    start = perf_counter_ns()
+    for args in events:
+        handler(*args)
+    return (perf_counter_ns() - start) / len(events)
+
+
+def measure(scene, events, rounds=ROUNDS):
+    """
+    Measure the allocations and time per event of every handler of
+    `scene`, less those of calling handlers that do nothing. Handlers
+    take turns within each round so that buttons are pressed and released
+    and every handler starts from the state the others left
+
+    :param scene: Layout scene added to a scene manager
+    :type scene: LayoutScene
+    :param events: Lists of event arguments keyed by handler
+    :type events: dict
+    :param rounds: Rounds timed for each handler
+    :type rounds: int
+    :return: Bytes and nanoseconds per event keyed by handler
+    :rtype: dict
+    """
+    idle = _IdleScene()
+    results = {}
+    overhead = {}
+    for event in HANDLERS:
+        results[event] = {"bytes": 0.0, "ns": float("inf")}
+        overhead[event] = {"bytes": 0.0, "ns": float("inf")}
+    for _ in range(rounds):
+        for event in HANDLERS:
+            for target, measured in ((scene, results), (idle, overhead)):
+                ns = _elapsed(getattr(target, event), events[event])
+                if ns < measured[event]["ns"]:
+                    measured[event]["ns"] = ns
+    tracemalloc.start()
+    try:
+        for event in HANDLERS:
+            for target, measured in ((scene, results), (idle, overhead)):
+                measured[event]["bytes"] = _allocated(
+                    getattr(target, event), events[event]
+                )
+    finally:
+        tracemalloc.stop()
+    for event, result in results.items():
+        for key in result:
+            result[key] = max(0.0, result[key] - overhead[event][key])
+    return results
+
+
+def check(results, budgets=BUDGETS):
+    """
+    Compare measured handlers with their budgets
+
+    :param results: Measurements keyed by scene type and handler
+    :type results: dict
+    :param budgets: Budgets keyed by scene type and handler
+    :type budgets: dict
+    :return: Descriptions of the budgets exceeded
+    :rtype: list
+    """
+    failures = []
+    for layout, handlers in results.items():
+        for event, result in handlers.items():
+            budget = budgets.get(layout, {}).get(event)
+            if budget is None:
+                failures.append(f"{layout}.{event}: no budget")
+                continue
+            for key, unit in (("bytes", "B"), ("ns", "ns")):
+                if result[key] > budget[key]:
+                    failures.append(
+                        f"{layout}.{event}: {result[key]:.0f} {unit} per "
+                        f"event over its budget of {budget[key]} {unit}"
+                    )
+    return failures
+
+
+def layout_scenes(conf):
+    """
+    Generate the scene of every layout, drawn in a hidden window with the
+    images, layouts and controller database of the configuration
+    directory `conf`
+
+    :param conf: Configuration directory
+    :type conf: str
+    :return: Iterator of (layout name, scene) pairs
+    :rtype: Iterator
+    """
+    # The layout window module needs the controller input of a display
+    from .fightstick import SceneManager
+
+    # Scenes need a GL context, the hidden window provides it
+    window = pyglet.window.Window(visible=False)
+    try:
+        manager = SceneManager(
+            window, LAYOUTS[0].lower(), DEFAULT, conf=conf
+        )
+        for layout in LAYOUTS:
+            manager.switch(layout.lower())
+            yield layout, manager._scenes[manager.main]
+    finally:
+        window.close()
+
+
+def _print_report(results, budgets=BUDGETS):
+    """
+    Print the measurements next to their budgets
+    """
+    print(f"{'Handler':<31}{'Bytes':>8}{'Budget':>8}{'ns':>9}{'Budget':>8}")
+    for layout, handlers in results.items():
+        for event, result in handlers.items():
+            budget = budgets.get(layout, {}).get(event, {})
+            print(
+                f"{layout + '.' + event:<31}"
+                f"{result['bytes']:>8.0f}{budget.get('bytes', '-'):>8}"
+                f"{result['ns']:>9.0f}{budget.get('ns', '-'):>8}"
+            )
+
+
+def main(argv=None):
+    """
+    Measure the scene handlers against their budgets
+
+    :param argv: Command line arguments
+    :type argv: list
+    :return: Return code
+    :rtype: int
+    """
+    parser = ArgumentParser(
+        prog="fightsticker.budget",
+        description="Fightsticker - Check the cost of the scene handlers"
+    )
+    parser.add_argument(
+        "-e", "--events",
+        action="store",
+        type=int,
+        help="Synthetic events per handler and round",
+        dest="EVENTS",
+        default=EVENTS
+    )
+    parser.add_argument(
+        "-r", "--rounds",
+        action="store",
+        type=int,
+        help="Rounds timed for each handler",
+        dest="ROUNDS",
+        default=ROUNDS
+    )
+    parser.add_argument(
+        "-j", "--json",
+        action="store",
+        help="Write the measurements to a JSON file",
+        dest="JSON",
+        default=None
+    )
+    option = parser.parse_args(argv)
+
+    events = synthetic_events(option.EVENTS)
+    results = {}
+    # Run against an empty configuration directory so that the user's
+    # images, layouts and controller database weigh nothing
+    with TemporaryDirectory(ignore_cleanup_errors=True) as conf:
+        for layout, scene in layout_scenes(conf):
+            results[layout] = measure(scene, events, option.ROUNDS)
+
+    _print_report(results)
+    if option.JSON:
+        with open(option.JSON, "w") as j:
+            j.write(dumps(results, indent=4))
+    failures = check(results)
+    if failures:
+        print(f"{len(failures)} handler budgets exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("All handlers within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+from json import dumps, loads
+from os import makedirs, replace, scandir, stat
+from os.path import dirname, join
+
+from . import *
+from .logger import logger
+
+# Persisted catalog of the images directories
+CATALOG = join(CONF, "cache", "catalog.json")
+
+
+class AssetCatalog:
+    """
+    Persisted index of the files under a list of directories, resolving
+    names the way pyglet.resource does: paths relative to their directory,
+    the first directory holding a name taking precedence. Only directories
+    whose modification time changed are scanned again
+
+    :param roots: Directories in order of precedence
+    :type roots: tuple
+    :param filename: Catalog filename
+    :type filename: str
+    """
+    def __init__(self, roots, filename=CATALOG):
+        """
+        Constructor
+        """
+        self.roots = roots
+        self.filename = filename
+        # [mtime, files, subdirectories] of every directory scanned
+        self._dirs = None
+        self._index = None
+
+    def locate(self, name):
+        """
+        Return the path of the file `name`, refreshing the catalog on the
+        first lookup. Later changes are picked up by `refresh`, which
+        scenes call once as they load
+
+        :param name: Filename, relative to its directory
+        :type name: str
+        :return: Path
+        :rtype: str
+        """
+        if self._index is None:
+            self.refresh()
+        try:
+            return self._index[name]
+        except KeyError:
+            raise FileNotFoundError(f"Image not found: {name}") from None
+
+    def refresh(self):
+        """
+        Bring the catalog up to date with one stat per directory, scanning
+        only the directories that changed, and index and save it again
+        only if any did
+        """
+        if self._dirs is None:
+            self._dirs = self._read()
+        dirs = {}
+        changed = False
+        # Directories in order of precedence, with the prefix of the
+        # names of their files
+        order = []
+        for root in self.roots:
+            stack = [("", root)]
+            while stack:
+                prefix, path = stack.pop()
+                try:
+                    mtime = stat(path).st_mtime_ns
+                except OSError:
+                    changed = changed or path in self._dirs
+                    continue
+                known = self._dirs.get(path)
+                if known and known[0] == mtime:
+                    files, subdirs = known[1], known[2]
+                else:
+                    logger.debug(f"Scanning images directory: {path}")
+                    files, subdirs = self._scan(path)
+                    changed = True
+                dirs[path] = [mtime, files, subdirs]
+                order.append((prefix, path))
+                for name in subdirs:
+                    stack.append((f"{prefix}{name}/", join(path, name)))
+        # Directories deleted since the last refresh
+        changed = changed or dirs.keys() != self._dirs.keys()
+        self._dirs = dirs
+        if changed or self._index is None:
+            index = {}
+            for prefix, path in order:
+                for name in dirs[path][1]:
+                    index.setdefault(f"{prefix}{name}", join(path, name))
+            self._index = index
+        if changed:
+            self._write()
+
+    def _scan(self, path):
+        """
+        List the files and subdirectories of `path`
+        """
+        files = []
+        subdirs = []
+        try:
+            with scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                    elif entry.is_file():
+                        files.append(entry.name)
+        except OSError:
+            pass
+        return files, subdirs
+
+    def _read(self):
+        """
+        Read the persisted catalog, or an empty one if it is missing,
+        invalid or built for other directories
+        """
+        try:
+            with open(self.filename, "r") as c:
+                record = loads(c.read())
+            if record.get("roots") == list(self.roots):
+                return record["dirs"]
+        except (FileNotFoundError, ValueError, AttributeError, KeyError):
+            pass
+        return {}
+
+    def _write(self):
+        """
+        Save the catalog atomically
+        """
+        try:
+            makedirs(dirname(self.filename), exist_ok=True)
+            with open(f"{self.filename}.tmp", "w") as c:
+                c.write(dumps({"roots": list(self.roots), "dirs": self._dirs}))
+            replace(f"{self.filename}.tmp", self.filename)
+        except OSError as e:
+            logger.debug(f"Could not save the asset catalog: {e}")
+
+
+def images_catalog(conf=CONF):
+    """
+    Return a catalog of the images of the configuration directory `conf`
+    taking precedence over the bundled ones
+
+    :param conf: Configuration directory
+    :type conf: str
+    :return: Catalog
+    :rtype: AssetCatalog
+    """
+    return AssetCatalog(
+        (join(conf, "images"), join(APPDIR, "images")),
+        join(conf, "cache", "catalog.json")
+    )
+
+
+# Images, user images taking precedence over bundled ones
+catalog = images_catalog()
@@ -0,0 +1,249 @@
+import sys
+from argparse import ArgumentParser
+from json import dumps, loads
+from os import replace, stat
+from os.path import join
+from platform import system
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from pyglet.input import controller
+from pyglet.input.controller_db import mapping_list
+
+from . import *
+from .logger import logger
+
+# User-supplied SDL game controller database
+DATABASE = join(CONF, "gamecontrollerdb.txt")
+# Parsed index of the database
+CACHE = join(CONF, "gamecontrollerdb.json")
+# SDL names of the supported platforms
+PLATFORMS = {
+    "Windows": "Windows",
+    "Darwin": "Mac OS X",
+    "Linux": "Linux"
+}
+
+# Mappings keyed by GUID for the running platform
+_index = {}
+# pyglet's lookup, scanning its database linearly
+_pyglet_get_mapping = controller.get_mapping
+
+
+def _normalize_guid(guid):
+    """
+    Return `guid` with the name CRC cleared, which newer SDL databases
+    store in bytes 2 and 3 but pyglet leaves empty
+
+    :param guid: SDL GUID
+    :type guid: str
+    :return: Normalized GUID
+    :rtype: str
+    """
+    return f"{guid[:4]}0000{guid[8:]}".lower()
+
+
+def _parse_database(filename):
+    """
+    Index the mapping lines of an SDL database by GUID, keeping only the
+    lines for the running platform
+
+    :param filename: Database filename
+    :type filename: str
+    :return: Mapping lines keyed by GUID
+    :rtype: dict
+    """
+    platform = f"platform:{PLATFORMS.get(system(), system())},"
+    index = {}
+    with open(filename, "r", encoding="utf-8", errors="replace") as d:
+        for line in d:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "platform:" in line and platform not in f"{line},":
+                continue
+            guid, sep, mapping = line.partition(",")
+            if not sep:
+                continue
+            guid = _normalize_guid(guid)
+            # Later lines override earlier ones, as in SDL
+            index[guid] = f"{guid},{mapping}"
+    return index
+
+
+def load_mappings(filename=DATABASE, cache=CACHE):
+    """
+    Load the database `filename` into the GUID index, reusing the parsed
+    index in `cache` while the database is unchanged
+
+    :param filename: Database filename
+    :type filename: str
+    :param cache: Cache filename
+    :type cache: str
+    :return: Mapping lines keyed by GUID
+    :rtype: dict
+    """
+    global _index
+    try:
+        st = stat(filename)
+    except FileNotFoundError:
+        _index = {}
+        return _index
+    key = [filename, st.st_mtime_ns, st.st_size, system()]
+    try:
+        with open(cache, "r") as c:
+            cached = loads(c.read())
+        if cached["key"] == key:
+            _index = cached["index"]
+            return _index
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        pass
+    logger.debug(f"Rebuilding controller database index: {filename}")
+    _index = _parse_database(filename)
+    try:
+        # Write then rename so an interrupted write never leaves a
+        # truncated cache behind
+        with open(f"{cache}.tmp", "w") as c:
+            c.write(dumps({"key": key, "index": _index}))
+        replace(f"{cache}.tmp", cache)
+    except OSError as e:
+        logger.error(f"Could not write controller database cache: {e}")
+    return _index
+
+
+def get_mapping(guid):
+    """
+    Return the mapping line for the device `guid`, if any
+
+    :param guid: Device GUID
+    :type guid: str
+    :return: Mapping line
+    :rtype: str or None
+    """
+    return _index.get(_normalize_guid(guid))
+
+
+def find_mapping(guid):
+    """
+    Return the parsed mapping of the device `guid`, from the GUID index
+    if it is there, and from pyglet's database otherwise
+
+    :param guid: Device GUID
+    :type guid: str
+    :return: Relations keyed by SDL input name
+    :rtype: dict or None
+    """
+    line = get_mapping(guid)
+    if line is not None:
+        try:
+            return controller._parse_mapping(line)
+        except ValueError:
+            logger.error(f"Invalid controller mapping: {line}")
+    return _pyglet_get_mapping(guid)
+
+
+def install_mappings():
+    """
+    Have pyglet's controller detection resolve devices through the GUID
+    index, ahead of its built-in database, when they connect. The
+    backends import pyglet's lookup by name, so it is replaced in each of
+    them, and pyglet's database is left as it is
+    """
+    for name, module in list(sys.modules.items()):
+        if (
+            name.startswith("pyglet.input")
+            and getattr(module, "get_mapping", None) is _pyglet_get_mapping
+        ):
+            module.get_mapping = find_mapping
+
+
+def _time(function, guids):
+    """
+    Return the mean microseconds `function` takes to look a GUID up
+    """
+    start = perf_counter()
+    for guid in guids:
+        function(guid)
+    return (perf_counter() - start) / len(guids) * 1e6
+
+
+def main(argv=None):
+    """
+    Measure the cold and warm loads of a database and its lookups
+
+    :param argv: Command line arguments
+    :type argv: list
+    :return: Return code
+    :rtype: int
+    """
+    parser = ArgumentParser(
+        prog="fightsticker.controller_db",
+        description="Fightsticker - Measure the controller database index"
+    )
+    parser.add_argument(
+        "database",
+        nargs="?",
+        help="SDL database, the user-supplied one by default",
+        default=DATABASE
+    )
+    parser.add_argument(
+        "-n", "--lookups",
+        action="store",
+        type=int,
+        help="Number of lookups timed",
+        dest="LOOKUPS",
+        default=10000
+    )
+    option = parser.parse_args(argv)
+
+    with TemporaryDirectory() as tmp:
+        cache = join(tmp, "gamecontrollerdb.json")
+        start = perf_counter()
+        index = load_mappings(option.database, cache)
+        cold = perf_counter() - start
+        start = perf_counter()
+        load_mappings(option.database, cache)
+        warm = perf_counter() - start
+    if not index:
+        print(f"No mappings for this platform in {option.database}")
+        return 1
+
+    random = Random(0)
+    guids = random.choices(list(index), k=option.LOOKUPS)
+    def scan(lines):
+        """
+        Return a lookup scanning `lines` like pyglet does
+        """
+        def find(guid):
+            for line in lines:
+                if line.startswith(guid):
+                    return line
+        return find
+
+    # Database as it would be with every line prepended to pyglet's, and
+    # the index falling back to pyglet's own database
+    prepended = scan(list(index.values()) + mapping_list)
+    builtin = scan(mapping_list)
+
+    def indexed(guid):
+        return get_mapping(guid) or builtin(guid)
+
+    # Devices missing from both databases scan all of them
+    unknown = ["ffff0000ffff0000ffff0000ffff0000"] * option.LOOKUPS
+    print(f"Mappings: {len(index)}")
+    print(f"Cold load: {cold * 1000:.2f} ms")
+    print(f"Warm load: {warm * 1000:.2f} ms")
+    print(
+        f"Known device: {_time(indexed, guids):.2f} us indexed, "
+        f"{_time(prepended, guids):.2f} us scanned"
+    )
+    print(
+        f"Unknown device: {_time(indexed, unknown):.2f} us indexed, "
+        f"{_time(prepended, unknown):.2f} us scanned"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+from array import array
+from json import dumps
+from time import perf_counter
+
+from . import *
+
+# Number of intervals kept per input
+WINDOW = 1024
+# Number of inputs shown in the HUD
+HUD_INPUTS = 3
+# Intervals longer than this many median intervals are the input resting
+# rather than reports lost
+IDLE_INTERVALS = 8
+
+
+class _InputStats:
+    """
+    Rolling report intervals of a single input
+    """
+    def __init__(self):
+        self.intervals = array("d", bytes(8 * WINDOW))
+        self.reports = 0
+        self.duplicated = 0
+        self.last_time = None
+        self.last_value = None
+
+    def add(self, timestamp, value):
+        if self.last_time is not None:
+            self.intervals[self.reports % WINDOW] = timestamp - self.last_time
+            self.reports += 1
+            if value == self.last_value:
+                self.duplicated += 1
+        self.last_time = timestamp
+        self.last_value = value
+
+    def summary(self):
+        """
+        Return the estimated polling rate, interval percentiles and the
+        dropped and duplicated report counts
+        """
+        intervals = sorted(self.intervals[:min(self.reports, WINDOW)])
+        if not intervals:
+            return None
+        count = len(intervals)
+
+        def percentile(p):
+            return intervals[min(count - 1, int(p * count / 100))]
+
+        median = percentile(50)
+        # Reports arriving much later than usual are counted as dropped,
+        # unless the gap is long enough for the input to have been idle
+        dropped = sum(
+            round(interval / median) - 1
+            for interval in intervals
+            if median and 1.5 * median < interval <= IDLE_INTERVALS * median
+        )
+        return {
+            "reports": self.reports,
+            "rate": 1 / median if median else 0.0,
+            "p50": median * 1000,
+            "p95": percentile(95) * 1000,
+            "p99": percentile(99) * 1000,
+            "jitter": (percentile(99) - percentile(1)) * 1000,
+            "dropped": dropped,
+            "duplicated": self.duplicated
+        }
+
+
+class PollingAnalyzer:
+    """
+    Controller event handler measuring the report intervals of every input
+    to estimate the polling rate, jitter and dropped or duplicated reports
+
+    :param manager: Scene manager showing the HUD, if any
+    :type manager: SceneManager
+    """
+    def __init__(self, manager=None):
+        """
+        Constructor
+        """
+        self._inputs = {}
+        # Reports the kernel dropped, keyed by device, from the backends
+        # counting its SYN_DROPPED events
+        self._syn_dropped = {}
+        self.label = None
+        if manager:
+            # Imported here as labels need a display, which the
+            # statistics do not
+            from .blending import label_class
+
+            self.label = label_class(manager.transparent)(
+                "",
+                font_size=10,
+                x=10,
+                y=10,
+                width=WINDOW_WIDTH - 20,
+                multiline=True,
+                batch=manager.overlay
+            )
+
+    def add(self, name, timestamp, value):
+        """
+        Record a report of the input `name`
+
+        :param name: Input name
+        :type name: str
+        :param timestamp: Report time in seconds
+        :type timestamp: float
+        :param value: Reported value
+        :type value: Any
+        """
+        stats = self._inputs.get(name)
+        if stats is None:
+            stats = self._inputs[name] = _InputStats()
+        stats.add(timestamp, value)
+
+    def summary(self):
+        """
+        Return the statistics of every input
+
+        :return: Statistics keyed by input name
+        :rtype: dict
+        """
+        summary = {}
+        for name, stats in self._inputs.items():
+            result = stats.summary()
+            if result:
+                summary[name] = result
+        return summary
+
+    def update(self, dt=None):
+        """
+        Refresh the HUD with the inputs reporting the most
+        """
+        if not self.label:
+            return
+        summary = sorted(
+            self.summary().items(),
+            key=lambda item: -item[1]["reports"]
+        )
+        lines = [
+            f"{name}: {s['rate']:.0f} Hz, p50 {s['p50']:.2f} ms, "
+            f"p99 {s['p99']:.2f} ms, jitter {s['jitter']:.2f} ms, "
+            f"dropped {s['dropped']}, duplicated {s['duplicated']}"
+            for name, s in summary[:HUD_INPUTS]
+        ]
+        if self._syn_dropped:
+            lines.append(f"SYN_DROPPED: {sum(self._syn_dropped.values())}")
+        self.label.text = "\n".join(lines)
+
+    def save(self, filename):
+        """
+        Write the statistics to a JSON report, along with the reports the
+        kernel dropped per device when the backend counts them
+
+        :param filename: Report filename
+        :type filename: str
+        """
+        report = {"inputs": self.summary(), "syn_dropped": self._syn_dropped}
+        with open(filename, "w") as r:
+            r.write(dumps(report, indent=4))
+
+    def _timestamp(self, controller):
+        """
+        Return the time of the current report, preferring the device
+        timestamp when the backend provides one
+        """
+        dropped = getattr(controller, "dropped", None)
+        if dropped is not None:
+            self._syn_dropped[controller.name or controller.filename] = dropped
+        return getattr(controller, "timestamp", None) or perf_counter()
+
+    def on_button_press(self, controller, button):
+        self.add(button, self._timestamp(controller), 1)
+
+    def on_button_release(self, controller, button):
+        self.add(button, self._timestamp(controller), 0)
+
+    def on_stick_motion(self, controller, stick, vector):
+        self.add(stick, self._timestamp(controller), (vector.x, vector.y))
+
+    def on_dpad_motion(self, controller, vector):
+        self.add("dpad", self._timestamp(controller), (vector.x, vector.y))
+
+    def on_trigger_motion(self, controller, trigger, value):
+        self.add(trigger, self._timestamp(controller), value)
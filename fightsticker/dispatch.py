@@ -0,0 +1,125 @@
+import sys
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+
+from . import *
+from .budget import EVENTS, ROUNDS, _elapsed, layout_scenes, synthetic_events
+
+
+def _fixed(scene):
+    """
+    Return press and release handlers looking each button up in a fixed
+    dictionary of one sprite per button, the way buttons were dispatched
+    before the mapping was compiled
+    """
+    mapping = {
+        button: sprites[0]
+        for button, sprites in zip(BUTTONS, scene.button_table) if sprites
+    }
+
+    def on_button_press(controller, button):
+        sprite = mapping.get(button, None)
+        if sprite:
+            sprite.visible = True
+
+    def on_button_release(controller, button):
+        sprite = mapping.get(button, None)
+        if sprite:
+            sprite.visible = False
+
+    return on_button_press, on_button_release
+
+
+def _remap(scene, width):
+    """
+    Map each button of `scene` to the sprites of the `width` buttons
+    starting from it, so that sprites are lit by several buttons
+    """
+    table = scene.button_table
+    scene.button_table = [
+        tuple(
+            sprite for offset in range(width)
+            for sprite in table[(index + offset) % len(table)]
+        )
+        for index in range(len(table))
+    ]
+    scene.held = [False] * len(BUTTONS)
+    scene.holds = dict.fromkeys(scene.holds, 0)
+
+
+def _time_pairs(press, release, events, rounds):
+    """
+    Return the fastest mean nanoseconds of a press followed by its release
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        best = min(best, _elapsed(press, events) + _elapsed(release, events))
+    return best
+
+
+def main(argv=None):
+    """
+    Time the dispatch of button presses and releases through the fixed
+    dictionary of one sprite per button and through the compiled mapping,
+    with one sprite and with several sprites per button
+
+    :param argv: Command line arguments
+    :type argv: list
+    :return: Return code
+    :rtype: int
+    """
+    parser = ArgumentParser(
+        prog="fightsticker.dispatch",
+        description="Fightsticker - Time the dispatch of button events"
+    )
+    parser.add_argument(
+        "-e", "--events",
+        action="store",
+        type=int,
+        help="Synthetic events per round",
+        dest="EVENTS",
+        default=EVENTS
+    )
+    parser.add_argument(
+        "-r", "--rounds",
+        action="store",
+        type=int,
+        help="Rounds timed for each dispatch",
+        dest="ROUNDS",
+        default=ROUNDS
+    )
+    parser.add_argument(
+        "-w", "--width",
+        action="store",
+        type=int,
+        help="Sprites lit per button in the remapped dispatch",
+        dest="WIDTH",
+        default=3
+    )
+    option = parser.parse_args(argv)
+
+    events = synthetic_events(option.EVENTS)["on_button_press"]
+    print(f"{'Layout':<13}{'Fixed':>10}{'Mapped':>10}{'Remapped':>10}")
+    # Run against an empty configuration directory, as the budgets do
+    with TemporaryDirectory(ignore_cleanup_errors=True) as conf:
+        for layout, scene in layout_scenes(conf):
+            fixed = _time_pairs(*_fixed(scene), events, option.ROUNDS)
+            mapped = _time_pairs(
+                scene.on_button_press, scene.on_button_release,
+                events, option.ROUNDS
+            )
+            _remap(scene, option.WIDTH)
+            remapped = _time_pairs(
+                scene.on_button_press, scene.on_button_release,
+                events, option.ROUNDS
+            )
+            print(
+                f"{layout:<13}{fixed:>8.0f}ns{mapped:>8.0f}ns"
+                f"{remapped:>8.0f}ns"
+            )
+    print("Nanoseconds per press and release")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,686 @@
+import sys
+from argparse import ArgumentParser
+from collections import defaultdict, deque
+from errno import EAGAIN, ENODEV
+from fcntl import ioctl
+from os import O_NONBLOCK, O_RDONLY, close, listdir, open as os_open, read
+from os.path import join
+from struct import Struct, pack, unpack
+from time import clock_gettime, CLOCK_MONOTONIC
+
+import pyglet
+from pyglet.math import Vec2
+
+from .logger import logger
+
+# Layout of a struct input_event: struct timeval, type, code and value
+INPUT_EVENT = Struct("llHHi")
+# Number of input_event structs requested per read
+BATCH_SIZE = 64
+# Directory holding the event device nodes
+INPUT_DIR = "/dev/input"
+
+# Event types and codes from linux/input-event-codes.h
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0x00
+SYN_DROPPED = 0x03
+BTN_GAMEPAD = 0x130
+KEY_MAX = 0x2ff
+ABS_MAX = 0x3f
+
+# Kinds of entries in a compiled dispatch table
+BUTTON = 0
+STICK = 1
+TRIGGER = 2
+DPAD = 3
+
+# Default button mapping, following the Linux gamepad specification
+DEFAULT_BUTTONS = {
+    0x130: "a",
+    0x131: "b",
+    0x133: "y",
+    0x134: "x",
+    0x136: "leftshoulder",
+    0x137: "rightshoulder",
+    0x138: "lefttrigger",
+    0x139: "righttrigger",
+    0x13a: "back",
+    0x13b: "start",
+    0x13c: "guide",
+    0x13d: "leftstick",
+    0x13e: "rightstick"
+}
+# Default axis mapping, following the Linux gamepad specification, as
+# (kind, name, index, sign) with a sign of -1 for inverted axes
+DEFAULT_AXES = {
+    0x00: (STICK, "leftstick", 0, 1),
+    0x01: (STICK, "leftstick", 1, 1),
+    0x03: (STICK, "rightstick", 0, 1),
+    0x04: (STICK, "rightstick", 1, 1),
+    0x02: (TRIGGER, "lefttrigger", 0, 1),
+    0x05: (TRIGGER, "righttrigger", 0, 1),
+    0x10: (DPAD, "dpad", 0, 1),
+    0x11: (DPAD, "dpad", 1, 1)
+}
+# Default digital dpad mapping (BTN_DPAD_UP, DOWN, LEFT, RIGHT)
+DEFAULT_DPAD_BUTTONS = {
+    0x220: (1, 1),
+    0x221: (1, -1),
+    0x222: (0, -1),
+    0x223: (0, 1)
+}
+# Axis codes of the first hat (ABS_HAT0X, ABS_HAT0Y)
+HAT_AXES = (0x10, 0x11)
+# SDL dpad inputs as (axis index, direction)
+SDL_DPAD = {
+    "dpup": (1, 1),
+    "dpdown": (1, -1),
+    "dpleft": (0, -1),
+    "dpright": (0, 1)
+}
+# SDL stick axes as (stick, axis index)
+SDL_STICKS = {
+    "leftx": ("leftstick", 0),
+    "lefty": ("leftstick", 1),
+    "rightx": ("rightstick", 0),
+    "righty": ("rightstick", 1)
+}
+# Button, axis and dpad button mappings translated from the SDL mapping
+# of each device, keyed by device GUID
+MAPPINGS = {}
+
+
+def _ioc_read(nr, size):
+    """
+    Build a read ioctl request number for the evdev interface
+
+    :param nr: Request number
+    :type nr: int
+    :param size: Size of the returned buffer
+    :type size: int
+    :return: Request
+    :rtype: int
+    """
+    return (2 << 30) | (size << 16) | (ord("E") << 8) | nr
+
+
+# Request numbers of the ioctls used here
+EVIOCGID = _ioc_read(0x02, 8)
+EVIOCGKEY = _ioc_read(0x18, KEY_MAX // 8 + 1)
+EVIOCSCLOCKID = (1 << 30) | (4 << 16) | (ord("E") << 8) | 0xa0
+
+
+def _bits(buffer):
+    """
+    Return the set of bits set in the bitmask `buffer`
+    """
+    return {
+        i * 8 + j for i, byte in enumerate(buffer)
+        for j in range(8) if byte >> j & 1
+    }
+
+
+def _get_bits(fileno, event_type, max_code):
+    """
+    Return the set of event codes of type `event_type` supported by the
+    device behind `fileno`
+    """
+    size = max_code // 8 + 1
+    return _bits(
+        ioctl(fileno, _ioc_read(0x20 + event_type, size), bytes(size))
+    )
+
+
+def translate_mapping(mapping, keys, absinfo):
+    """
+    Translate a parsed SDL mapping into the button, axis and dpad button
+    mappings of a device. Buttons and axes are numbered by event code the
+    way pyglet numbers them, with the first hat left out of the axes, so
+    that a mapping resolves to the same inputs with both backends
+
+    :param mapping: Relations keyed by SDL input name
+    :type mapping: dict
+    :param keys: Key codes supported by the device
+    :type keys: iterable
+    :param absinfo: Mapping of axis codes to (minimum, maximum) ranges
+    :type absinfo: dict
+    :return: Button, axis and dpad button mappings
+    :rtype: tuple
+    """
+    # Imported here as pyglet's input package needs a display
+    from pyglet.input.base import Sign
+
+    key_codes = sorted(keys)
+    axis_codes = sorted(code for code in absinfo if code not in HAT_AXES)
+    buttons = {}
+    axes = {}
+    dpad_buttons = {}
+    for name, relation in mapping.items():
+        # Skip the GUID and device name
+        if isinstance(relation, str):
+            continue
+        kind = relation.control_type
+        if kind == "button" and relation.index < len(key_codes):
+            code = key_codes[relation.index]
+            if name in SDL_DPAD:
+                dpad_buttons[code] = SDL_DPAD[name]
+            else:
+                buttons[code] = name
+        elif kind == "axis" and relation.index < len(axis_codes):
+            code = axis_codes[relation.index]
+            sign = -1 if relation.sign == Sign.INVERTED else 1
+            if name in SDL_STICKS:
+                axes[code] = (STICK, *SDL_STICKS[name], sign)
+            elif name in ("lefttrigger", "righttrigger"):
+                axes[code] = (TRIGGER, name, 0, sign)
+        elif kind == "hat0" and name in SDL_DPAD:
+            # The dpad reads the hat axes whole, whatever the direction
+            index = SDL_DPAD[name][0]
+            axes[HAT_AXES[index]] = (DPAD, "dpad", index, 1)
+    return buttons, axes, dpad_buttons
+
+
+def compile_table(guid, absinfo):
+    """
+    Compile the button and axis mapping for `guid` into a flat table keyed
+    by `(type << 16) | code`, with axis normalization precomputed from
+    `absinfo`
+
+    :param guid: Device GUID
+    :type guid: str
+    :param absinfo: Mapping of axis codes to (minimum, maximum) ranges
+    :type absinfo: dict
+    :return: Dispatch table
+    :rtype: dict
+    """
+    buttons, axes, dpad_buttons = MAPPINGS.get(
+        guid, (DEFAULT_BUTTONS, DEFAULT_AXES, DEFAULT_DPAD_BUTTONS)
+    )
+    table = {}
+    for code, name in buttons.items():
+        table[EV_KEY << 16 | code] = (BUTTON, name, 0, 0.0, 0.0)
+    for code, (index, sign) in dpad_buttons.items():
+        table[EV_KEY << 16 | code] = (DPAD, "dpad", index, float(sign), 0.0)
+    for code, (kind, name, index, sign) in axes.items():
+        minimum, maximum = absinfo.get(code, (-32768, 32767))
+        span = (maximum - minimum) or 1
+        if kind == TRIGGER:
+            # Triggers range from 0.0 to 1.0
+            scale, offset = 1 / span, -minimum / span
+        else:
+            # Sticks and hats range from -1.0 to 1.0
+            scale, offset = 2 / span, -1 - 2 * minimum / span
+        # Evdev reports y-axes pointing down, the scenes expect them up
+        if kind in (STICK, DPAD) and index == 1:
+            scale, offset = -scale, -offset
+        # Inverted axes are mirrored within their range
+        if sign < 0:
+            if kind == TRIGGER:
+                scale, offset = -scale, 1 - offset
+            else:
+                scale, offset = -scale, -offset
+        table[EV_ABS << 16 | code] = (kind, name, index, scale, offset)
+    return table
+
+
+class EvdevController(pyglet.event.EventDispatcher):
+    """
+    Controller reading input_event structs straight from an evdev node
+    and dispatching the same events as a pyglet Controller
+
+    :param filename: Path to the event device, or a pipe replaying one
+    :type filename: str
+    :param guid: Device GUID, read from the device when omitted
+    :type guid: str
+    :param name: Device name
+    :type name: str
+    :param absinfo: Mapping of axis codes to (minimum, maximum) ranges,
+        read from the device when omitted
+    :type absinfo: dict
+    :param keys: Key codes supported by the device, read along with the
+        GUID, needed to follow the SDL mapping of the device
+    :type keys: set
+    """
+    def __init__(
+        self, filename, guid=None, name="", absinfo=None, keys=None
+    ):
+        """
+        Constructor
+        """
+        self.filename = filename
+        self.guid = guid
+        self.name = name
+        self.absinfo = absinfo
+        self.keys = keys
+        self.table = {}
+        # Kernel to dispatch latency of the last report, in seconds
+        self.latency = 0.0
+        # Kernel timestamp of the event being dispatched, in seconds
+        self.timestamp = None
+        self._fileno = None
+        self._pending = b""
+        self._dropped = False
+        # Number of SYN_DROPPED events, each for reports the kernel lost
+        self.dropped = 0
+        # Key codes of the buttons last dispatched as pressed
+        self._pressed = set()
+        self._sticks = {
+            "leftstick": [0.0, 0.0],
+            "rightstick": [0.0, 0.0],
+            "dpad": [0.0, 0.0]
+        }
+        self._changed = set()
+
+    def __repr__(self):
+        return f"EvdevController({self.name or self.filename})"
+
+    def open(self, window=None, exclusive=False):
+        """
+        Open the device and start dispatching its events
+        """
+        self._fileno = os_open(self.filename, O_RDONLY | O_NONBLOCK)
+        if self.guid is None or self.absinfo is None:
+            self._query_device()
+        try:
+            # Timestamp events with the same clock used to measure latency
+            ioctl(self._fileno, EVIOCSCLOCKID, pack("i", CLOCK_MONOTONIC))
+        except OSError:
+            pass
+        if self.guid not in MAPPINGS and self.keys is not None:
+            # Resolve the device through the SDL databases once per GUID
+            from .controller_db import find_mapping
+            mapping = find_mapping(self.guid)
+            if mapping:
+                MAPPINGS[self.guid] = translate_mapping(
+                    mapping, self.keys, self.absinfo
+                )
+        self.table = compile_table(self.guid, self.absinfo)
+        pyglet.app.platform_event_loop.select_devices.add(self)
+
+    def close(self):
+        """
+        Stop dispatching events and close the device
+        """
+        if self._fileno is None:
+            return
+        pyglet.app.platform_event_loop.select_devices.discard(self)
+        close(self._fileno)
+        self._fileno = None
+
+    def _query_device(self):
+        """
+        Read the GUID, key codes and axis ranges from the device
+        """
+        # Imported here as pyglet's input package needs a display
+        from pyglet.input.controller import create_guid
+
+        bustype, vendor, product, version = unpack(
+            "4H", ioctl(self._fileno, EVIOCGID, bytes(8))
+        )
+        self.guid = create_guid(bustype, vendor, product, version, "", 0, 0)
+        self.keys = _get_bits(self._fileno, EV_KEY, KEY_MAX)
+        self.absinfo = {}
+        for code in _get_bits(self._fileno, EV_ABS, ABS_MAX):
+            info = ioctl(self._fileno, _ioc_read(0x40 + code, 24), bytes(24))
+            self.absinfo[code] = unpack("6i", info)[1:3]
+
+    def fileno(self):
+        return self._fileno
+
+    def poll(self):
+        return False
+
+    def select(self):
+        """
+        Read every pending input_event in batches and dispatch them
+        """
+        while self._fileno is not None:
+            try:
+                data = read(self._fileno, INPUT_EVENT.size * BATCH_SIZE)
+            except OSError as e:
+                if e.errno != EAGAIN:
+                    self.close()
+                    if e.errno == ENODEV:
+                        self.dispatch_event("on_disconnect", self)
+                return
+            if not data:
+                # The writer of a replay pipe went away, and the device
+                # would otherwise be selected as readable forever
+                self.close()
+                self.dispatch_event("on_disconnect", self)
+                return
+            self.feed(data)
+
+    def feed(self, data):
+        """
+        Process raw input_event bytes, dispatching button events directly
+        and analog events once per SYN_REPORT. After a SYN_DROPPED, the
+        events up to the next SYN_REPORT are discarded and the state of
+        the device is read instead
+
+        :param data: Bytes read from the device
+        :type data: bytes
+        """
+        if self._pending:
+            data = self._pending + data
+        end = len(data) - len(data) % INPUT_EVENT.size
+        self._pending = data[end:]
+        sticks = self._sticks
+        changed = self._changed
+        table = self.table
+        pressed = self._pressed
+        for sec, usec, ev_type, code, value in INPUT_EVENT.iter_unpack(
+            data[:end]
+        ):
+            if ev_type == EV_SYN:
+                if code == SYN_REPORT:
+                    if self._dropped:
+                        # Events were lost, so the queued state is partial
+                        self._dropped = False
+                        changed.clear()
+                        self._resync()
+                    elif changed:
+                        self._flush()
+                    self.latency = (
+                        clock_gettime(CLOCK_MONOTONIC) - sec - usec / 1e6
+                    )
+                elif code == SYN_DROPPED:
+                    self._dropped = True
+                    self.dropped += 1
+                continue
+            if self._dropped:
+                # The rest of the report belongs with the lost events
+                continue
+            entry = table.get(ev_type << 16 | code)
+            if entry is None:
+                continue
+            self.timestamp = sec + usec / 1e6
+            kind, name, index, scale, offset = entry
+            if kind == BUTTON:
+                if value == 1:
+                    pressed.add(code)
+                    self.dispatch_event("on_button_press", self, name)
+                elif value == 0:
+                    pressed.discard(code)
+                    self.dispatch_event("on_button_release", self, name)
+            elif kind == TRIGGER:
+                self.dispatch_event(
+                    "on_trigger_motion", self, name, value * scale + offset
+                )
+            elif ev_type == EV_KEY:
+                # Digital dpad buttons set or reset their axis
+                sticks[name][index] = scale if value else 0.0
+                changed.add(name)
+            else:
+                sticks[name][index] = value * scale + offset
+                changed.add(name)
+
+    def _resync(self):
+        """
+        Read the buttons and axes of the device after events were lost,
+        dispatching the changes from the state last dispatched
+        """
+        try:
+            keys = _bits(
+                ioctl(self._fileno, EVIOCGKEY, bytes(KEY_MAX // 8 + 1))
+            )
+            values = {}
+            for code in self.absinfo or ():
+                info = ioctl(
+                    self._fileno, _ioc_read(0x40 + code, 24), bytes(24)
+                )
+                values[code] = unpack("6i", info)[0]
+        except OSError:
+            # Replayed input has no device to read the state from
+            return
+        sticks = self._sticks
+        for key, (kind, name, index, scale, offset) in self.table.items():
+            ev_type, code = key >> 16, key & 0xffff
+            if kind == BUTTON:
+                if code in keys and code not in self._pressed:
+                    self._pressed.add(code)
+                    self.dispatch_event("on_button_press", self, name)
+                elif code not in keys and code in self._pressed:
+                    self._pressed.discard(code)
+                    self.dispatch_event("on_button_release", self, name)
+            elif ev_type == EV_KEY:
+                sticks[name][index] = scale if code in keys else 0.0
+                self._changed.add(name)
+            elif code not in values:
+                continue
+            elif kind == TRIGGER:
+                self.dispatch_event(
+                    "on_trigger_motion", self, name,
+                    values[code] * scale + offset
+                )
+            else:
+                sticks[name][index] = values[code] * scale + offset
+                self._changed.add(name)
+        if self._changed:
+            self._flush()
+
+    def _flush(self):
+        """
+        Dispatch one motion event for every stick changed in this report
+        """
+        for name in self._changed:
+            vector = Vec2(*self._sticks[name])
+            if name == "dpad":
+                self.dispatch_event("on_dpad_motion", self, vector)
+            else:
+                self.dispatch_event("on_stick_motion", self, name, vector)
+        self._changed.clear()
+        logger.debug(f"Evdev latency: {self.latency * 1000:.3f} ms")
+
+
+EvdevController.register_event_type("on_button_press")
+EvdevController.register_event_type("on_button_release")
+EvdevController.register_event_type("on_stick_motion")
+EvdevController.register_event_type("on_dpad_motion")
+EvdevController.register_event_type("on_trigger_motion")
+EvdevController.register_event_type("on_disconnect")
+
+
+class EvdevControllerManager(pyglet.event.EventDispatcher):
+    """
+    Controller manager for the evdev backend, handling hot-plugging by
+    watching the input devices list
+    """
+    def __init__(self):
+        """
+        Constructor
+        """
+        super().__init__()
+        self._devices_file = open("/proc/bus/input/devices")
+        self._controllers = {}
+        self._device_names = set()
+        for name in self._get_device_names():
+            self._add_device(name)
+        pyglet.app.platform_event_loop.select_devices.add(self)
+
+    @staticmethod
+    def _get_device_names():
+        return {
+            name for name in listdir(INPUT_DIR) if name.startswith("event")
+        }
+
+    def _add_device(self, name):
+        """
+        Create a controller for the device node `name` if it is a gamepad
+        """
+        self._device_names.add(name)
+        filename = join(INPUT_DIR, name)
+        try:
+            fileno = os_open(filename, O_RDONLY | O_NONBLOCK)
+        except OSError:
+            return None
+        try:
+            if BTN_GAMEPAD not in _get_bits(fileno, EV_KEY, KEY_MAX):
+                return None
+            name_buffer = ioctl(fileno, _ioc_read(0x06, 256), bytes(256))
+        except OSError:
+            return None
+        finally:
+            close(fileno)
+        device_name = name_buffer.split(b"\0", 1)[0]
+        controller = EvdevController(
+            filename, name=device_name.decode(errors="replace")
+        )
+        controller.push_handlers(on_disconnect=self._on_device_disconnect)
+        self._controllers[name] = controller
+        return controller
+
+    def _on_device_disconnect(self, controller):
+        """
+        Forget a controller whose device node went away
+        """
+        for name, known in list(self._controllers.items()):
+            if known is controller:
+                del self._controllers[name]
+                self._device_names.discard(name)
+                self.dispatch_event("on_disconnect", controller)
+
+    def fileno(self):
+        return self._devices_file.fileno()
+
+    def poll(self):
+        return False
+
+    def select(self):
+        """
+        Triggered whenever the input devices list changes
+        """
+        self._devices_file.seek(0)
+        self._devices_file.read()
+        names = self._get_device_names()
+        for name in names - self._device_names:
+            controller = self._add_device(name)
+            if controller:
+                self.dispatch_event("on_connect", controller)
+        for name in self._device_names - names:
+            self._device_names.discard(name)
+            controller = self._controllers.pop(name, None)
+            if controller:
+                controller.close()
+                self.dispatch_event("on_disconnect", controller)
+
+    def get_controllers(self):
+        return list(self._controllers.values())
+
+
+EvdevControllerManager.register_event_type("on_connect")
+EvdevControllerManager.register_event_type("on_disconnect")
+
+
+def _percentile(values, fraction):
+    """
+    Return the value below which `fraction` of the sorted `values` fall
+    """
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main(argv=None):
+    """
+    Compare the kernel to dispatch latency of button events between the
+    evdev backend and pyglet's backend, reading the same device with both.
+    Both controllers are given the kernel timestamps the evdev backend
+    reads, matched to pyglet's events in the order they are dispatched
+
+    :param argv: Command line arguments
+    :type argv: list
+    :return: Return code
+    :rtype: int
+    """
+    parser = ArgumentParser(
+        prog="fightsticker.evdev",
+        description="Fightsticker - Compare the latency of the backends"
+    )
+    parser.add_argument(
+        "device",
+        nargs="?",
+        help="Event device to read, the first gamepad found by default",
+        default=None
+    )
+    parser.add_argument(
+        "-s", "--seconds",
+        action="store",
+        type=float,
+        help="Seconds to press buttons for",
+        dest="SECONDS",
+        default=10.0
+    )
+    option = parser.parse_args(argv)
+    # Imported here as pyglet's input package needs a display
+    from pyglet.input import get_controllers
+
+    # Find the device with the evdev backend, then with pyglet's
+    if option.device:
+        controller = EvdevController(option.device)
+    else:
+        controllers = EvdevControllerManager().get_controllers()
+        if not controllers:
+            print("No gamepad found")
+            return 1
+        controller = controllers[0]
+    for reference in get_controllers():
+        if getattr(reference.device, "_filename", None) == controller.filename:
+            break
+    else:
+        print(f"pyglet does not recognize {controller.filename} as a gamepad")
+        return 1
+
+    # Kernel timestamps of the button events, queued per event for pyglet's
+    # backend to take in turn, and the latencies of both backends
+    timestamps = defaultdict(deque)
+    latencies = {"evdev": [], "pyglet": []}
+
+    def on_evdev_button(event):
+        def handler(_controller, button):
+            now = clock_gettime(CLOCK_MONOTONIC)
+            timestamps[event, button].append(controller.timestamp)
+            latencies["evdev"].append(now - controller.timestamp)
+        return handler
+
+    def on_pyglet_button(event):
+        def handler(_controller, button):
+            now = clock_gettime(CLOCK_MONOTONIC)
+            if timestamps[event, button]:
+                timestamp = timestamps[event, button].popleft()
+                latencies["pyglet"].append(now - timestamp)
+        return handler
+
+    controller.push_handlers(
+        on_button_press=on_evdev_button("press"),
+        on_button_release=on_evdev_button("release")
+    )
+    reference.push_handlers(
+        on_button_press=on_pyglet_button("press"),
+        on_button_release=on_pyglet_button("release")
+    )
+    controller.open()
+    reference.open()
+    print(f"Press buttons on {controller!r} for {option.SECONDS:g} s")
+    pyglet.clock.schedule_once(lambda dt: pyglet.app.exit(), option.SECONDS)
+    pyglet.app.run(None)
+    reference.close()
+    controller.close()
+
+    print(f"{'Backend':<10}{'Events':>8}{'Median':>10}{'p99':>10}{'Max':>10}")
+    for backend, values in latencies.items():
+        if not values:
+            print(f"{backend:<10}{0:>8}")
+            continue
+        values.sort()
+        print(
+            f"{backend:<10}{len(values):>8}"
+            f"{_percentile(values, 0.5) * 1000:>8.3f}ms"
+            f"{_percentile(values, 0.99) * 1000:>8.3f}ms"
+            f"{values[-1] * 1000:>8.3f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
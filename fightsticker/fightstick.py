@@ -1,28 +1,110 @@
-from os import remove
-from os.path import exists, join
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from math import sqrt
+from os import remove, scandir
+from os.path import basename, exists, join
+from platform import platform, python_version, system
 from sys import argv
+from time import perf_counter
 from urllib.request import urlopen
 from configparser import ConfigParser, ParsingError, NoSectionError
 
 import pyglet
-from pyglet.math import Mat4, Vec3
+from pyglet.math import Mat4
 
 from . import *
+from . import __version__, gauge, image_cache
+from .animation import CURVES, AnimatedSprite, AnimationGroup
 from .arg_parser import ArgParser
+from .async_loop import AsyncEventLoop
+from .blending import PremultipliedSprite, PremultipliedSpriteGroup
+from .catalog import catalog, images_catalog
+from .controller_db import CACHE, DATABASE, install_mappings, load_mappings
+from .diagnostics import PollingAnalyzer
+from .history import InputHistory
+from .filters import InputFilter
+from .framelock import FrameLock
+from .hud import PerformanceHUD
 from .logger import logger
+from .motions import MotionRecognizer
+from .plugins import PluginHost
+from .profiler import HANDLERS, Profiler
+from .recorder import Recorder
+from .settings import settings
+from .soak import SoakTest
 
 # Set up the debugging
 parser = ArgParser()
 args = argv[1:]
-option = parser.parse_args(args)
+# Tools importing the scenes, such as the budget checks, parse their own
+# arguments, so those are left to them
+option, unknown = parser.parse_known_args(args)
 if option.DEBUG:
     logger.setLevel("DEBUG")
 logger.debug("Debugging Active")
+if unknown:
+    logger.warning(f"Ignoring arguments: {' '.join(unknown)}")
 
-# Load the images directories
-pyglet.resource.path.append(join(CONF, "images"))
-pyglet.resource.path.append(join(APPDIR, "images"))
-pyglet.resource.reindex()
+
+def load_texture(name):
+    """
+    Load the image `name` from the asset catalog through the decoded
+    image cache
+
+    :param name: Image filename
+    :type name: str
+    :return: Texture
+    :rtype: pyglet.image.Texture
+    """
+    return image_cache.load_texture(catalog.locate(name))
+
+
+def _stick_offset(vector, deadzone, reach, normalize=False):
+    """
+    Return the offset from the center of a stick drawn at `vector`, its
+    length capped to 1.0, or set to it if `normalize`, and none within
+    the deadzone. Computed from the coordinates so that no vector is
+    allocated on every event
+
+    :param vector: Stick position
+    :type vector: pyglet.math.Vec2
+    :param deadzone: Stick deadzone
+    :type deadzone: float
+    :param reach: Distance from the center at full tilt
+    :type reach: float
+    :param normalize: Whether to draw any tilt at full length
+    :type normalize: bool
+    :return: Horizontal and vertical offset
+    :rtype: tuple
+    """
+    x, y = vector.x, vector.y
+    length = sqrt(x * x + y * y)
+    if length > 1.0 or (normalize and length):
+        x /= length
+        y /= length
+        length = 1.0
+    if length <= deadzone:
+        return 0, 0
+    return x * reach, y * reach
+
+
+def _show(sprite, visible):
+    """
+    Show or hide `sprite`, leaving its vertices alone if it already is
+    """
+    if sprite.visible != visible:
+        sprite.visible = visible
+
+
+def _move(sprite, x, y):
+    """
+    Move `sprite` to (`x`, `y`), leaving its vertices alone if it is
+    already there
+    """
+    if sprite.x != x or sprite.y != y:
+        sprite.position = x, y, 0
 
 
 class _BaseScene:
@@ -39,7 +121,7 @@ class RetryScene(_BaseScene):
     """
     def __init__(self):
         self.batch = pyglet.graphics.Batch()
-        img = pyglet.resource.image("missing.png")
+        img = load_texture("missing.png")
         self.sprite = pyglet.sprite.Sprite(img=img, batch=self.batch)
 
 
@@ -51,46 +133,124 @@ class LayoutScene(_BaseScene):
     :type layout: dict
     :param images: Images mapping
     :type images: dict
+    :param mapping: Button to sprite names mapping
+    :type mapping: dict
+    :param transparent: Draw for a transparent window
+    :type transparent: bool
+    :param animation: Press and release animation of the buttons, shown
+        and hidden at once if None
+    :type animation: dict
+    :param triggers: Display mode of the analog triggers: threshold to
+        show them past the deadzone, fill or ramp to show how far they
+        are pulled
+    :type triggers: str
+    :param image_catalog: Catalog the images are looked up in
+    :type image_catalog: AssetCatalog
     """
-    def __init__(self, layout, images):
+    def __init__(
+        self,
+        layout,
+        images,
+        mapping=MAPPING,
+        transparent=False,
+        animation=None,
+        triggers="threshold",
+        image_catalog=catalog
+    ):
         """
         Constructor
         """
         self.layout = layout
         self.images = images
+        self.mapping = mapping
+        self.transparent = transparent
+        self.animation = animation
+        self.image_catalog = image_catalog
+        self.sprite_class = (
+            PremultipliedSprite if transparent else pyglet.sprite.Sprite
+        )
         self.batch = pyglet.graphics.Batch()
+        # Sprites and the paths of their textures, released on deletion
+        self.sprites = []
+        self.textures = []
+        # Scale of the image variants drawn
+        self.scale = 1
         # Ordered groups to handle draw order of the sprites
         self.bg = pyglet.graphics.Group(0)
-        self.fg = pyglet.graphics.Group(1)
+        if animation:
+            self.fg = AnimationGroup(animation, 1)
+        else:
+            self.fg = pyglet.graphics.Group(1)
         # Initialize the layout
         self._init_layout()
-        # Mapping of input names to sprite names
-        self.button_mapping = {
-            "back": self.select_spr,
-            "start": self.start_spr,
-            "guide": self.guide_spr,
-            "x": self.x_spr,
-            "y": self.y_spr,
-            "rightshoulder": self.rb_spr,
-            "leftshoulder": self.lb_spr,
-            "a": self.a_spr,
-            "b": self.b_spr,
-            "righttrigger": self.rt_spr,
-            "lefttrigger": self.lt_spr
+        # Compile the mapping into a table of sprites indexed by button
+        self.button_table = self._compile_mapping()
+        # Buttons held, indexed like `BUTTONS`, and the number of held
+        # buttons lighting each sprite, so that a sprite lit by several
+        # buttons stays shown until all of them are released
+        self.held = [False] * len(BUTTONS)
+        self.holds = {
+            sprite: 0 for sprites in self.button_table for sprite in sprites
         }
+        # Analog displays of the triggers indexed like `BUTTONS`, if any
+        self.gauges = {}
+        if triggers != "threshold":
+            for trigger in ("lefttrigger", "righttrigger"):
+                index = BUTTON_INDEX[trigger]
+                self.gauges[index] = gauge.TriggerGauge(
+                    self.button_table[index], triggers,
+                    partial(self._hold, index)
+                )
 
     def _make_sprite(self, name, group, visible=True):
         """
         Helper function to make a Sprite
         """
-        image = pyglet.resource.image(self.images.get(name, "none.png"))
+        path = self.image_catalog.locate(self.images.get(name, "none.png"))
+        image = image_cache.load_texture(path)
+        self.textures.append(path)
         position = self.layout.get(name, (0, 0))
-        sprite = pyglet.sprite.Sprite(
-            image, *position, batch=self.batch, group=group
-        )
-        sprite.visible = visible
+        if self.animation and not visible:
+            # Buttons fade in and out in the shader
+            sprite = AnimatedSprite(
+                image, *position, batch=self.batch, group=group,
+                group_class=(
+                    PremultipliedSpriteGroup if self.transparent else None
+                )
+            )
+        else:
+            sprite = self.sprite_class(
+                image, *position, batch=self.batch, group=group
+            )
+            sprite.visible = visible
+        self.sprites.append(sprite)
         return sprite
 
+    def set_scale(self, scale):
+        """
+        Swap the textures for image variants pre-scaled by `scale`, drawn
+        scaled down by as much so that the layout keeps its coordinates
+        """
+        for sprite, path in zip(self.sprites, self.textures):
+            sprite.image = image_cache.load_texture(path, scale)
+            sprite.scale = 1 / scale
+            image_cache.release_texture(path, self.scale)
+        self.scale = scale
+        # New textures rebuild the vertices the gauges cropped
+        for trigger in self.gauges.values():
+            trigger.apply()
+
+    def delete(self):
+        """
+        Delete the sprites and release their textures
+        """
+        for sprite in self.sprites:
+            sprite.delete()
+        self.sprites.clear()
+        for path in self.textures:
+            image_cache.release_texture(path, self.scale)
+        self.textures.clear()
+
     def _init_layout(self):
         """
         Create all sprites using helper function (name, batch, group,
@@ -98,38 +258,67 @@ class LayoutScene(_BaseScene):
         """
         pass
 
+    def _compile_mapping(self):
+        """
+        Build a list, indexed like `BUTTONS`, holding the tuple of sprites
+        each button lights up. Buttons mapped to nothing get an empty
+        tuple and are ignored
+        """
+        table = []
+        for button in BUTTONS:
+            sprites = []
+            for name in self.mapping.get(button, ()):
+                sprite = getattr(self, f"{name}_spr", None)
+                if sprite is None:
+                    logger.error(f"Invalid mapping: {button} = {name}")
+                else:
+                    sprites.append(sprite)
+            table.append(tuple(sprites))
+        return table
+
+    def _hold(self, index, held):
+        """
+        Hold or release the button at `index` of `BUTTONS`, showing its
+        sprites while any button lighting them is held
+        """
+        if self.held[index] == held:
+            return
+        self.held[index] = held
+        step = 1 if held else -1
+        holds = self.holds
+        for sprite in self.button_table[index]:
+            holds[sprite] += step
+            _show(sprite, holds[sprite] > 0)
+
     def on_button_press(self, controller, button):
         """
         Event to show a button when pressed
         """
-        logger.debug(f"Pressed Button: {button}")
-        pressed_button = self.button_mapping.get(button, None)
-        if pressed_button:
-            pressed_button.visible = True
+        logger.debug("Pressed Button: %s", button)
+        index = BUTTON_INDEX.get(button)
+        if index is not None:
+            self._hold(index, True)
 
     def on_button_release(self, controller, button):
         """
         Event to hide the sprite when the button is released
         """
-        pressed_button = self.button_mapping.get(button, None)
-        if pressed_button:
-            pressed_button.visible = False
+        index = BUTTON_INDEX.get(button)
+        if index is not None:
+            self._hold(index, False)
 
     def on_trigger_motion(self, controller, trigger, value):
         """
         Math to draw trigger inputs or hide them
         """
-        logger.debug(f"Pulled Trigger: {trigger}")
-        if trigger == "lefttrigger":
-            if value > self.manager.trigger_deadzone:
-                self.lt_spr.visible = True
-            elif value < self.manager.trigger_deadzone:
-                self.lt_spr.visible = False
-        if trigger == "righttrigger":
-            if value > self.manager.trigger_deadzone:
-                self.rt_spr.visible = True
-            elif value < self.manager.trigger_deadzone:
-                self.rt_spr.visible = False
+        logger.debug("Pulled Trigger: %s", trigger)
+        index = BUTTON_INDEX.get(trigger)
+        if index is None:
+            return
+        if self.gauges:
+            self.gauges[index].update(value)
+            return
+        self._hold(index, value > self.manager.trigger_deadzone)
 
     def on_stick_motion(self, controller, stick, vector):
         """
@@ -152,12 +341,35 @@ class TraditionalScene(LayoutScene):
     :type layout: dict
     :param images: Images mapping
     :type images: dict
+    :param mapping: Button to sprite names mapping
+    :type mapping: dict
+    :param transparent: Draw for a transparent window
+    :type transparent: bool
+    :param animation: Press and release animation of the buttons, shown
+        and hidden at once if None
+    :type animation: dict
+    :param triggers: Display mode of the analog triggers
+    :type triggers: str
+    :param image_catalog: Catalog the images are looked up in
+    :type image_catalog: AssetCatalog
     """
-    def __init__(self, layout, images):
+    def __init__(
+        self,
+        layout,
+        images,
+        mapping=MAPPING,
+        transparent=False,
+        animation=None,
+        triggers="threshold",
+        image_catalog=catalog
+    ):
         """
         Constructor
         """
-        super().__init__(layout, images)
+        super().__init__(
+            layout, images, mapping, transparent, animation, triggers,
+            image_catalog
+        )
 
     def _init_layout(self):
         """
@@ -182,27 +394,22 @@ class TraditionalScene(LayoutScene):
         """
         Math to draw stick inputs in their correct location
         """
-        logger.debug(f"Moved Stick: {stick}, {vector.x, vector.y}")
+        logger.debug("Moved Stick: %s, (%s, %s)", stick, vector.x, vector.y)
         if stick == "leftstick":
             xpos, ypos = self.layout["stick"]
-            # Normalize the vector if its length exceeds 1.0,
-            # capping the distance from the center to a max of 50
-            # in all directions
-            vec = min(vector, vector.normalize())
-            if vec.length() > self.manager.stick_deadzone:
-                xpos += vec.x * 50
-                ypos += vec.y * 50
-            self.stick_spr.position = xpos, ypos, 0
+            # Cap the distance from the center to a max of 50 in all
+            # directions
+            dx, dy = _stick_offset(vector, self.manager.stick_deadzone, 50)
+            _move(self.stick_spr, xpos + dx, ypos + dy)
 
     def on_dpad_motion(self, controller, vector):
         """
         Math to draw dpad inputs in their correct location
         """
-        logger.debug(f"Moved Dpad: {vector.x, vector.y}")
+        logger.debug("Moved Dpad: (%s, %s)", vector.x, vector.y)
         xpos, ypos = self.layout["stick"]
-        xpos += vector.normalize().x * 50
-        ypos += vector.normalize().y * 50
-        self.stick_spr.position = xpos, ypos, 0
+        dx, dy = _stick_offset(vector, 0, 50, True)
+        _move(self.stick_spr, xpos + dx, ypos + dy)
 
 
 class LeverlessScene(LayoutScene):
@@ -213,12 +420,35 @@ class LeverlessScene(LayoutScene):
     :type layout: dict
     :param images: Images mapping
     :type images: dict
+    :param mapping: Button to sprite names mapping
+    :type mapping: dict
+    :param transparent: Draw for a transparent window
+    :type transparent: bool
+    :param animation: Press and release animation of the buttons, shown
+        and hidden at once if None
+    :type animation: dict
+    :param triggers: Display mode of the analog triggers
+    :type triggers: str
+    :param image_catalog: Catalog the images are looked up in
+    :type image_catalog: AssetCatalog
     """
-    def __init__(self, layout, images):
+    def __init__(
+        self,
+        layout,
+        images,
+        mapping=MAPPING,
+        transparent=False,
+        animation=None,
+        triggers="threshold",
+        image_catalog=catalog
+    ):
         """
         Constructor
         """
-        super().__init__(layout, images)
+        super().__init__(
+            layout, images, mapping, transparent, animation, triggers,
+            image_catalog
+        )
 
     def _init_layout(self):
         """
@@ -246,22 +476,23 @@ class LeverlessScene(LayoutScene):
         """
         Have the stick inputs alert the main window to draw the sprites
         """
-        logger.debug(f"Moved Stick: {stick}, {vector.x, vector.y}")
+        logger.debug("Moved Stick: %s, (%s, %s)", stick, vector.x, vector.y)
         if stick == "leftstick":
-            self.up_spr.visible = vector.y > self.manager.stick_deadzone
-            self.down_spr.visible = vector.y < -self.manager.stick_deadzone
-            self.left_spr.visible = vector.x < -self.manager.stick_deadzone
-            self.right_spr.visible = vector.x > self.manager.stick_deadzone
+            deadzone = self.manager.stick_deadzone
+            _show(self.up_spr, vector.y > deadzone)
+            _show(self.down_spr, vector.y < -deadzone)
+            _show(self.left_spr, vector.x < -deadzone)
+            _show(self.right_spr, vector.x > deadzone)
 
     def on_dpad_motion(self, controller, vector):
         """
         Have the dpad hats alert the main window to draw the sprites
         """
-        logger.debug(f"Moved Dpad: {vector.x, vector.y}")
-        self.up_spr.visible = vector.y > 0
-        self.down_spr.visible = vector.y < 0
-        self.left_spr.visible = vector.x < 0
-        self.right_spr.visible = vector.x > 0
+        logger.debug("Moved Dpad: (%s, %s)", vector.x, vector.y)
+        _show(self.up_spr, vector.y > 0)
+        _show(self.down_spr, vector.y < 0)
+        _show(self.left_spr, vector.x < 0)
+        _show(self.right_spr, vector.x > 0)
 
 
 class PadScene(LayoutScene):
@@ -272,12 +503,35 @@ class PadScene(LayoutScene):
     :type layout: dict
     :param images: Images mapping
     :type images: dict
+    :param mapping: Button to sprite names mapping
+    :type mapping: dict
+    :param transparent: Draw for a transparent window
+    :type transparent: bool
+    :param animation: Press and release animation of the buttons, shown
+        and hidden at once if None
+    :type animation: dict
+    :param triggers: Display mode of the analog triggers
+    :type triggers: str
+    :param image_catalog: Catalog the images are looked up in
+    :type image_catalog: AssetCatalog
     """
-    def __init__(self, layout, images):
+    def __init__(
+        self,
+        layout,
+        images,
+        mapping=MAPPING,
+        transparent=False,
+        animation=None,
+        triggers="threshold",
+        image_catalog=catalog
+    ):
         """
         Constructor
         """
-        super().__init__(layout, images)
+        super().__init__(
+            layout, images, mapping, transparent, animation, triggers,
+            image_catalog
+        )
 
     def _init_layout(self):
         """
@@ -303,64 +557,58 @@ class PadScene(LayoutScene):
         self.b_spr = self._make_sprite("b", self.fg, False)
         self.rt_spr = self._make_sprite("rt", self.fg, False)
         self.lt_spr = self._make_sprite("lt", self.fg, False)
+        # Initialize diagonal sprite position parameters
+        xpos, ypos = self.layout["up"][0], self.layout["right"][1]
+        # Calculate the width and height of the diagonal sprite through
+        # the relationship with the position of the up and right
+        # sprites, as they represent the top left and bottom right
+        # corners of the sprite
+        diag_x = self.layout["right"][0] - self.layout["up"][0]
+        diag_y = self.layout["up"][1] - self.layout["right"][1]
+        # Diagonal sprite orientation and position keyed by direction
+        self.diagonals = {
+            (-1, 1): (0, xpos, ypos),
+            (1, 1): (90, xpos, ypos + diag_y),
+            (1, -1): (180, xpos + diag_x, ypos + diag_y),
+            (-1, -1): (270, xpos + diag_x, ypos)
+        }
 
     def on_stick_motion(self, controller, stick, vector):
         """
         Math to draw stick inputs in their correct location
         """
-        logger.debug(f"Moved Stick: {stick}, {vector.x, vector.y}")
+        logger.debug("Moved Stick: %s, (%s, %s)", stick, vector.x, vector.y)
         xpos, ypos = self.layout[stick]
-        # Normalize the vector if its length exceeds 1.0,
-        # capping the distance from the center to a max of 45
-        # in all directions
-        vec = min(vector, vector.normalize())
-        if vec.length() > self.manager.stick_deadzone:
-            xpos += vec.x * 45
-            ypos += vec.y * 45
+        # Cap the distance from the center to a max of 45 in all
+        # directions
+        dx, dy = _stick_offset(vector, self.manager.stick_deadzone, 45)
         if stick == "leftstick":
-            self.leftstick_spr.position = xpos, ypos, 0
+            _move(self.leftstick_spr, xpos + dx, ypos + dy)
         else:
-            self.rightstick_spr.position = xpos, ypos, 0
+            _move(self.rightstick_spr, xpos + dx, ypos + dy)
 
     def on_dpad_motion(self, controller, vector):
         """
         Have the dpad hats alert the main window to draw the sprites
         """
-        logger.debug(f"Moved Dpad: {vector.x, vector.y}")
-        self.up_spr.visible = vector.y > 0
-        self.down_spr.visible = vector.y < 0
-        self.left_spr.visible = vector.x < 0
-        self.right_spr.visible = vector.x > 0
-        # Initialize diagonal sprite position parameters
-        xpos, ypos = self.layout["up"][0], self.layout["right"][1]
-        # Calculate the width and height of the diagonal sprite through
-        # the relationship with the position of the up and right
-        # sprites, as they represent the top left and bottom right
-        # corners of the sprite
-        diag_x = self.layout["right"][0] - self.layout["up"][0]
-        diag_y = self.layout["up"][1] - self.layout["right"][1]
-        # Determine diagonal sprite orientation and position
-        if self.up_spr.visible and self.left_spr.visible:
-            self.diag_spr.rotation = 0
-            self.diag_spr.position = xpos, ypos, 0
-        elif self.up_spr.visible and self.right_spr.visible:
-            self.diag_spr.rotation = 90
-            self.diag_spr.position = xpos, ypos + diag_y, 0
-        elif self.down_spr.visible and self.right_spr.visible:
-            self.diag_spr.rotation = 180
-            self.diag_spr.position = xpos + diag_x, ypos + diag_y, 0
-        elif self.down_spr.visible and self.left_spr.visible:
-            self.diag_spr.rotation = 270
-            self.diag_spr.position = xpos + diag_x, ypos, 0
-        # Now display the diagonal sprite if x- and y-axis sprites are
-        # simultaneously active
-        if (
-            (self.up_spr.visible or self.down_spr.visible)
-            and (self.left_spr.visible or self.right_spr.visible)
-        ):
-            self.diag_spr.visible = True
-        else:
-            self.diag_spr.visible = False            
+        logger.debug("Moved Dpad: (%s, %s)", vector.x, vector.y)
+        up, down = vector.y > 0, vector.y < 0
+        left, right = vector.x < 0, vector.x > 0
+        _show(self.up_spr, up)
+        _show(self.down_spr, down)
+        _show(self.left_spr, left)
+        _show(self.right_spr, right)
+        # Display the diagonal sprite, oriented and positioned, if x- and
+        # y-axis sprites are simultaneously active
+        diagonal = self.diagonals.get((right - left, up - down))
+        if diagonal is None:
+            _show(self.diag_spr, False)
+            return
+        rotation, xpos, ypos = diagonal
+        if self.diag_spr.rotation != rotation:
+            self.diag_spr.rotation = rotation
+        _move(self.diag_spr, xpos, ypos)
+        _show(self.diag_spr, True)
 
 
 class SceneManager:
@@ -378,33 +626,189 @@ class SceneManager:
     :type layout: str
     :param config: Configuration
     :type config: dict
+    :param backend: Controller input backend, pyglet or evdev
+    :type backend: str
+    :param history: Show the input history beside the layout
+    :type history: bool
+    :param geometry: Fit of the layout in the window: aspect to resize
+        the window to the layout aspect ratio, letterbox to leave bars
+        around it or integer to also only scale by whole numbers
+    :type geometry: str
+    :param frame_lock: Game frames per second the inputs are quantized
+        to and the window drawn at, if any
+    :type frame_lock: float
+    :param transparent: Clear to transparent with premultiplied alpha
+    :type transparent: bool
+    :param hide_background: Hide the background image of the layouts
+    :type hide_background: bool
+    :param triggers: Display mode of the analog triggers, threshold, fill
+        or ramp
+    :type triggers: str
+    :param hysteresis: Hysteresis band of the sticks and triggers deadzones
+        keyed by input class
+    :type hysteresis: dict
+    :param debounce: Debounce time in seconds keyed by input class
+    :type debounce: dict
+    :param profiler: Profiler timing the hot paths, if any
+    :type profiler: Profiler
+    :param conf: Configuration directory holding the user's images,
+        layouts and controller database
+    :type conf: str
     """
-    def __init__(self, window_instance, layout="traditional", config=DEFAULT):
+    def __init__(
+        self,
+        window_instance,
+        layout="traditional",
+        config=DEFAULT,
+        backend="pyglet",
+        history=False,
+        geometry="aspect",
+        frame_lock=None,
+        transparent=False,
+        hide_background=False,
+        triggers="threshold",
+        hysteresis=None,
+        debounce=None,
+        profiler=None,
+        conf=CONF
+    ):
         """
         Constructor
         """
         self.window = window_instance
+        self.conf = conf
+        self.catalog = catalog if conf == CONF else images_catalog(conf)
+        self.geometry = geometry
+        self.transparent = transparent
+        self.hide_background = hide_background
+        self.triggers = triggers
+        self.profiler = profiler
+        if transparent:
+            pyglet.gl.glClearColor(0, 0, 0, 0)
+        # Time the window handlers before they are pushed
+        if profiler:
+            profiler.instrument(
+                self,
+                ("on_draw", "on_resize", "enforce_aspect_ratio"),
+                "SceneManager"
+            )
         self.window.push_handlers(self)
+        # Width of the drawn area, including the history panel
+        self.width = WINDOW_WIDTH + HISTORY_WIDTH if history else WINDOW_WIDTH
+        # Batch for elements drawn over every scene
+        self.overlay = pyglet.graphics.Batch()
+        if profiler:
+            profiler.instrument(self.overlay, ("draw",), "overlay")
+        # Performance HUD, only created while shown
+        self.hud = None
 
         self.fightstick = None
+        # Handlers receiving the controller events alongside the scene
+        self._listeners = []
+
+        # Set up scene instances
+        self.config = config
+        self._scenes = {}
+        self._current_scene = None
+        # Layout scenes kept warm, least recently used first
+        self._pool = OrderedDict()
+        # Scene switches, switches to a warm scene and the latency in
+        # seconds of the last one up to its first frame
+        self.switch_stats = {"switches": 0, "hits": 0, "latency": 0.0}
+        self._switch_started = None
+        # Scale of the image variants matching the window size, prepared
+        # in the background
+        self.scale = 1
+        self._scaler = None
+        self._scaling = None
+        # Last window size requested to keep the aspect ratio
+        self._requested_size = None
+        self.layout = layout
+        self.skin = config[layout[:4]]
+        self.main = self._warm(layout, self.skin)
+        self.add_scene("retry", RetryScene())
+        # Recognizer of the motions defined by the layout
+        self.motions = None
+        # Quantize the inputs reaching the scenes to game frames
+        self.frame_lock = None
+        if frame_lock:
+            self.frame_lock = FrameLock(self, frame_lock)
+        # Filter the flips of noisy inputs before the frame lock
+        self.input_filter = None
+        if hysteresis or debounce:
+            self.input_filter = InputFilter(self, hysteresis, debounce)
+
+        # Load user-supplied SDL controller mappings so that devices
+        # missing from pyglet's database are recognized
+        load_mappings(
+            join(conf, basename(DATABASE)), join(conf, basename(CACHE))
+        )
+        install_mappings()
 
+        # Instantiate a ControllerManager to handle hot-plugging
+        if backend == "evdev" and system() == "Linux":
+            # Imported here as the evdev backend only exists on Linux
+            from .evdev import EvdevControllerManager
+            self.controller_manager = EvdevControllerManager()
+        else:
+            if backend == "evdev":
+                logger.error("The evdev backend is only available on Linux")
+            self.controller_manager = pyglet.input.ControllerManager()
+        self.controller_manager.on_connect = self.on_controller_connect
+        self.controller_manager.on_disconnect = self.on_controller_disconnect
+
+        # Set scene depending on if there is a controller
+        controllers = self.controller_manager.get_controllers()
+        if controllers:
+            self.on_controller_connect(controllers[0])
+            self.set_scene(self.main)
+        else:
+            self.set_scene("retry")
+
+        # Global state for all scenes
+        self.stick_deadzone = config["stic"]
+        self.trigger_deadzone = config["trig"]
+        # Pick up deadzone changes saved while running
+        settings.subscribe(self.on_settings_change)
+
+        # Recognize the motions defined by the layout
+        self._set_motions(self._scenes[self.main])
+
+        # Show the input history
+        if history:
+            self.history = InputHistory(self)
+            self.add_listener(self.history)
+            pyglet.clock.schedule_interval(
+                self.history.update, 1 / FRAME_RATE
+            )
+
+    def _load_scene(self, layout, filename):
+        """
+        Build the scene of `layout` drawn from the layout file `filename`
+        """
         # Set up configuration parser
         config_parser = ConfigParser()
         config_parser.add_section("layout")
         config_parser.add_section("images")
+        config_parser.add_section("mapping")
+        config_parser.add_section("motions")
+        config_parser.add_section("animation")
         # Read the layout file
-        layout_file = config[layout[:4]]
         if layout == "pad":
-            layout_conf = LAYOUT_PAD
-            images_conf = IMAGES_PAD
+            layout_conf = dict(LAYOUT_PAD)
+            images_conf = dict(IMAGES_PAD)
         elif layout == "leverless":
-            layout_conf = LAYOUT_LEVERLESS
-            images_conf = IMAGES_LEVERLESS
+            layout_conf = dict(LAYOUT_LEVERLESS)
+            images_conf = dict(IMAGES_LEVERLESS)
         else:
-            layout_conf = LAYOUT_TRADITIONAL
-            images_conf = IMAGES_TRADITIONAL
+            layout_conf = dict(LAYOUT_TRADITIONAL)
+            images_conf = dict(IMAGES_TRADITIONAL)
+        mapping_conf = dict(MAPPING)
+        motions_conf = {}
+        charge = CHARGE_FRAMES
+        animation_conf = None
         try:
-            if config_parser.read(layout_file):
+            if config_parser.read(filename):
                 for k, v in config_parser.items("layout"):
                     try:
                         x, y = v.split(",")
@@ -413,42 +817,196 @@ class SceneManager:
                         logger.error(f"Invalid item: {k} = {v}")
                 for k, v in config_parser.items("images"):
                     images_conf[k] = v
+                for k, v in config_parser.items("mapping"):
+                    if k not in MAPPING:
+                        logger.error(f"Invalid item: {k} = {v}")
+                        continue
+                    mapping_conf[k] = tuple(
+                        name.strip() for name in v.split(",") if name.strip()
+                    )
+                for k, v in config_parser.items("motions"):
+                    try:
+                        if k == "charge":
+                            charge = int(v)
+                        else:
+                            motions_conf[k.upper()] = int(v)
+                    except ValueError:
+                        logger.error(f"Invalid item: {k} = {v}")
+                for k, v in config_parser.items("animation"):
+                    if animation_conf is None:
+                        animation_conf = dict(ANIMATION)
+                    if k not in ANIMATION:
+                        logger.error(f"Invalid item: {k} = {v}")
+                    elif k == "curve":
+                        if v.strip().lower() in CURVES:
+                            animation_conf[k] = v.strip().lower()
+                        else:
+                            logger.error(f"Invalid item: {k} = {v}")
+                    else:
+                        try:
+                            animation_conf[k] = max(0.0, float(v))
+                        except ValueError:
+                            logger.error(f"Invalid item: {k} = {v}")
         except (ParsingError, NoSectionError):
             logger.error("Invalid config file, falling back to default")
 
-        # Set up scene instances
-        self._scenes = {}
-        self._current_scene = None
+        # Pick up images added or removed since the last scene was loaded
+        self.catalog.refresh()
         if layout == "pad":
-            self.add_scene(
-                "main", PadScene(layout_conf, images_conf)
-            )
+            scene_class = PadScene
         elif layout == "leverless":
-            self.add_scene(
-                "main", LeverlessScene(layout_conf, images_conf)
-            )
+            scene_class = LeverlessScene
         else:
-            self.add_scene(
-                "main", TraditionalScene(layout_conf, images_conf)
+            scene_class = TraditionalScene
+        scene = scene_class(
+            layout_conf,
+            images_conf,
+            mapping_conf,
+            self.transparent,
+            animation_conf,
+            self.triggers,
+            self.catalog
+        )
+        if self.hide_background:
+            scene.background.visible = False
+        # Motions are recognized while the scene is shown
+        scene.motions = motions_conf
+        scene.charge = charge
+        return scene
+
+    def _warm(self, layout, filename):
+        """
+        Return the name of the scene of `layout` drawn from `filename`,
+        building it unless it is still warm in the pool
+        """
+        name = f"{layout}:{filename}"
+        if name in self._pool:
+            self._pool.move_to_end(name)
+        else:
+            scene = self._load_scene(layout, filename)
+            self._pool[name] = scene
+            self.add_scene(name, scene)
+        return name
+
+    def _set_motions(self, scene):
+        """
+        Recognize the motions of `scene` in place of the previous ones
+        """
+        if self.motions:
+            self.remove_listener(self.motions)
+            self.motions.delete()
+            self.motions = None
+        if scene.motions:
+            self.motions = MotionRecognizer(self, scene.motions, scene.charge)
+            self.add_listener(self.motions)
+
+    def switch(self, layout, filename=None):
+        """
+        Switch to another layout or skin without reopening the window.
+        Recently used scenes are kept warm so switching back to one only
+        takes a frame
+
+        :param layout: Layout option, traditional, leverless or pad
+        :type layout: str
+        :param filename: Layout file, the configured one by default
+        :type filename: str
+        """
+        if filename is None:
+            filename = self.config[layout[:4]]
+        started = perf_counter()
+        self.switch_stats["switches"] += 1
+        if f"{layout}:{filename}" in self._pool:
+            self.switch_stats["hits"] += 1
+        self.layout = layout
+        self.skin = filename
+        self.main = self._warm(layout, filename)
+        if self.fightstick:
+            self.set_scene(self.main)
+        self._set_motions(self._scenes[self.main])
+        self._rescale()
+        # Delete the least recently used scenes, the textures they no
+        # longer share being evicted within the texture budget
+        while len(self._pool) > SCENE_POOL:
+            name, scene = self._pool.popitem(last=False)
+            del self._scenes[name]
+            scene.delete()
+        self._switch_started = started
+
+    def _rescale(self):
+        """
+        Prepare the image variants of the main scene at the current scale
+        in the background, the scene keeping its textures until they are
+        ready
+        """
+        scene = self._scenes[self.main]
+        if scene.scale == self.scale or not image_cache.RESAMPLING:
+            return
+        if self._scaler is None:
+            self._scaler = ThreadPoolExecutor(max_workers=1)
+        self._scaling = (
+            scene,
+            self.scale,
+            self._scaler.submit(
+                image_cache.prepare, scene.textures, self.scale
             )
-        self.add_scene("retry", RetryScene())
+        )
+        pyglet.clock.unschedule(self._apply_scale)
+        pyglet.clock.schedule_interval(self._apply_scale, 1 / FRAME_RATE)
 
-        # Instantiate a ControllerManager to handle hot-plugging
-        self.controller_manager = pyglet.input.ControllerManager()
-        self.controller_manager.on_connect = self.on_controller_connect
-        self.controller_manager.on_disconnect = self.on_controller_disconnect
+    def _apply_scale(self, dt):
+        """
+        Swap in the prepared image variants once they are ready
+        """
+        scene, scale, future = self._scaling
+        if not future.done():
+            return
+        pyglet.clock.unschedule(self._apply_scale)
+        self._scaling = None
+        try:
+            future.result()
+        except Exception as e:
+            logger.error(f"Could not scale the layout images: {e}")
+            return
+        # Skip scenes deleted or rescaled again in the meantime
+        if scene.sprites and scale == self.scale:
+            scene.set_scale(scale)
+            logger.debug(f"Layout images scaled by {scale}")
+        self._rescale()
 
-        # Set scene depending on if there is a controller
-        controllers = self.controller_manager.get_controllers()
-        if controllers:
-            self.on_controller_connect(controllers[0])
-            self.set_scene("main")
-        else:
-            self.set_scene("retry")
+    def skins(self, layout):
+        """
+        Return the layout files of `layout`: the configured one followed
+        by those of the layouts directory named after the layout
 
-        # Global state for all scenes
-        self.stick_deadzone = config["stic"]
-        self.trigger_deadzone = config["trig"]
+        :param layout: Layout option, traditional, leverless or pad
+        :type layout: str
+        :return: Layout filenames
+        :rtype: list
+        """
+        skins = [self.config[layout[:4]]]
+        directory = join(self.conf, "layouts")
+        try:
+            with scandir(directory) as entries:
+                names = sorted(
+                    entry.name for entry in entries
+                    if entry.name.startswith(layout)
+                    and entry.name.endswith(".ini")
+                )
+        except OSError:
+            names = []
+        for name in names:
+            if join(directory, name) not in skins:
+                skins.append(join(directory, name))
+        return skins
+
+    def on_settings_change(self, key, value):
+        """
+        Apply a changed setting
+        """
+        if key == "stic":
+            self.stick_deadzone = value
+        elif key == "trig":
+            self.trigger_deadzone = value
 
     def on_controller_connect(self, controller):
         """
@@ -457,8 +1015,12 @@ class SceneManager:
         if not self.fightstick:
             controller.open()
             self.fightstick = controller
-            self.fightstick.push_handlers(self._current_scene)
-            self.set_scene("main")
+            for listener in self._listeners:
+                self.fightstick.push_handlers(listener)
+            self._push(self.fightstick, self._handler(self._current_scene))
+            if self.hud:
+                self.hud.attach(controller)
+            self.set_scene(self.main)
         else:
             logger.debug(
                 f"A Controller is already connected: {self.fightstick}"
@@ -469,15 +1031,51 @@ class SceneManager:
         Detect if a controller is disconnected
         """
         if self.fightstick == controller:
-            self.fightstick.remove_handlers(self._current_scene)
+            self.fightstick.remove_handlers(
+                self._handler(self._current_scene)
+            )
+            for listener in self._listeners:
+                self.fightstick.remove_handlers(listener)
+            if self.hud:
+                self.hud.detach(controller)
             self.fightstick = None
             self.set_scene("retry")
 
+    def add_listener(self, listener):
+        """
+        Add a handler receiving the controller events alongside the
+        current scene
+        """
+        if self.profiler:
+            self.profiler.instrument(
+                listener, HANDLERS, type(listener).__name__
+            )
+        self._listeners.append(listener)
+        if self.fightstick:
+            self.fightstick.push_handlers(listener)
+            # Keep the scene on top of the handler stack
+            handler = self._handler(self._current_scene)
+            self.fightstick.remove_handlers(handler)
+            self._push(self.fightstick, handler)
+
+    def remove_listener(self, listener):
+        """
+        Remove a handler added with `add_listener`
+        """
+        self._listeners.remove(listener)
+        if self.fightstick:
+            self.fightstick.remove_handlers(listener)
+
     def add_scene(self, name, instance):
         """
         Add a scene
         """
         instance.manager = self
+        if self.profiler:
+            self.profiler.instrument(instance, HANDLERS, name)
+            self.profiler.instrument(
+                instance.batch, ("draw",), f"{name}.batch"
+            )
         self._scenes[name] = instance
 
     def set_scene(self, name):
@@ -488,85 +1086,318 @@ class SceneManager:
             self.window.remove_handlers(self._current_scene)
             self._current_scene.deactivate()
             if self.fightstick:
-                self.fightstick.remove_handlers(self._current_scene)
+                self.fightstick.remove_handlers(
+                    self._handler(self._current_scene)
+                )
 
         new_scene = self._scenes[name]
-        self.window.push_handlers(new_scene)
+        self._push(self.window, new_scene)
         if self.fightstick:
-            self.fightstick.push_handlers(new_scene)
+            self._push(self.fightstick, self._handler(new_scene))
 
         self._current_scene = new_scene
         self._current_scene.activate()
+        if self.frame_lock:
+            self.frame_lock.sync()
 
-    def enforce_aspect_ratio(self, dt):
+    @staticmethod
+    def _push(dispatcher, handler):
         """
-        Enforce aspect ratio by readjusting the window height
+        Push `handler` onto `dispatcher` if it handles any of its events,
+        as pyglet would never remove the empty frame pushed for the others
         """
-        aspect_ratio = WINDOW_WIDTH / WINDOW_HEIGHT
-        target_width = int(self.window.height * aspect_ratio)
-        target_height = int(self.window.width / aspect_ratio)
+        if any(hasattr(handler, event) for event in dispatcher.event_types):
+            dispatcher.push_handlers(handler)
 
-        if (
-            self.window.width != target_width
-            and self.window.height != target_height
-        ):
-            self.window.set_size(self.window.width, target_height)
+    def _handler(self, scene):
+        """
+        Return the handler receiving the controller events for `scene`,
+        the input filter and frame lock passing them on when enabled
+        """
+        return self.input_filter or self.frame_lock or scene
+
+    def enforce_aspect_ratio(self, width, height):
+        """
+        Enforce aspect ratio by readjusting the window height. The window
+        is resized again with the fixed size, which needs no adjustment.
+        A size the window manager turned down is not requested again, so
+        as not to fight it over the window
+        """
+        aspect_ratio = self.width / WINDOW_HEIGHT
+        target_height = round(width / aspect_ratio)
+        if abs(height - target_height) <= 1:
+            self._requested_size = None
+        elif (width, target_height) != self._requested_size:
+            self._requested_size = (width, target_height)
+            self.window.set_size(width, target_height)
+
+    def toggle_hud(self):
+        """
+        Show or hide the performance HUD
+        """
+        if self.hud:
+            self.hud.close()
+            self.hud = None
+        else:
+            self.hud = PerformanceHUD(self)
+
+    def on_key_press(self, symbol, modifiers):
+        """
+        Key press
+        """
+        if symbol == pyglet.window.key.F3:
+            self.toggle_hud()
+        elif symbol == pyglet.window.key.F5:
+            # Next layout
+            layouts = [name.lower() for name in LAYOUTS]
+            index = layouts.index(self.layout) + 1
+            self.switch(layouts[index % len(layouts)])
+        elif symbol == pyglet.window.key.F6:
+            # Next skin of the layout
+            skins = self.skins(self.layout)
+            index = skins.index(self.skin) + 1 if self.skin in skins else 0
+            self.switch(self.layout, skins[index % len(skins)])
 
     def on_draw(self):
         """
         Draw
         """
         self.window.clear()
-        self._current_scene.batch.draw()
+        if self.hud:
+            start = perf_counter()
+            self._current_scene.batch.draw()
+            self.overlay.draw()
+            self.hud.on_frame(start, perf_counter())
+            # Drawn last and apart from the overlay so that it only ever
+            # appears in the window
+            self.hud.batch.draw()
+        else:
+            self._current_scene.batch.draw()
+            self.overlay.draw()
+        if self._switch_started is not None:
+            latency = perf_counter() - self._switch_started
+            self._switch_started = None
+            self.switch_stats["latency"] = latency
+            logger.debug(
+                f"Switched to {self.main} in {latency * 1000:.1f} ms"
+            )
 
     def on_resize(self, width, height):
         """
-        Resize
+        Fit the layout to the new window size, the only time the geometry
+        is computed
         """
-        projection_matrix = Mat4.orthogonal_projection(
-            0, width, 0, height, 0, 1
+        if self.geometry == "aspect":
+            self.enforce_aspect_ratio(width, height)
+        # Work in framebuffer pixels, which differ on high-DPI displays
+        fb_width, fb_height = self.window.get_framebuffer_size()
+        scale = min(fb_width / self.width, fb_height / WINDOW_HEIGHT)
+        if self.geometry == "integer" and scale >= 1:
+            scale = int(scale)
+        # Center the layout, leaving bars where the window does not fit
+        view_width = round(self.width * scale)
+        view_height = round(WINDOW_HEIGHT * scale)
+        self.window.viewport = (
+            (fb_width - view_width) // 2,
+            (fb_height - view_height) // 2,
+            view_width,
+            view_height
+        )
+        self.window.projection = Mat4.orthogonal_projection(
+            0, self.width, 0, WINDOW_HEIGHT, 0, 1
         )
-        scale_x = width / WINDOW_WIDTH
-        scale_y = height / WINDOW_HEIGHT
-        self.window.projection = projection_matrix.scale(
-            Vec3(scale_x, scale_y, 1)
+        # Draw image variants at least as large as the window needs
+        self.scale = next(
+            (s for s in SCALES if s >= scale - 0.01), SCALES[-1]
         )
-        self.window.viewport = 0, 0, width, height
+        if self._scaling is None:
+            self._rescale()
         return pyglet.event.EVENT_HANDLED
 
 
-def run(layout, config, parent=None) -> None:
+def _start(layout, config, parent=None):
     """
-    Run the fightstick app
-    
-    :param layout: Layout option, tradtional or leverless
-    :type layout: str
-    :param config: Configuration
-    :type config: dict
-    :param parent: Parent window
-    :type parent: Gtk.Window
+    Create the window, the scene manager and the optional tools, and
+    return the scene manager, recorder, analyzer, plugin host, profiler
+    and soak test
     """
+    started = perf_counter()
     # Create the main window. Use ConfigParser to set a static
     # controller status of unplugged
-    window = pyglet.window.Window(
-        WINDOW_WIDTH,
-        WINDOW_HEIGHT,
-        caption="Fightsticker",
-        resizable=True,
-        vsync=False
-    )
+    width = WINDOW_WIDTH + HISTORY_WIDTH if option.HISTORY else WINDOW_WIDTH
+    transparent = option.TRANSPARENT
+    window = None
+    if transparent:
+        # Ask for an alpha channel the compositor blends with the desktop
+        try:
+            window = pyglet.window.Window(
+                width,
+                WINDOW_HEIGHT,
+                caption="Fightsticker",
+                resizable=True,
+                vsync=False,
+                style=pyglet.window.Window.WINDOW_STYLE_TRANSPARENT,
+                config=pyglet.gl.Config(alpha_size=8, double_buffer=True)
+            )
+        except pyglet.window.NoSuchConfigException:
+            logger.error("No transparent framebuffer, falling back to opaque")
+            transparent = False
+    if window is None:
+        window = pyglet.window.Window(
+            width,
+            WINDOW_HEIGHT,
+            caption="Fightsticker",
+            resizable=True,
+            vsync=False
+        )
     logger.debug("Layout window created")
+
+    def on_first_frame():
+        """
+        Log the time to first frame, pushed under the scene manager so
+        that it runs once the first frame is drawn
+        """
+        window.remove_handler("on_draw", on_first_frame)
+        logger.debug(
+            f"First frame in {(perf_counter() - started) * 1000:.1f} ms, "
+            f"decoded image cache hits {image_cache.stats['hits']}, "
+            f"misses {image_cache.stats['misses']}"
+        )
+
+    window.push_handlers(on_draw=on_first_frame)
     # Close the parent window. We put the window closing here so that
     # the pyglet window inherits the icon of the application
     if parent:
         parent.close()
+    # Keep the textures of recently shown layouts within the budget
+    image_cache.budget = option.TEXTURE_BUDGET * 1048576
+    # Time the hot paths
+    profiler = None
+    if option.PROFILE:
+        profiler = Profiler(option.PROFILE_WINDOW)
     # Instantiate the scene manager
     scene_manager = SceneManager(
-        window_instance=window, layout=layout, config=config
+        window_instance=window,
+        layout=layout,
+        config=config,
+        backend=option.BACKEND,
+        history=option.HISTORY,
+        geometry=option.GEOMETRY,
+        frame_lock=option.FRAME_LOCK,
+        transparent=transparent,
+        hide_background=option.HIDE_BACKGROUND,
+        triggers=option.TRIGGERS,
+        hysteresis=dict(option.HYSTERESIS),
+        debounce={name: ms / 1000 for name, ms in option.DEBOUNCE},
+        profiler=profiler
     )
-    # Enforce aspect ratio by readjusting the window height
-    pyglet.clock.schedule_interval(
-        scene_manager.enforce_aspect_ratio, 0.3
-    )
-    # Run the application
-    pyglet.app.run()
+    # Record the controller events
+    recorder = None
+    if option.RECORD:
+        recorder = Recorder(option.RECORD)
+        scene_manager.add_listener(recorder)
+    # Measure the controller polling rate
+    analyzer = None
+    if option.DIAGNOSTICS:
+        analyzer = PollingAnalyzer(scene_manager)
+        scene_manager.add_listener(analyzer)
+        pyglet.clock.schedule_interval(analyzer.update, 0.5)
+    # Run the plugins once per frame
+    plugins = None
+    if not option.NO_PLUGINS:
+        plugins = PluginHost(scene_manager, budget=option.PLUGIN_BUDGET)
+        if plugins.plugins:
+            scene_manager.add_listener(plugins)
+    # Look for leaks over a simulated session
+    soak = None
+    if option.SOAK:
+        soak = SoakTest(
+            scene_manager, option.SOAK, option.SOAK_HOURS, option.SOAK_SPEED
+        )
+    # Check the settings file for changes
+    pyglet.clock.schedule_interval(settings.refresh, 1.0)
+    return scene_manager, recorder, analyzer, plugins, profiler, soak
+
+
+def _finish(
+    layout, scene_manager, recorder, analyzer, plugins, profiler, soak,
+    jitter
+):
+    """
+    Save the recordings and reports once the app exits, and return the
+    exit status, which is nonzero when a soak test failed
+    """
+    # Stop following the settings, which outlive the window
+    pyglet.clock.unschedule(settings.refresh)
+    settings.unsubscribe(scene_manager.on_settings_change)
+    if plugins:
+        plugins.close()
+    if recorder:
+        recorder.close()
+    if analyzer:
+        pyglet.clock.unschedule(analyzer.update)
+        analyzer.save(option.DIAGNOSTICS)
+    if profiler:
+        fightstick = scene_manager.fightstick
+        profiler.save(option.PROFILE, {
+            "version": __version__,
+            "layout": layout,
+            "backend": option.BACKEND,
+            "controller": fightstick.name if fightstick else None,
+            "guid": fightstick.guid if fightstick else None,
+            "platform": platform(),
+            "python": python_version(),
+            "pyglet": pyglet.version,
+            "triggers": gauge.stats,
+            "suppressed": (
+                scene_manager.input_filter.suppressed
+                if scene_manager.input_filter else None
+            ),
+            "jitter": jitter,
+            "plugins": plugins.summary() if plugins else None
+        })
+    return 1 if soak and soak.passed is False else 0
+
+
+def run(layout, config, parent=None) -> int:
+    """
+    Run the fightstick app
+    
+    :param layout: Layout option, tradtional or leverless
+    :type layout: str
+    :param config: Configuration
+    :type config: dict
+    :param parent: Parent window
+    :type parent: Gtk.Window
+    :return: Exit status
+    :rtype: int
+    """
+    if option.ASYNCIO:
+        return asyncio.run(run_async(layout, config, parent))
+    session = _start(layout, config, parent)
+    # Run the application. With the frame lock, the window is drawn by
+    # the frame lock only
+    pyglet.app.run(None if option.FRAME_LOCK else 1 / 60)
+    return _finish(layout, *session, None)
+
+
+async def run_async(layout, config, parent=None) -> int:
+    """
+    Run the fightstick app on the current asyncio loop, returning once
+    the window is closed. Other tasks of the loop run alongside it, with
+    no thread handoff needed to reach the window or the controllers
+    
+    :param layout: Layout option, tradtional or leverless
+    :type layout: str
+    :param config: Configuration
+    :type config: dict
+    :param parent: Parent window
+    :type parent: Gtk.Window
+    :return: Exit status
+    :rtype: int
+    """
+    session = _start(layout, config, parent)
+    # With the frame lock, the window is drawn by the frame lock only
+    loop = AsyncEventLoop(None if option.FRAME_LOCK else 1 / 60)
+    await loop.run()
+    return _finish(layout, *session, loop.jitter)
@@ -0,0 +1,214 @@
+from math import inf
+from time import perf_counter
+
+import pyglet
+from pyglet.math import Vec2
+
+from . import *
+from .framelock import PRESS, TRIGGER, STICK, DPAD, NEUTRAL
+
+# Input kind of each input class
+CLASSES = {
+    "buttons": PRESS,
+    "triggers": TRIGGER,
+    "sticks": STICK,
+    "dpad": DPAD
+}
+# State of each input kind at rest
+REST = (False, False, (0, 0, False), (0, 0))
+
+
+def _level(value, previous, threshold, band):
+    """
+    Return whether `value` is past `threshold`, by `band` more to turn on
+    and by `band` less to turn off
+    """
+    if previous:
+        return value > threshold - band
+    return value > threshold + band
+
+
+def _axis(value, previous, threshold, band):
+    """
+    Return the direction of a stick axis, 1, -1 or 0 within the deadzone
+    """
+    if _level(value, previous == 1, threshold, band):
+        return 1
+    if _level(-value, previous == -1, threshold, band):
+        return -1
+    return 0
+
+
+class InputFilter:
+    """
+    Controller event handler passing the events on to the frame lock or
+    the scene with hysteresis and debouncing. Analog inputs only change
+    state once past their deadzone by the hysteresis band, and no input
+    changes state again before its debounce time, the latest value being
+    applied once it elapses. Events that would have shown a state the
+    filter holds back are dropped, or for sticks moved back to the last
+    passed position, and counted as suppressed flips
+
+    :param manager: Scene manager
+    :type manager: SceneManager
+    :param hysteresis: Hysteresis band keyed by input class
+    :type hysteresis: dict
+    :param debounce: Debounce time in seconds keyed by input class
+    :type debounce: dict
+    """
+    def __init__(self, manager, hysteresis=None, debounce=None):
+        """
+        Constructor
+        """
+        self.manager = manager
+        self.controller = None
+        self.hysteresis = {
+            CLASSES[name]: band for name, band in (hysteresis or {}).items()
+        }
+        self.debounce = {
+            CLASSES[name]: time for name, time in (debounce or {}).items()
+        }
+        # Suppressed state flips keyed by input class
+        self.suppressed = dict.fromkeys(CLASSES, 0)
+        self._names = {kind: name for name, kind in CLASSES.items()}
+        # [state, passed value, time of the last flip, unfiltered state]
+        # of every input
+        self._inputs = {}
+        # Latest values held back until their debounce time elapses
+        self._held = {}
+        self._settle_at = None
+
+    def close(self):
+        """
+        Stop applying held back values
+        """
+        pyglet.clock.unschedule(self._settle)
+
+    def _state(self, kind, value, previous, band):
+        """
+        Return the state the scenes show for `value`
+        """
+        if kind == PRESS:
+            return bool(value)
+        if kind == DPAD:
+            return (value.x > 0) - (value.x < 0), (value.y > 0) - (value.y < 0)
+        if kind == TRIGGER:
+            return _level(
+                value, previous, self.manager.trigger_deadzone, band
+            )
+        # Direction of each axis, and whether the stick is moved at all
+        deadzone = self.manager.stick_deadzone
+        x, y, moved = previous
+        return (
+            _axis(value.x, x, deadzone, band),
+            _axis(value.y, y, deadzone, band),
+            _level(min(value.length(), 1.0), moved, deadzone, band)
+        )
+
+    def _filter(self, kind, name, value):
+        """
+        Pass the event of an input on, unless the filter holds it back
+        """
+        entry = self._inputs.get(name)
+        if entry is None:
+            entry = [REST[kind], NEUTRAL[kind], -inf, REST[kind]]
+            self._inputs[name] = entry
+        state, passed, flipped, last = entry
+        new = self._state(kind, value, state, self.hysteresis.get(kind, 0))
+        if new != state:
+            wait = flipped + self.debounce.get(kind, 0) - perf_counter()
+            if wait > 0:
+                new = state
+                self._hold(kind, name, value, wait)
+            else:
+                entry[2] = perf_counter()
+        # State the scene would show without the filter
+        plain = self._state(kind, value, state, 0)
+        entry[3] = plain
+        if plain != new and plain != last:
+            self.suppressed[self._names[kind]] += 1
+        if plain != new:
+            if kind != STICK:
+                return
+            # Keep the axes held back where they were
+            value = Vec2(
+                value.x if plain[0] == new[0] else passed.x,
+                value.y if plain[1] == new[1] else passed.y
+            )
+            if self._state(kind, value, state, 0) != new:
+                # Not shown with any axis kept, so nothing changes
+                entry[0] = state
+                return
+        elif new == state and (kind == PRESS or kind == TRIGGER):
+            # Scenes only show whether the button is held or the trigger
+            # pulled, and a held back flip may have been flipped back
+            return
+        entry[0] = new
+        entry[1] = value
+        self._forward(kind, name, value)
+
+    def _hold(self, kind, name, value, wait):
+        """
+        Apply the latest value of an input once its debounce time elapsed
+        """
+        self._held[name] = kind, value
+        settle_at = perf_counter() + wait
+        if self._settle_at is None or settle_at < self._settle_at:
+            self._settle_at = settle_at
+            pyglet.clock.unschedule(self._settle)
+            pyglet.clock.schedule_once(self._settle, wait)
+
+    def _settle(self, dt):
+        """
+        Filter the held back values again, holding them anew if needed
+        """
+        self._settle_at = None
+        held = self._held
+        self._held = {}
+        for name, (kind, value) in held.items():
+            self._filter(kind, name, value)
+
+    def _forward(self, kind, name, value):
+        """
+        Pass an event on to the frame lock or the current scene
+        """
+        handler = self.manager.frame_lock or self.manager._current_scene
+        # Inputs are dropped while no layout is shown
+        if not hasattr(handler, "on_button_press"):
+            return
+        controller = self.controller
+        if kind == PRESS:
+            if value:
+                handler.on_button_press(controller, name)
+            else:
+                handler.on_button_release(controller, name)
+        elif kind == TRIGGER:
+            handler.on_trigger_motion(controller, name, value)
+        elif kind == STICK:
+            handler.on_stick_motion(controller, name, value)
+        else:
+            handler.on_dpad_motion(controller, value)
+
+    def on_button_press(self, controller, button):
+        self.controller = controller
+        self._filter(PRESS, button, 1)
+
+    def on_button_release(self, controller, button):
+        self.controller = controller
+        self._filter(PRESS, button, 0)
+
+    def on_trigger_motion(self, controller, trigger, value):
+        self.controller = controller
+        if self.manager.triggers != "threshold":
+            # Analog trigger displays have no state to flip
+            self._forward(TRIGGER, trigger, value)
+            return
+        self._filter(TRIGGER, trigger, value)
+
+    def on_stick_motion(self, controller, stick, vector):
+        self.controller = controller
+        self._filter(STICK, stick, Vec2(vector.x, vector.y))
+
+    def on_dpad_motion(self, controller, vector):
+        self.controller = controller
+        self._filter(DPAD, "dpad", Vec2(vector.x, vector.y))
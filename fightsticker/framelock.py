@@ -0,0 +1,167 @@
+import pyglet
+from pyglet.math import Vec2
+
+from . import *
+
+# Scene handler of each input kind
+PRESS = 0
+TRIGGER = 1
+STICK = 2
+DPAD = 3
+# Value of each input kind at rest, as a scene starts
+NEUTRAL = (0, 0.0, Vec2(0, 0), Vec2(0, 0))
+
+
+def _distance(kind, a, b):
+    """
+    Return how far apart two values of an input are
+    """
+    if kind == STICK or kind == DPAD:
+        return (a - b).length()
+    return abs(a - b)
+
+
+class FrameLock:
+    """
+    Controller event handler quantizing the inputs reaching the scene to
+    fixed game frames. Each frame the scene receives the state sampled at
+    its end, except that an input which came back to where it started
+    within the frame shows its furthest value for that frame instead, so
+    one-frame taps stay visible for a full frame. The window is drawn once
+    per frame
+
+    :param manager: Scene manager
+    :type manager: SceneManager
+    :param rate: Game frames per second
+    :type rate: float
+    """
+    def __init__(self, manager, rate=FRAME_RATE):
+        """
+        Constructor
+        """
+        self.manager = manager
+        self.rate = rate
+        self.controller = None
+        # Shown value of every input, and [kind, last, furthest, distance]
+        # of those that changed in the current frame
+        self._shown = {}
+        self._kinds = {}
+        self._pending = {}
+        # Values to show on the next frame, after a tap
+        self._next = {}
+        self._events = 0
+        self._count = None
+        # Imported here as labels need a display, which folding does not
+        from .blending import label_class
+
+        self.label = label_class(manager.transparent)(
+            "",
+            font_size=10,
+            x=WINDOW_WIDTH - 10,
+            y=WINDOW_HEIGHT - 10,
+            anchor_x="right",
+            anchor_y="top",
+            batch=manager.overlay
+        )
+        pyglet.clock.schedule_interval(self.tick, 1 / rate)
+
+    def close(self):
+        """
+        Stop ticking
+        """
+        pyglet.clock.unschedule(self.tick)
+
+    def _add(self, kind, name, value):
+        """
+        Fold a raw event into the current frame
+        """
+        self._events += 1
+        self._kinds[name] = kind
+        distance = _distance(
+            kind, value, self._shown.get(name, NEUTRAL[kind])
+        )
+        pending = self._pending.get(name)
+        if pending is None:
+            self._pending[name] = [kind, value, value, distance]
+            return
+        pending[1] = value
+        if distance > pending[3]:
+            pending[2] = value
+            pending[3] = distance
+
+    def _apply(self, kind, name, value):
+        """
+        Pass a value to the current scene
+        """
+        self._shown[name] = value
+        scene = self.manager._current_scene
+        controller = self.controller
+        if kind == PRESS:
+            if value:
+                scene.on_button_press(controller, name)
+            else:
+                scene.on_button_release(controller, name)
+        elif kind == TRIGGER:
+            scene.on_trigger_motion(controller, name, value)
+        elif kind == STICK:
+            scene.on_stick_motion(controller, name, value)
+        else:
+            scene.on_dpad_motion(controller, value)
+
+    def sync(self):
+        """
+        Bring a newly shown scene to the current state
+        """
+        if hasattr(self.manager._current_scene, "on_button_press"):
+            for name, value in list(self._shown.items()):
+                kind = self._kinds[name]
+                if value != NEUTRAL[kind]:
+                    self._apply(kind, name, value)
+
+    def tick(self, dt):
+        """
+        Close the current game frame: hand its state to the scene, then
+        draw the window
+        """
+        # Inputs are dropped while no layout is shown
+        if hasattr(self.manager._current_scene, "on_button_press"):
+            pending = self._next
+            self._next = {}
+            for name, (kind, value) in pending.items():
+                if name not in self._pending:
+                    self._apply(kind, name, value)
+            for name, (kind, last, furthest, _) in self._pending.items():
+                start = self._shown.get(name, NEUTRAL[kind])
+                if last == start and furthest != start:
+                    # Tapped and released within the frame
+                    self._apply(kind, name, furthest)
+                    self._next[name] = kind, last
+                elif last != start:
+                    self._apply(kind, name, last)
+        self._pending.clear()
+        if self._events != self._count:
+            self._count = self._events
+            self.label.text = f"{self._events} events/frame"
+        self._events = 0
+        self.manager.window.draw(dt)
+
+    def on_button_press(self, controller, button):
+        self.controller = controller
+        self._add(PRESS, button, 1)
+
+    def on_button_release(self, controller, button):
+        self.controller = controller
+        self._add(PRESS, button, 0)
+
+    def on_trigger_motion(self, controller, trigger, value):
+        self.controller = controller
+        self._add(TRIGGER, trigger, value)
+
+    def on_stick_motion(self, controller, stick, vector):
+        self.controller = controller
+        self._add(STICK, stick, Vec2(vector.x, vector.y))
+
+    def on_dpad_motion(self, controller, vector):
+        self.controller = controller
+        self._add(DPAD, "dpad", Vec2(vector.x, vector.y))
+
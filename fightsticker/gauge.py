@@ -0,0 +1,76 @@
+from . import *
+
+# Trigger updates written to the sprites and skipped as they did not
+# change the quantized level
+stats = {"writes": 0, "skipped": 0}
+
+
+class TriggerGauge:
+    """
+    Analog display of a trigger over the sprites it lights up, drawn from
+    their existing texture region. The fill mode crops the sprites to the
+    pull from the bottom up by moving their top vertices and texture
+    coordinates, and the ramp mode sets their opacity to the pull. The
+    pull is quantized so that noise within a level writes nothing
+
+    :param sprites: Sprites of the trigger
+    :type sprites: tuple
+    :param mode: Display mode, fill or ramp
+    :type mode: str
+    :param hold: Function holding the sprites when passed True and
+        releasing them when passed False
+    :type hold: Callable
+    :param steps: Number of levels of the pull
+    :type steps: int
+    """
+    def __init__(self, sprites, mode, hold, steps=TRIGGER_STEPS):
+        """
+        Constructor
+        """
+        self.sprites = sprites
+        self.mode = mode
+        self.hold = hold
+        self.steps = steps
+        self.level = 0
+
+    def update(self, value):
+        """
+        Show the trigger pulled by `value`, between 0 and 1. The sprites
+        are held or released before they are cropped, as showing a sprite
+        rebuilds its vertices
+        """
+        level = round(min(max(value, 0.0), 1.0) * self.steps)
+        if level == self.level:
+            stats["skipped"] += 1
+            return
+        stats["writes"] += 1
+        self.level = level
+        self.hold(level > 0)
+        self.apply()
+
+    def apply(self):
+        """
+        Write the current level to the sprites, which must be done again
+        whenever their vertices are rebuilt, such as on a texture change.
+        The scene shows and hides the sprites, as buttons may light them,
+        and hidden sprites only get their texture coordinates, as their
+        vertices are rebuilt when they are shown
+        """
+        # Released, the sprites are drawn whole for the buttons lighting
+        # them
+        fraction = self.level / self.steps or 1.0
+        for sprite in self.sprites:
+            if self.mode == "ramp":
+                sprite.opacity = round(fraction * 255)
+                continue
+            # Vertices and texture coordinates run counterclockwise from
+            # the bottom left corner, the top ones being the last two
+            position = list(sprite._get_vertices())
+            tex_coords = list(sprite._texture.tex_coords)
+            top = position[1] + (position[7] - position[1]) * fraction
+            v = tex_coords[1] + (tex_coords[7] - tex_coords[1]) * fraction
+            position[7] = position[10] = top
+            tex_coords[7] = tex_coords[10] = v
+            sprite._vertex_list.tex_coords[:] = tex_coords
+            if sprite.visible:
+                sprite._vertex_list.position[:] = position
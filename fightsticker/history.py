@@ -0,0 +1,155 @@
+from time import perf_counter
+
+from . import *
+from .blending import label_class, rectangle_class
+
+# Icon of each direction in numpad notation
+ARROWS = ("", "↙", "↓", "↘", "←", "•", "→", "↖", "↑", "↗")
+# Short names of the buttons shown in the history
+BUTTON_LABELS = {
+    "back": "Bk",
+    "start": "St",
+    "guide": "G",
+    "x": "X",
+    "y": "Y",
+    "rightshoulder": "RB",
+    "leftshoulder": "LB",
+    "a": "A",
+    "b": "B",
+    "righttrigger": "RT",
+    "lefttrigger": "LT",
+    "leftstick": "LS",
+    "rightstick": "RS"
+}
+# Bit of each button in the held buttons mask
+BUTTON_BITS = {name: 1 << i for i, name in enumerate(BUTTONS)}
+# Height of a history row
+ROW_HEIGHT = 26
+# Largest frame count displayed
+MAX_FRAMES = 99
+
+
+class InputHistory:
+    """
+    Controller event handler showing a training mode style input history
+    to the right of the layout. Rows come from a fixed pool of labels that
+    are moved and re-targeted as inputs come in
+
+    :param manager: Scene manager
+    :type manager: SceneManager
+    :param x: Left edge of the panel
+    :type x: int
+    """
+    def __init__(self, manager, x=WINDOW_WIDTH):
+        """
+        Constructor
+        """
+        self.manager = manager
+        self.x = x
+        self.rows = (WINDOW_HEIGHT - 10) // ROW_HEIGHT
+        batch = manager.overlay
+        # Labels and shapes blending for the window they are drawn on
+        Label = label_class(manager.transparent)
+        Rectangle = rectangle_class(manager.transparent)
+        self.background = Rectangle(
+            x, 0, HISTORY_WIDTH, WINDOW_HEIGHT,
+            color=(32, 32, 32), batch=batch
+        )
+        # Ring buffer of the recorded states, one per row
+        self._directions = [5] * self.rows
+        self._buttons = [0] * self.rows
+        self._starts = [0] * self.rows
+        self._head = 0
+        self._frames = -1
+        self._labels = [
+            (
+                Label("", x=x + 40, anchor_x="right", batch=batch),
+                Label("", x=x + 50, batch=batch),
+                Label("", x=x + 75, batch=batch)
+            )
+            for _ in range(self.rows)
+        ]
+        self._direction = 5
+        self._held = 0
+        self._push()
+
+    def _push(self):
+        """
+        Start a new row for the current state, recycling the oldest row
+        """
+        # Settle the frame count of the row being pushed down
+        if self._frames >= 0:
+            self.update()
+        frame = int(perf_counter() * FRAME_RATE)
+        self._head = (self._head + 1) % self.rows
+        head = self._head
+        self._directions[head] = self._direction
+        self._buttons[head] = self._held
+        self._starts[head] = frame
+        self._frames = -1
+        frames, direction, buttons = self._labels[head]
+        direction.text = ARROWS[self._direction]
+        buttons.text = " ".join(
+            BUTTON_LABELS[name] for i, name in enumerate(BUTTONS)
+            if self._held >> i & 1
+        )
+        # Shift every row down by one
+        top = WINDOW_HEIGHT - ROW_HEIGHT
+        for k in range(self.rows):
+            y = top - k * ROW_HEIGHT
+            for label in self._labels[(head - k) % self.rows]:
+                label.y = y
+        self.update()
+
+    def update(self, dt=None):
+        """
+        Update the frame count of the top row in place
+        """
+        frames = min(
+            int(perf_counter() * FRAME_RATE) - self._starts[self._head] + 1,
+            MAX_FRAMES
+        )
+        if frames != self._frames:
+            self._frames = frames
+            self._labels[self._head][0].text = str(frames)
+
+    def _set_button(self, button, pressed):
+        """
+        Record a button state change
+        """
+        bit = BUTTON_BITS.get(button)
+        if bit is None:
+            return
+        held = self._held | bit if pressed else self._held & ~bit
+        if held != self._held:
+            self._held = held
+            self._push()
+
+    def _set_direction(self, x, y):
+        """
+        Record a direction change
+        """
+        deadzone = self.manager.stick_deadzone
+        direction = (
+            5 + (x > deadzone) - (x < -deadzone)
+            + 3 * ((y > deadzone) - (y < -deadzone))
+        )
+        if direction != self._direction:
+            self._direction = direction
+            self._push()
+
+    def on_button_press(self, controller, button):
+        self._set_button(button, True)
+
+    def on_button_release(self, controller, button):
+        self._set_button(button, False)
+
+    def on_trigger_motion(self, controller, trigger, value):
+        self._set_button(trigger, value > self.manager.trigger_deadzone)
+
+    def on_stick_motion(self, controller, stick, vector):
+        if stick == "leftstick":
+            self._set_direction(vector.x, vector.y)
+
+    def on_dpad_motion(self, controller, vector):
+        self._set_direction(vector.x, vector.y)
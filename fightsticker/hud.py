@@ -0,0 +1,168 @@
+from array import array
+from time import perf_counter
+
+import pyglet
+
+from . import *
+from . import image_cache
+from .blending import label_class, rectangle_class
+
+# Number of frames kept in the rolling buffers
+FRAMES = 240
+
+try:
+    from os import sysconf
+    _PAGE_SIZE = sysconf("SC_PAGE_SIZE")
+except (ImportError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def _rss():
+    """
+    Return the resident set size of the process in bytes, or 0 when it
+    cannot be read on this platform
+    """
+    try:
+        with open("/proc/self/statm", "r") as s:
+            return int(s.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        from resource import getrusage, RUSAGE_SELF
+        # Peak rather than current usage, reported in bytes on macOS
+        return getrusage(RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        return 0
+
+
+class PerformanceHUD:
+    """
+    Performance HUD drawn over the overlay in its own batch. It only
+    exists while shown, so it costs nothing while hidden
+
+    :param manager: Scene manager
+    :type manager: SceneManager
+    """
+    def __init__(self, manager):
+        """
+        Constructor
+        """
+        self.manager = manager
+        self.batch = pyglet.graphics.Batch()
+        self.background = rectangle_class(manager.transparent)(
+            0, WINDOW_HEIGHT - 140, 300, 140,
+            color=(0, 0, 0, 192), batch=self.batch
+        )
+        self.label = label_class(manager.transparent)(
+            "",
+            font_name="monospace",
+            font_size=9,
+            x=6,
+            y=WINDOW_HEIGHT - 6,
+            width=290,
+            anchor_y="top",
+            multiline=True,
+            batch=self.batch
+        )
+        # Rolling buffers of frame, handler and draw times in seconds
+        self._frame_times = array("d", bytes(8 * FRAMES))
+        self._handler_times = array("d", bytes(8 * FRAMES))
+        self._draw_times = array("d", bytes(8 * FRAMES))
+        self._frames = 0
+        self._last_frame = None
+        self._handler_time = 0.0
+        self._events = {}
+        self._last_update = perf_counter()
+        self._controllers = []
+        if manager.fightstick:
+            self.attach(manager.fightstick)
+        pyglet.clock.schedule_interval(self.update, 0.5)
+
+    def attach(self, controller):
+        """
+        Time and count the events dispatched by `controller`
+        """
+        dispatch = controller.dispatch_event
+        events = self._events
+
+        def timed_dispatch(event_type, *args):
+            start = perf_counter()
+            result = dispatch(event_type, *args)
+            self._handler_time += perf_counter() - start
+            events[event_type] = events.get(event_type, 0) + 1
+            return result
+
+        # Shadow the dispatch method on this instance only
+        controller.dispatch_event = timed_dispatch
+        self._controllers.append(controller)
+
+    def detach(self, controller):
+        """
+        Restore the event dispatch of `controller`
+        """
+        if controller in self._controllers:
+            del controller.dispatch_event
+            self._controllers.remove(controller)
+
+    def close(self):
+        """
+        Stop measuring and release the HUD
+        """
+        for controller in list(self._controllers):
+            self.detach(controller)
+        pyglet.clock.unschedule(self.update)
+        self.batch = None
+
+    def on_frame(self, start, end):
+        """
+        Record a frame whose scene and overlay were drawn between `start`
+        and `end`
+        """
+        index = self._frames % FRAMES
+        if self._last_frame is not None:
+            self._frame_times[index] = start - self._last_frame
+        self._last_frame = start
+        self._draw_times[index] = end - start
+        self._handler_times[index] = self._handler_time
+        self._handler_time = 0.0
+        self._frames += 1
+
+    def update(self, dt=None):
+        """
+        Refresh the HUD text from the rolling buffers
+        """
+        now = perf_counter()
+        elapsed = now - self._last_update
+        self._last_update = now
+        count = min(self._frames, FRAMES)
+        if not count:
+            return
+        frame_times = sorted(self._frame_times[:count])
+        handler_times = self._handler_times[:count]
+        total = sum(frame_times)
+        rates = ", ".join(
+            f"{event[3:]} {n / elapsed:.0f}"
+            for event, n in sorted(self._events.items())
+        )
+        self._events.clear()
+        switches = self.manager.switch_stats
+        input_filter = self.manager.input_filter
+        suppressed = (
+            sum(input_filter.suppressed.values()) if input_filter else 0
+        )
+        textures = image_cache.stats
+        self.label.text = "\n".join((
+            f"FPS {count / total if total else 0:.1f}",
+            f"Frame p50 {frame_times[count // 2] * 1000:.2f} ms, "
+            f"p99 {frame_times[int(count * 0.99)] * 1000:.2f} ms",
+            f"Handlers {sum(handler_times) / count * 1000:.3f} ms/frame, "
+            f"max {max(handler_times) * 1000:.3f} ms",
+            f"Draw {sum(self._draw_times[:count]) / count * 1000:.3f} ms",
+            f"RSS {_rss() / 1048576:.1f} MiB",
+            f"Switch {switches['latency'] * 1000:.1f} ms, warm "
+            f"{switches['hits']}/{switches['switches']}, textures "
+            f"{textures['texture_hits']}/"
+            f"{textures['texture_hits'] + textures['texture_misses']}",
+            f"Events/s {rates or 'none'}",
+            f"Suppressed flips {suppressed}"
+        ))
@@ -0,0 +1,289 @@
+from collections import OrderedDict
+from ctypes import c_ubyte
+from hashlib import sha1
+from mmap import mmap, ACCESS_COPY
+from os import makedirs, remove, replace, scandir, stat
+from os.path import abspath, join
+from struct import Struct, error as StructError
+
+import pyglet
+from pyglet.util import DecodeException
+
+try:
+    from gi import require_version
+    require_version("GdkPixbuf", "2.0")
+    from gi.repository import GdkPixbuf
+except (ImportError, ValueError):
+    GdkPixbuf = None
+
+from . import *
+from .logger import logger
+
+# Directory holding the decoded images
+CACHE_DIR = join(CONF, "cache", "images")
+# Entry header: magic, width, height, source mtime and size, path length.
+# The source path follows, then the RGBA rows bottom to top
+HEADER = Struct("<4sIIqqI")
+MAGIC = b"FSI1"
+# Largest image packed into a texture atlas
+ATLAS_SIZE = 512
+# Whether pre-scaled variants can be generated
+RESAMPLING = GdkPixbuf is not None
+# Decoded image lookups served from and missing from the cache, and
+# texture lookups served from and missing from memory
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "texture_hits": 0,
+    "texture_misses": 0,
+    "evictions": 0
+}
+# Memory in bytes kept for textures no scene uses anymore
+budget = TEXTURE_BUDGET * 1048576
+
+# [texture, bytes, users] of the textures created in this process, keyed
+# by path and scale from least to most recently used
+_textures = OrderedDict()
+_atlas = None
+
+
+def _entry(path, scale=1):
+    """
+    Return the cache entry filename of the image at `path` scaled by
+    `scale`
+    """
+    key = path if scale == 1 else f"{path}@{scale}"
+    return join(CACHE_DIR, f"{sha1(key.encode()).hexdigest()}.rgba")
+
+
+def _resample(path, scale):
+    """
+    Decode the image at `path` scaled by `scale` with high quality
+    resampling. Vector images are rendered at the target size
+    """
+    _, width, height = GdkPixbuf.Pixbuf.get_file_info(path)
+    width = max(1, round(width * scale))
+    height = max(1, round(height * scale))
+    if path.endswith(".svg"):
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
+            path, width, height, False
+        )
+    else:
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file(path).scale_simple(
+            width, height, GdkPixbuf.InterpType.HYPER
+        )
+    if not pixbuf.get_has_alpha():
+        pixbuf = pixbuf.add_alpha(False, 0, 0, 0)
+    # Rows run top to bottom, hence the negative pitch
+    return pyglet.image.ImageData(
+        width, height, "RGBA", pixbuf.get_pixels(), -pixbuf.get_rowstride()
+    )
+
+
+def _read_entry(filename):
+    """
+    Map a cache entry and return its header and mapping, or None if it
+    is missing or corrupt
+    """
+    try:
+        with open(filename, "rb") as f:
+            # A private mapping is writable for ctypes without touching
+            # the file, and pages are only read when uploaded
+            mapped = mmap(f.fileno(), 0, access=ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, width, height, mtime, size, length = HEADER.unpack_from(mapped)
+    except StructError:
+        mapped.close()
+        return None
+    offset = HEADER.size + length
+    if magic != MAGIC or len(mapped) != offset + width * height * 4:
+        mapped.close()
+        return None
+    path = mapped[HEADER.size:offset].decode(errors="replace")
+    return (path, width, height, mtime, size, offset), mapped
+
+
+def _write_entry(filename, path, st, image):
+    """
+    Write the decoded `image` of `path` to the cache
+    """
+    data = image.get_bytes("RGBA", image.width * 4)
+    source = path.encode()
+    try:
+        makedirs(CACHE_DIR, exist_ok=True)
+        with open(f"{filename}.tmp", "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, image.width, image.height,
+                st.st_mtime_ns, st.st_size, len(source)
+            ))
+            f.write(source)
+            f.write(data)
+        replace(f"{filename}.tmp", filename)
+    except OSError as e:
+        logger.debug(f"Could not cache image {path}: {e}")
+    return data
+
+
+def load_image(path, scale=1):
+    """
+    Load the image at `path` as RGBA data, mapped from the decoded image
+    cache when the source is unchanged and decoded and cached otherwise.
+    Variants scaled by `scale` require GdkPixbuf, as do vector images,
+    and are decoded unscaled by pyglet without it
+
+    :param path: Image path
+    :type path: str
+    :param scale: Scale of the variant
+    :type scale: float
+    :return: Image data
+    :rtype: pyglet.image.ImageData
+    """
+    path = abspath(path)
+    st = stat(path)
+    filename = _entry(path, scale)
+    entry = _read_entry(filename)
+    if entry:
+        (source, width, height, mtime, size, offset), mapped = entry
+        if (source, mtime, size) == (path, st.st_mtime_ns, st.st_size):
+            stats["hits"] += 1
+            data = (c_ubyte * (width * height * 4)).from_buffer(
+                mapped, offset
+            )
+            return pyglet.image.ImageData(
+                width, height, "RGBA", data, width * 4
+            )
+        mapped.close()
+    # Missing or stale, the entry is replaced
+    stats["misses"] += 1
+    if RESAMPLING and (scale != 1 or path.endswith(".svg")):
+        image = _resample(path, scale)
+    else:
+        # Without GdkPixbuf, images are decoded unscaled by pyglet, and
+        # vector images none of its decoders handle are left blank and
+        # uncached until GdkPixbuf is there to render them
+        try:
+            image = pyglet.image.load(path).get_image_data()
+        except DecodeException:
+            if not path.endswith(".svg"):
+                raise
+            logger.error(f"Rendering {path} needs GdkPixbuf")
+            return pyglet.image.ImageData(1, 1, "RGBA", bytes(4))
+    data = _write_entry(filename, path, st, image)
+    return pyglet.image.ImageData(
+        image.width, image.height, "RGBA", data, image.width * 4
+    )
+
+
+def prepare(paths, scale):
+    """
+    Make sure the variants of the images at `paths` scaled by `scale` are
+    cached, without creating textures so that it can run in a thread
+
+    :param paths: Image paths
+    :type paths: list
+    :param scale: Scale of the variants
+    :type scale: float
+    """
+    for path in set(paths):
+        load_image(path, scale)
+
+
+def load_texture(path, scale=1):
+    """
+    Return the texture of the image at `path`, shared by every user until
+    it is evicted. Small images are packed into a shared atlas like
+    pyglet.resource does. Every call must be paired with a call to
+    `release_texture` once the texture is no longer drawn
+
+    :param path: Image path
+    :type path: str
+    :param scale: Scale of the variant
+    :type scale: float
+    :return: Texture
+    :rtype: pyglet.image.Texture
+    """
+    global _atlas
+    key = path, scale
+    entry = _textures.get(key)
+    if entry:
+        stats["texture_hits"] += 1
+        _textures.move_to_end(key)
+    else:
+        stats["texture_misses"] += 1
+        image = load_image(path, scale)
+        if image.width <= ATLAS_SIZE and image.height <= ATLAS_SIZE:
+            if _atlas is None:
+                _atlas = pyglet.image.atlas.TextureBin()
+            # Atlas regions are small and never freed, so not counted
+            entry = [_atlas.add(image), 0, 0]
+        else:
+            entry = [image.get_texture(), image.width * image.height * 4, 0]
+        _textures[key] = entry
+    entry[2] += 1
+    return entry[0]
+
+
+def release_texture(path, scale=1):
+    """
+    Release a texture returned by `load_texture`. Unused textures stay in
+    memory until they exceed the budget, least recently used first
+
+    :param path: Image path
+    :type path: str
+    :param scale: Scale of the variant
+    :type scale: float
+    """
+    entry = _textures.get((path, scale))
+    if entry:
+        entry[2] -= 1
+    evict()
+
+
+def evict():
+    """
+    Delete the least recently used unused textures until the memory they
+    hold fits in the budget
+    """
+    unused = sum(size for _, size, users in _textures.values() if not users)
+    for key, (texture, size, users) in list(_textures.items()):
+        if unused <= budget:
+            break
+        if size and not users:
+            logger.debug(f"Evicting texture: {key[0]} at {key[1]}x")
+            texture.delete()
+            del _textures[key]
+            unused -= size
+            stats["evictions"] += 1
+
+
+def prune():
+    """
+    Remove the cache entries whose source image was modified or deleted,
+    along with leftovers of interrupted writes
+    """
+    try:
+        entries = list(scandir(CACHE_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        stale = entry.name.endswith(".tmp")
+        if not stale:
+            result = _read_entry(entry.path)
+            if result is None:
+                stale = True
+            else:
+                (path, _, _, mtime, size, _), mapped = result
+                mapped.close()
+                try:
+                    st = stat(path)
+                    stale = (mtime, size) != (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    stale = True
+        if stale:
+            logger.debug(f"Evicting cached image: {entry.name}")
+            try:
+                remove(entry.path)
+            except OSError:
+                pass
@@ -1,6 +1,10 @@
+from multiprocessing import freeze_support
+
 from .application import Application
 
 
 def main():
+    # Frozen builds start plugin worker processes through this executable
+    freeze_support()
     app = Application()
-    return app.run()
+    return app.run() or app.status
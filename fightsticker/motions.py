@@ -0,0 +1,375 @@
+import sys
+from argparse import ArgumentParser
+from random import Random
+from re import compile as re_compile
+from time import perf_counter
+
+import pyglet
+
+from . import *
+from .logger import logger
+
+# Tokens of a motion in numpad notation: charges, directions and buttons
+TOKEN = re_compile(r"\[[1-9]\]|[1-9]|[A-Z]")
+# Cardinal directions each diagonal counts as
+DIAGONALS = {
+    "1": ("2", "4"),
+    "3": ("2", "6"),
+    "7": ("4", "8"),
+    "9": ("6", "8")
+}
+
+
+def tokenize(notation):
+    """
+    Split a motion in numpad notation into its tokens
+
+    :param notation: Motion, such as 236P or [4]6K
+    :type notation: str
+    :return: Tokens
+    :rtype: list
+    """
+    tokens = TOKEN.findall(notation)
+    if "".join(tokens) != notation:
+        raise ValueError(f"Invalid motion: {notation}")
+    return tokens
+
+
+def _accepts(token):
+    """
+    Return the motion tokens an input token satisfies: itself, and for a
+    diagonal direction or charge, the cardinals it contains
+    """
+    if token.startswith("["):
+        return (token,) + tuple(
+            f"[{direction}]" for direction in DIAGONALS.get(token[1], ())
+        )
+    return (token,) + DIAGONALS.get(token, ())
+
+
+# Motion tokens satisfied by each direction and charge input
+ACCEPTS = {
+    token: _accepts(token)
+    for direction in "123456789"
+    for token in (direction, f"[{direction}]")
+}
+
+
+def compile_motions(motions):
+    """
+    Compile motions into a trie over notation tokens, shared prefixes
+    being matched once whatever the number of motions
+
+    :param motions: Frame window of each motion keyed by notation
+    :type motions: dict
+    :return: Children keyed by token, the token leading to and the motions
+        ending at each node
+    :rtype: tuple
+    """
+    children = [{}]
+    tokens = [""]
+    outputs = [[]]
+    for notation, window in motions.items():
+        try:
+            sequence = tokenize(notation)
+        except ValueError as e:
+            logger.error(e)
+            continue
+        node = 0
+        for token in sequence:
+            if token not in children[node]:
+                children[node][token] = len(children)
+                children.append({})
+                tokens.append(token)
+                outputs.append([])
+            node = children[node][token]
+        outputs[node].append((notation, window))
+    return children, tokens, outputs
+
+
+class MotionMatcher:
+    """
+    Incremental matcher of motions over the stream of directions and
+    buttons, as lenient as game input readers: neutral between the tokens
+    of a motion is skipped, a diagonal counts as the cardinals it
+    contains, and directions still satisfying the last matched token are
+    passed over, so that rolling the stick through 6, 3, 2, 3 completes
+    623 and a charge released through neutral still completes [4]6. The
+    partial motions are the nodes of the compiled trie reached within the
+    longest frame window, each with the latest frame it started in, so a
+    prefix shared by several motions is one partial motion. An input costs
+    time in proportion to the partial motions alive rather than to the
+    motions defined, but they still grow with the motions: random input
+    leaves about 1, 6 and 10 alive with 10, 500 and 5000 random motions
+
+    :param motions: Frame window of each motion keyed by notation
+    :type motions: dict
+    :param charge: Frames a direction must be held to count as a charge
+    :type charge: int
+    """
+    def __init__(self, motions, charge=CHARGE_FRAMES):
+        """
+        Constructor
+        """
+        self.charge = charge
+        self._children, self._tokens, self._outputs = compile_motions(
+            motions
+        )
+        self._longest = max(
+            (window for matched in self._outputs for _, window in matched),
+            default=0
+        )
+        # Frame each partial motion started in keyed by trie node
+        self._active = {}
+        self._direction = 5
+        self._direction_frame = 0
+
+    def feed(self, token, frame):
+        """
+        Advance the partial motions with a token, in time proportional to
+        the number of partial motions alive
+
+        :param token: Direction, charge or button token
+        :type token: str
+        :param frame: Game frame of the token
+        :type frame: int
+        :return: Longest motion completed in its window, if any
+        :rtype: str or None
+        """
+        accepts = ACCEPTS.get(token, (token,))
+        children = self._children
+        active = {}
+        advanced = []
+        for node, start in self._active.items():
+            if frame - start > self._longest:
+                continue
+            for accepted in accepts:
+                child = children[node].get(accepted)
+                if child is not None and start > active.get(child, -1):
+                    active[child] = start
+                    advanced.append(child)
+            # Wait through neutral and the same direction
+            if token == "5" or self._tokens[node] in accepts:
+                if start > active.get(node, -1):
+                    active[node] = start
+        # Motions starting with the token
+        for accepted in accepts:
+            child = children[0].get(accepted)
+            if child is not None:
+                active[child] = frame
+                advanced.append(child)
+        self._active = active
+        best = None
+        for node in advanced:
+            for notation, window in self._outputs[node]:
+                if frame - active[node] <= window and (
+                    best is None or len(notation) > len(best)
+                ):
+                    best = notation
+        return best
+
+    def direction(self, direction, frame):
+        """
+        Feed a direction in numpad notation if it changed, preceded by
+        the charge of the previous direction if it was held long enough
+
+        :param direction: Direction, 1 to 9
+        :type direction: int
+        :param frame: Game frame of the direction
+        :type frame: int
+        :return: Longest motion completed in its window, if any
+        :rtype: str or None
+        """
+        if direction == self._direction:
+            return None
+        matched = None
+        if (
+            self._direction != 5
+            and frame - self._direction_frame >= self.charge
+        ):
+            matched = self.feed(f"[{self._direction}]", frame)
+        self._direction = direction
+        self._direction_frame = frame
+        return self.feed(str(direction), frame) or matched
+
+
+class MotionRecognizer:
+    """
+    Controller event handler recognizing motions in the input stream and
+    showing the last one in the overlay
+
+    :param manager: Scene manager
+    :type manager: SceneManager
+    :param motions: Frame window of each motion keyed by notation
+    :type motions: dict
+    :param charge: Frames a direction must be held to count as a charge
+    :type charge: int
+    """
+    def __init__(self, manager, motions, charge=CHARGE_FRAMES):
+        """
+        Constructor
+        """
+        self.manager = manager
+        self.matcher = MotionMatcher(motions, charge)
+        # Whether each trigger is pulled past the deadzone
+        self._pulled = {}
+        # Imported here as labels need a display, which matching does not
+        from .blending import label_class
+
+        self.label = label_class(manager.transparent)(
+            "",
+            font_size=24,
+            weight="bold",
+            x=10,
+            y=WINDOW_HEIGHT - 10,
+            anchor_y="top",
+            batch=manager.overlay
+        )
+
+    def _show(self, notation):
+        """
+        Display a recognized motion for a second
+        """
+        if notation is None:
+            return
+        logger.debug(f"Recognized Motion: {notation}")
+        self.label.text = notation
+        pyglet.clock.unschedule(self._clear)
+        pyglet.clock.schedule_once(self._clear, 1.0)
+
+    def _clear(self, dt):
+        self.label.text = ""
+
+    def delete(self):
+        """
+        Remove the label from the overlay
+        """
+        pyglet.clock.unschedule(self._clear)
+        self.label.delete()
+
+    def _on_direction(self, x, y):
+        """
+        Convert a direction to numpad notation and feed it
+        """
+        deadzone = self.manager.stick_deadzone
+        direction = (
+            5 + (x > deadzone) - (x < -deadzone)
+            + 3 * ((y > deadzone) - (y < -deadzone))
+        )
+        self._show(
+            self.matcher.direction(
+                direction, int(perf_counter() * FRAME_RATE)
+            )
+        )
+
+    def on_button_press(self, controller, button):
+        token = NOTATION.get(button)
+        if token:
+            self._show(
+                self.matcher.feed(token, int(perf_counter() * FRAME_RATE))
+            )
+
+    def on_trigger_motion(self, controller, trigger, value):
+        # Triggers count as buttons once pulled past the deadzone
+        pulled = value > self.manager.trigger_deadzone
+        if pulled and not self._pulled.get(trigger):
+            self.on_button_press(controller, trigger)
+        self._pulled[trigger] = pulled
+
+    def on_stick_motion(self, controller, stick, vector):
+        if stick == "leftstick":
+            self._on_direction(vector.x, vector.y)
+
+    def on_dpad_motion(self, controller, vector):
+        self._on_direction(vector.x, vector.y)
+
+
+def _random_motions(count, random):
+    """
+    Return `count` random motions of two to five directions and a button
+    """
+    motions = {}
+    while len(motions) < count:
+        directions = [random.choice("12346789")]
+        for _ in range(random.randint(1, 4)):
+            directions.append(
+                random.choice([d for d in "12346789" if d != directions[-1]])
+            )
+        charge = f"[{directions.pop(0)}]" if random.random() < 0.2 else ""
+        notation = charge + "".join(directions) + random.choice("PK")
+        motions[notation] = random.randint(10, 30)
+    return motions
+
+
+def main(argv=None):
+    """
+    Measure the cost per input of matching motions
+
+    :param argv: Command line arguments
+    :type argv: list
+    :return: Return code
+    :rtype: int
+    """
+    parser = ArgumentParser(
+        prog="fightsticker.motions",
+        description="Fightsticker - Measure the motion matching"
+    )
+    parser.add_argument(
+        "-m", "--motions",
+        action="store",
+        type=int,
+        help="Number of motions defined",
+        dest="MOTIONS",
+        default=500
+    )
+    parser.add_argument(
+        "-e", "--events",
+        action="store",
+        type=int,
+        help="Number of inputs fed",
+        dest="EVENTS",
+        default=100000
+    )
+    option = parser.parse_args(argv)
+
+    random = Random(0)
+    # Stick rolls, rests and button presses, a few frames apart
+    inputs = []
+    frame = 0
+    direction = 5
+    for _ in range(option.EVENTS):
+        frame += random.randint(1, 3)
+        if random.random() < 0.25:
+            inputs.append((frame, random.choice("PK")))
+            continue
+        if random.random() < 0.1:
+            frame += 40
+        direction = random.choice(
+            [d for d in range(1, 10) if d != direction]
+        )
+        inputs.append((frame, direction))
+    motions = _random_motions(option.MOTIONS, random)
+    print(f"{'Motions':>8}{'us/input':>10}{'Partial':>9}{'Matched':>9}")
+    for count in sorted({10, option.MOTIONS}):
+        matcher = MotionMatcher(dict(list(motions.items())[:count]))
+        matched = 0
+        partial = 0
+        start = perf_counter()
+        for frame, value in inputs:
+            if isinstance(value, int):
+                result = matcher.direction(value, frame)
+            else:
+                result = matcher.feed(value, frame)
+            if result:
+                matched += 1
+            partial += len(matcher._active)
+        elapsed = perf_counter() - start
+        print(
+            f"{count:>8}{elapsed / len(inputs) * 1e6:>10.2f}"
+            f"{partial / len(inputs):>9.1f}{matched:>9}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
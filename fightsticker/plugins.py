@@ -0,0 +1,342 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from importlib.util import module_from_spec, spec_from_file_location
+from os import scandir
+from os.path import basename, join, splitext
+from time import perf_counter, perf_counter_ns
+
+import pyglet
+
+from . import *
+from .logger import logger
+
+# Directory holding the plugins
+PLUGIN_DIR = join(CONF, "plugins")
+# Consecutive frames an inline plugin may exceed its budget before it is
+# disabled
+STRIKES = 30
+
+# Plugin module loaded in a worker process
+_worker_module = None
+
+
+def _load(path):
+    """
+    Import the plugin module at `path`
+    """
+    name = f"fightsticker_plugin_{splitext(basename(path))[0]}"
+    spec = spec_from_file_location(name, path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _init_worker(path):
+    """
+    Import the plugin module of a worker process
+    """
+    global _worker_module
+    _worker_module = _load(path)
+
+
+def _call_worker(snapshot, events):
+    """
+    Run a frame of the plugin of a worker process, returning the time it
+    took in nanoseconds along with its result
+    """
+    start = perf_counter_ns()
+    result = _worker_module.on_frame(snapshot, events)
+    return perf_counter_ns() - start, result
+
+
+class Plugin:
+    """
+    Plugin module loaded by the plugin host. The module defines
+    `on_frame(snapshot, events)`, and optionally `on_result(result)` to
+    receive what it returns in the main thread, `setup(host)`,
+    `teardown()`, and `WORKER` set to "thread" or "process" to run
+    `on_frame` off the main thread
+
+    :param path: Module path
+    :type path: str
+    """
+    def __init__(self, path):
+        """
+        Constructor
+        """
+        self.path = path
+        self.name = splitext(basename(path))[0]
+        self.module = _load(path)
+        if not callable(getattr(self.module, "on_frame", None)):
+            raise AttributeError("no on_frame function")
+        self.worker = getattr(self.module, "WORKER", None)
+        self.enabled = True
+        # Frames run, total and maximum time in nanoseconds, frames over
+        # budget, and frames skipped as the worker was still busy
+        self.stats = {
+            "frames": 0,
+            "total": 0,
+            "max": 0,
+            "over": 0,
+            "skipped": 0
+        }
+        self._strikes = 0
+        self._executor = None
+        self._future = None
+        # Events of the frames skipped, handed over with the next one
+        self._backlog = []
+        if self.worker == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=1, initializer=_init_worker, initargs=(path,)
+            )
+        elif self.worker == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def record(self, elapsed, budget):
+        """
+        Account for a frame that took `elapsed` nanoseconds
+        """
+        stats = self.stats
+        stats["frames"] += 1
+        stats["total"] += elapsed
+        if elapsed > stats["max"]:
+            stats["max"] = elapsed
+        if elapsed > budget:
+            stats["over"] += 1
+            self._strikes += 1
+        else:
+            self._strikes = 0
+        # Only plugins on the main thread hold up the frame
+        if self._strikes >= STRIKES and not self._executor:
+            self.enabled = False
+            logger.error(
+                f"Plugin {self.name} disabled: over its budget of "
+                f"{budget / 1e6:.2f} ms for {STRIKES} frames, set WORKER "
+                f"to run it off the main thread"
+            )
+
+    def run(self, snapshot, events, budget):
+        """
+        Run a frame of the plugin, handing it over to its worker if it
+        has one
+        """
+        if not self._executor:
+            start = perf_counter_ns()
+            result = self.module.on_frame(snapshot, events)
+            self.record(perf_counter_ns() - start, budget)
+            self.deliver(result)
+            return
+        if self._future:
+            # Still busy, its events are kept for the next frame
+            self.stats["skipped"] += 1
+            self._backlog.extend(events)
+            return
+        if self._backlog:
+            events = self._backlog + events
+            self._backlog = []
+        if self.worker == "process":
+            self._future = self._executor.submit(
+                _call_worker, snapshot, events
+            )
+        else:
+            self._future = self._executor.submit(
+                self._call, snapshot, events
+            )
+
+    def _call(self, snapshot, events):
+        """
+        Run a frame of the plugin in its worker thread
+        """
+        start = perf_counter_ns()
+        result = self.module.on_frame(snapshot, events)
+        return perf_counter_ns() - start, result
+
+    def collect(self, budget):
+        """
+        Hand the result of the worker over to the plugin once it is done
+        """
+        if not self._future or not self._future.done():
+            return
+        future = self._future
+        self._future = None
+        try:
+            elapsed, result = future.result()
+        except Exception as e:
+            logger.error(f"Plugin {self.name} failed: {e}")
+            return
+        self.record(elapsed, budget)
+        self.deliver(result)
+
+    def deliver(self, result):
+        """
+        Pass a result to the plugin in the main thread
+        """
+        on_result = getattr(self.module, "on_result", None)
+        if result is not None and on_result:
+            on_result(result)
+
+    def close(self):
+        """
+        Tear the plugin down and stop its worker
+        """
+        teardown = getattr(self.module, "teardown", None)
+        if teardown:
+            teardown()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PluginHost:
+    """
+    Controller event handler loading the plugins of a directory and
+    handing them, once per frame, a snapshot of the controller state and
+    the list of events of that frame. Events only cost an append to that
+    list, and the plugins only run on frames with events. A plugin taking
+    longer than the budget on the main thread for too many frames in a
+    row is disabled
+
+    :param manager: Scene manager
+    :type manager: SceneManager
+    :param directory: Plugins directory
+    :type directory: str
+    :param budget: Time budget of each plugin per frame in milliseconds
+    :type budget: float
+    """
+    def __init__(self, manager, directory=PLUGIN_DIR, budget=PLUGIN_BUDGET):
+        """
+        Constructor
+        """
+        self.manager = manager
+        self.budget = budget * 1e6
+        self.plugins = []
+        self._frame = 0
+        # Events of the current frame as (time, event, input, value)
+        self._events = []
+        # Controller state
+        self._buttons = set()
+        self._triggers = {}
+        self._sticks = {}
+        self._dpad = (0, 0)
+        try:
+            with scandir(directory) as entries:
+                paths = sorted(
+                    entry.path for entry in entries
+                    if entry.name.endswith(".py") and entry.is_file()
+                )
+        except OSError:
+            paths = []
+        for path in paths:
+            try:
+                plugin = Plugin(path)
+                setup = getattr(plugin.module, "setup", None)
+                if setup:
+                    setup(self)
+            except Exception as e:
+                logger.error(f"Could not load plugin {path}: {e}")
+                continue
+            logger.debug(f"Loaded plugin: {plugin.name}")
+            self.plugins.append(plugin)
+        if self.plugins:
+            pyglet.clock.schedule_interval(self.update, 1 / FRAME_RATE)
+
+    def close(self):
+        """
+        Stop running the plugins
+        """
+        pyglet.clock.unschedule(self.update)
+        for plugin in self.plugins:
+            try:
+                plugin.close()
+            except Exception as e:
+                logger.error(f"Plugin {plugin.name} failed: {e}")
+
+    def snapshot(self):
+        """
+        Return the controller state
+
+        :return: Pressed buttons, trigger values, stick positions, dpad
+            direction, frame number and time
+        :rtype: dict
+        """
+        return {
+            "frame": self._frame,
+            "time": perf_counter(),
+            "buttons": tuple(sorted(self._buttons)),
+            "triggers": dict(self._triggers),
+            "sticks": dict(self._sticks),
+            "dpad": self._dpad
+        }
+
+    def update(self, dt=None):
+        """
+        Run a frame of the plugins
+        """
+        self._frame += 1
+        for plugin in self.plugins:
+            if plugin.enabled:
+                self._guard(plugin, plugin.collect, self.budget)
+        if not self._events:
+            return
+        events = self._events
+        self._events = []
+        snapshot = self.snapshot()
+        for plugin in self.plugins:
+            if plugin.enabled:
+                self._guard(
+                    plugin, plugin.run, snapshot, events, self.budget
+                )
+
+    @staticmethod
+    def _guard(plugin, method, *args):
+        """
+        Call `method` of `plugin`, disabling the plugin if it raises so
+        that it cannot take the window down with it
+        """
+        try:
+            method(*args)
+        except Exception as e:
+            plugin.enabled = False
+            logger.error(f"Plugin {plugin.name} disabled: {e}")
+
+    def summary(self):
+        """
+        Return the timing of every plugin
+
+        :return: Timing in milliseconds and frame counts keyed by plugin
+        :rtype: dict
+        """
+        return {
+            plugin.name: {
+                "enabled": plugin.enabled,
+                "worker": plugin.worker,
+                "frames": plugin.stats["frames"],
+                "mean": (
+                    plugin.stats["total"] / plugin.stats["frames"] / 1e6
+                    if plugin.stats["frames"] else 0.0
+                ),
+                "max": plugin.stats["max"] / 1e6,
+                "over": plugin.stats["over"],
+                "skipped": plugin.stats["skipped"]
+            }
+            for plugin in self.plugins
+        }
+
+    def on_button_press(self, controller, button):
+        self._buttons.add(button)
+        self._events.append((perf_counter(), "press", button, 1))
+
+    def on_button_release(self, controller, button):
+        self._buttons.discard(button)
+        self._events.append((perf_counter(), "release", button, 0))
+
+    def on_trigger_motion(self, controller, trigger, value):
+        self._triggers[trigger] = value
+        self._events.append((perf_counter(), "trigger", trigger, value))
+
+    def on_stick_motion(self, controller, stick, vector):
+        position = vector.x, vector.y
+        self._sticks[stick] = position
+        self._events.append((perf_counter(), "stick", stick, position))
+
+    def on_dpad_motion(self, controller, vector):
+        self._dpad = vector.x, vector.y
+        self._events.append((perf_counter(), "dpad", "dpad", self._dpad))
@@ -1,4 +1,3 @@
-from json import dumps
 from os.path import join
 from platform import system
 from shutil import copyfile
@@ -8,6 +7,7 @@ require_versions({"Gtk": "4.0", "Adw": "1"})
 from gi.repository import Gtk, Adw, Gio
 
 from . import *
+from .settings import settings
 
 
 class Preferences(Gtk.Window):
@@ -54,7 +54,7 @@ class Preferences(Gtk.Window):
         )
 
         # Open stored preferences
-        self.config = read_config("settings.json")
+        self.config = settings.read()
 
         # Stick deadzone label and entry field
         stic = Gtk.Label(halign=Gtk.Align.START)
@@ -270,15 +270,13 @@ class Preferences(Gtk.Window):
         :type button: Gtk.Button
         """
         # Save preferences
-        with open(join(CONF, "settings.json"), "w") as c:
-            self.config["dark"] = self.dark.get_active()
-            self.config["stic"] = float(self.stic.get_text())
-            self.config["trig"] = float(self.trig.get_text())
-            self.config["trad"] = self.trad.get_text()
-            self.config["leve"] = self.leve.get_text()
-            self.config["pad"] = self.pad.get_text()
-            c.write(dumps(self.config))
-            c.close()
+        self.config["dark"] = self.dark.get_active()
+        self.config["stic"] = float(self.stic.get_text())
+        self.config["trig"] = float(self.trig.get_text())
+        self.config["trad"] = self.trad.get_text()
+        self.config["leve"] = self.leve.get_text()
+        self.config["pad"] = self.pad.get_text()
+        settings.write(self.config)
         # Set color scheme
         application = self.get_transient_for().get_application()
         if self.dark.get_active():
@@ -0,0 +1,133 @@
+from cProfile import Profile
+from json import dumps
+from time import perf_counter, perf_counter_ns
+from types import MethodType
+
+import pyglet
+
+from .logger import logger
+
+# Controller and window events timed on scenes and listeners
+HANDLERS = (
+    "on_button_press",
+    "on_button_release",
+    "on_stick_motion",
+    "on_dpad_motion",
+    "on_trigger_motion"
+)
+
+
+class Profiler:
+    """
+    Low-overhead timing of the hot paths, with an optional cProfile
+    capture over a time window
+
+    :param window: Start and duration of the cProfile capture in seconds
+    :type window: tuple
+    """
+    def __init__(self, window=None):
+        """
+        Constructor
+        """
+        # Count, total and maximum time in nanoseconds of each section
+        self.sections = {}
+        self._started = perf_counter()
+        self._profile = None
+        self._duration = 0.0
+        if window:
+            start, self._duration = window
+            pyglet.clock.schedule_once(self._start_capture, start)
+
+    def instrument(self, obj, names, prefix):
+        """
+        Replace the methods `names` of `obj` with timed ones. The
+        replacements are bound methods so that pyglet can still hold them
+        weakly as event handlers
+
+        :param obj: Instance to instrument
+        :type obj: object
+        :param names: Method names
+        :type names: tuple
+        :param prefix: Section name prefix
+        :type prefix: str
+        """
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is None:
+                continue
+            stats = self.sections.setdefault(f"{prefix}.{name}", [0, 0, 0])
+
+            def timed(owner, *args, method=method, stats=stats):
+                start = perf_counter_ns()
+                try:
+                    return method(*args)
+                finally:
+                    elapsed = perf_counter_ns() - start
+                    stats[0] += 1
+                    stats[1] += elapsed
+                    if elapsed > stats[2]:
+                        stats[2] = elapsed
+
+            setattr(obj, name, MethodType(timed, obj))
+
+    def _start_capture(self, dt):
+        """
+        Start the cProfile capture
+        """
+        self._profile = Profile()
+        try:
+            self._profile.enable()
+        except ValueError as e:
+            # Another profiler is already active
+            logger.error(e)
+            self._profile = None
+            return
+        logger.debug("Profile capture started")
+        pyglet.clock.schedule_once(self._stop_capture, self._duration)
+
+    def _stop_capture(self, dt=None):
+        """
+        Stop the cProfile capture
+        """
+        pyglet.clock.unschedule(self._start_capture)
+        pyglet.clock.unschedule(self._stop_capture)
+        if self._profile:
+            self._profile.disable()
+            logger.debug("Profile capture stopped")
+
+    def summary(self):
+        """
+        Return the timing of every section that ran
+
+        :return: Timing in milliseconds keyed by section name
+        :rtype: dict
+        """
+        return {
+            name: {
+                "calls": count,
+                "total": total / 1e6,
+                "mean": total / count / 1e6,
+                "max": peak / 1e6
+            }
+            for name, (count, total, peak) in sorted(self.sections.items())
+            if count
+        }
+
+    def save(self, filename, metadata=None):
+        """
+        Write the section timing summary to a JSON report, and the
+        cProfile capture next to it with a .prof extension
+
+        :param filename: Report filename
+        :type filename: str
+        :param metadata: Session details, such as the layout and controller
+        :type metadata: dict
+        """
+        self._stop_capture()
+        report = dict(metadata or {})
+        report["duration"] = perf_counter() - self._started
+        report["sections"] = self.summary()
+        with open(filename, "w") as r:
+            r.write(dumps(report, indent=4))
+        if self._profile:
+            self._profile.dump_stats(f"{filename}.prof")
@@ -0,0 +1,69 @@
+from struct import Struct
+from time import perf_counter
+
+from . import *
+
+# Layout of a recorded event: time, event kind, input index, x and y
+RECORD = Struct("<dBBff")
+# Event kinds
+PRESS = 0
+RELEASE = 1
+STICK = 2
+DPAD = 3
+TRIGGER = 4
+# Recorded inputs, the buttons first in dispatch table order, then the
+# stick axes, named apart from the stick buttons, and the dpad
+INPUTS = BUTTONS + ("leftstick_axis", "rightstick_axis", "dpad")
+# Index of each recorded input
+INPUT_INDEX = {name: i for i, name in enumerate(INPUTS)}
+# Index of the axes of each stick
+AXIS_INDEX = {
+    "leftstick": INPUT_INDEX["leftstick_axis"],
+    "rightstick": INPUT_INDEX["rightstick_axis"]
+}
+
+
+class Recorder:
+    """
+    Controller event handler appending every event to a session file of
+    fixed-size records
+
+    :param filename: Session filename
+    :type filename: str
+    """
+    def __init__(self, filename):
+        """
+        Constructor
+        """
+        self._file = open(filename, "wb")
+        self._start = perf_counter()
+
+    def _write(self, kind, index, x=0.0, y=0.0):
+        """
+        Append an event of the input at `index` to the session file
+        """
+        if index is not None:
+            self._file.write(
+                RECORD.pack(perf_counter() - self._start, kind, index, x, y)
+            )
+
+    def close(self):
+        """
+        Flush and close the session file
+        """
+        self._file.close()
+
+    def on_button_press(self, controller, button):
+        self._write(PRESS, BUTTON_INDEX.get(button))
+
+    def on_button_release(self, controller, button):
+        self._write(RELEASE, BUTTON_INDEX.get(button))
+
+    def on_stick_motion(self, controller, stick, vector):
+        self._write(STICK, AXIS_INDEX.get(stick), vector.x, vector.y)
+
+    def on_dpad_motion(self, controller, vector):
+        self._write(DPAD, INPUT_INDEX["dpad"], vector.x, vector.y)
+
+    def on_trigger_motion(self, controller, trigger, value):
+        self._write(TRIGGER, BUTTON_INDEX.get(trigger), value)
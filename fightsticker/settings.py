@@ -0,0 +1,173 @@
+from json import dumps, loads
+from os import replace, stat
+from os.path import join
+
+from . import *
+from .logger import logger
+
+
+def validate(config, fallback=DEFAULT):
+    """
+    Given a configuration dictionary `config`, return a copy that matches
+    `SCHEMA`, taking missing or invalid values from `fallback`
+
+    :param config: Configuration dictionary
+    :type config: dict
+    :param fallback: Configuration dictionary to take invalid values from
+    :type fallback: dict
+    :return: Valid configuration dictionary
+    :rtype: dict
+    """
+    valid = {}
+    for key, kind in SCHEMA.items():
+        value = config.get(key)
+        # Accept integers where floats are expected, and booleans stored
+        # as integers
+        if kind is float and type(value) is int:
+            value = float(value)
+        elif kind is bool and type(value) is int:
+            value = bool(value)
+        if type(value) is not kind:
+            value = fallback.get(key, DEFAULT[key])
+        valid[key] = value
+    return valid
+
+
+class Settings:
+    """
+    Store for a JSON configuration file, caching its contents until the
+    file changes and notifying subscribers of changed values
+
+    :param filename: Config filename
+    :type filename: str
+    :param default: Store to take missing or invalid values from
+    :type default: Settings
+    """
+    def __init__(self, filename, default=None):
+        """
+        Constructor
+        """
+        self.filename = filename
+        self.default = default
+        self._path = join(CONF, filename)
+        self._config = None
+        self._mtime = None
+        self._subscribers = []
+
+    def __getitem__(self, key):
+        return self.read()[key]
+
+    def read(self):
+        """
+        Return the configuration, parsing the file again only when its
+        modification time changed
+
+        :return: Configuration dictionary
+        :rtype: dict
+        """
+        try:
+            mtime = stat(self._path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._config is None or mtime != self._mtime:
+            self._load(mtime)
+        return dict(self._config)
+
+    def refresh(self, dt=None):
+        """
+        Pick up changes made to the file by another process
+
+        :param dt: Time since the last refresh
+        :type dt: float
+        """
+        self.read()
+
+    def write(self, config):
+        """
+        Validate and save the configuration `config`
+
+        :param config: Configuration dictionary
+        :type config: dict
+        """
+        valid = validate(config, self._fallback())
+        self._write(valid)
+        self._update(valid)
+
+    def subscribe(self, callback):
+        """
+        Call `callback` with the key and new value of every changed item
+
+        :param callback: Callback
+        :type callback: Callable[[str, Any], None]
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Stop notifying `callback` of changes
+
+        :param callback: Callback
+        :type callback: Callable[[str, Any], None]
+        """
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _fallback(self):
+        """
+        Return the configuration invalid values are replaced from
+        """
+        if self.default:
+            return self.default.read()
+        return DEFAULT
+
+    def _load(self, mtime):
+        """
+        Parse and validate the file, repairing it if it is missing or
+        invalid
+        """
+        fallback = self._fallback()
+        try:
+            with open(self._path, "r") as c:
+                config = loads(c.read())
+            if not isinstance(config, dict):
+                raise ValueError("Configuration is not an object")
+        except FileNotFoundError:
+            config = {}
+        except ValueError:
+            logger.error(f"Invalid config file, repairing: {self._path}")
+            config = {}
+        valid = validate(config, fallback)
+        if mtime is None or valid != config:
+            self._write(valid)
+        else:
+            self._mtime = mtime
+        self._update(valid)
+
+    def _write(self, config):
+        """
+        Write `config` to a temporary file and rename it over the file,
+        so readers never see a partial write
+        """
+        with open(f"{self._path}.tmp", "w") as c:
+            c.write(dumps(config))
+        replace(f"{self._path}.tmp", self._path)
+        self._mtime = stat(self._path).st_mtime_ns
+
+    def _update(self, config):
+        """
+        Replace the cached configuration and notify subscribers
+        """
+        previous = self._config
+        self._config = config
+        if previous is None:
+            return
+        for key, value in config.items():
+            if previous.get(key) != value:
+                for callback in list(self._subscribers):
+                    callback(key, value)
+
+
+# Default configuration
+default_settings = Settings("default.json")
+# User configuration
+settings = Settings("settings.json", default_settings)
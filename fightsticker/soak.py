@@ -0,0 +1,252 @@
+import gc
+import tracemalloc
+from array import array
+from json import dumps
+from random import Random
+from time import thread_time_ns
+
+import pyglet
+from pyglet.math import Vec2
+
+from . import *
+from .logger import logger
+from .profiler import HANDLERS
+
+# Simulated seconds between samples, and between controller reconnections
+# and layout switches
+SAMPLE_INTERVAL = 60
+RECONNECT_INTERVAL = 10
+SWITCH_INTERVAL = 300
+# Share of the samples discarded while caches and pools warm up
+WARMUP = 0.1
+# Growth tolerated for each metric from the first to the last quarter of
+# the session after the warm up, relative to the first quarter. Handler
+# stacks must not grow at all
+TOLERANCE = {
+    "window_handlers": 0,
+    "controller_handlers": 0,
+    "listeners": 0,
+    "objects": 0.02,
+    "traced": 0.05,
+    "event_ns": 0.5
+}
+
+
+def _median(values):
+    """
+    Return the median of `values`
+    """
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+class SyntheticController(pyglet.event.EventDispatcher):
+    """
+    Controller standing in for a real one during a soak test
+
+    :param index: Number of the controller
+    :type index: int
+    """
+    def __init__(self, index):
+        """
+        Constructor
+        """
+        self.name = f"Soak controller {index}"
+        self.guid = "soak"
+
+    def open(self, window=None, exclusive=False):
+        pass
+
+    def close(self):
+        pass
+
+
+for event in HANDLERS:
+    SyntheticController.register_event_type(event)
+
+
+class SoakTest:
+    """
+    Soak test driving hours of synthetic input, controller reconnections
+    and layout switches through the scene manager in accelerated time,
+    while sampling the handler stack depths, live objects, traced memory
+    and cost per event. Once done, it fails if any of them trends upward
+    beyond its tolerance, saves a report and exits the app
+
+    :param manager: Scene manager
+    :type manager: SceneManager
+    :param filename: Report filename
+    :type filename: str
+    :param hours: Simulated session length
+    :type hours: float
+    :param speed: Simulated seconds per second
+    :type speed: float
+    :param seed: Seed of the synthetic input
+    :type seed: int
+    """
+    def __init__(self, manager, filename, hours=8, speed=600, seed=0):
+        """
+        Constructor
+        """
+        self.manager = manager
+        self.filename = filename
+        self.duration = hours * 3600
+        self.speed = speed
+        self.random = Random(seed)
+        self.elapsed = 0
+        self.controller = None
+        self.reconnections = 0
+        self.passed = None
+        # Sampled metrics, preallocated so that sampling allocates nothing
+        # the soak test could mistake for a leak
+        count = int(self.duration // SAMPLE_INTERVAL)
+        self.samples = {
+            name: array("d", bytes(8 * count)) for name in TOLERANCE
+        }
+        self._count = 0
+        self._events = 0
+        self._event_time = 0
+        self._budget = 0.0
+        tracemalloc.start()
+        if manager.fightstick:
+            manager.on_controller_disconnect(manager.fightstick)
+        self._connect()
+        pyglet.clock.schedule_interval(self.update, 1 / FRAME_RATE)
+
+    def _connect(self):
+        """
+        Plug the synthetic controller back in. The same controller is
+        reused, like the controller slots of some platforms, so that
+        handlers left on it show up in the report
+        """
+        self.reconnections += 1
+        if self.controller is None:
+            self.controller = SyntheticController(self.reconnections)
+        self.manager.on_controller_connect(self.controller)
+
+    def _dispatch(self, event, *args):
+        """
+        Dispatch a synthetic event, timing the CPU time it takes
+        """
+        start = thread_time_ns()
+        self.controller.dispatch_event(event, self.controller, *args)
+        self._event_time += thread_time_ns() - start
+        self._events += 1
+
+    def _second(self):
+        """
+        Simulate a second of play, then the periodic disturbances
+        """
+        random = self.random
+        for _ in range(random.randint(5, 20)):
+            roll = random.random()
+            if roll < 0.4:
+                button = random.choice(BUTTONS[:9])
+                self._dispatch("on_button_press", button)
+                self._dispatch("on_button_release", button)
+            elif roll < 0.7:
+                vector = Vec2(random.uniform(-1, 1), random.uniform(-1, 1))
+                self._dispatch("on_stick_motion", "leftstick", vector)
+            elif roll < 0.85:
+                vector = Vec2(random.randint(-1, 1), random.randint(-1, 1))
+                self._dispatch("on_dpad_motion", vector)
+            else:
+                trigger = random.choice(("lefttrigger", "righttrigger"))
+                self._dispatch("on_trigger_motion", trigger, random.random())
+        self.elapsed += 1
+        if self.elapsed % RECONNECT_INTERVAL == 0:
+            self.manager.on_controller_disconnect(self.controller)
+            self._connect()
+        if self.elapsed % SWITCH_INTERVAL == 0:
+            layouts = [name.lower() for name in LAYOUTS]
+            index = layouts.index(self.manager.layout) + 1
+            self.manager.switch(layouts[index % len(layouts)])
+        if self.elapsed % SAMPLE_INTERVAL == 0:
+            self._sample()
+
+    def _sample(self):
+        """
+        Record the metrics of the last interval
+        """
+        samples = self.samples
+        i = self._count
+        if i >= len(samples["objects"]):
+            return
+        self._count += 1
+        samples["window_handlers"][i] = len(self.manager.window._event_stack)
+        samples["controller_handlers"][i] = len(self.controller._event_stack)
+        samples["listeners"][i] = len(self.manager._listeners)
+        samples["objects"][i] = len(gc.get_objects())
+        samples["traced"][i] = tracemalloc.get_traced_memory()[0]
+        samples["event_ns"][i] = (
+            self._event_time / self._events if self._events else 0
+        )
+        self._events = 0
+        self._event_time = 0
+
+    def update(self, dt):
+        """
+        Simulate the seconds of play that passed at the soak speed
+        """
+        self._budget += dt * self.speed
+        while self._budget >= 1 and self.elapsed < self.duration:
+            self._budget -= 1
+            self._second()
+        if self.elapsed >= self.duration:
+            self.finish()
+
+    def trends(self):
+        """
+        Return the growth of every metric from the median of the first
+        quarter of the session after the warm up to the median of the last
+        quarter, which evens out the noise of timing and the sawtooth of
+        caches, relative to the first quarter except for the handler stacks
+
+        :return: Growth and whether it is within tolerance by metric
+        :rtype: dict
+        """
+        trends = {}
+        for name, values in self.samples.items():
+            values = values[int(self._count * WARMUP):self._count]
+            quarter = len(values) // 4
+            if not quarter:
+                continue
+            first = _median(values[:quarter])
+            growth = _median(values[-quarter:]) - first
+            if TOLERANCE[name]:
+                growth /= first or 1
+                passed = growth <= TOLERANCE[name]
+            else:
+                # Any handler left behind is a leak
+                passed = max(values) <= values[0]
+            trends[name] = {"growth": growth, "passed": passed}
+        return trends
+
+    def finish(self):
+        """
+        Judge the trends, save the report and exit
+        """
+        pyglet.clock.unschedule(self.update)
+        trends = self.trends()
+        self.passed = all(trend["passed"] for trend in trends.values())
+        tracemalloc.stop()
+        report = {
+            "passed": self.passed,
+            "simulated": self.elapsed,
+            "reconnections": self.reconnections,
+            "trends": trends,
+            "samples": {
+                name: values[:self._count].tolist()
+                for name, values in self.samples.items()
+            }
+        }
+        with open(self.filename, "w") as r:
+            r.write(dumps(report, indent=4))
+        if self.passed:
+            logger.debug("Soak test passed")
+        else:
+            failed = ", ".join(
+                name for name, trend in trends.items() if not trend["passed"]
+            )
+            logger.error(f"Soak test failed, upward trend in: {failed}")
+        pyglet.app.exit()
@@ -0,0 +1,109 @@
+import sys
+from argparse import ArgumentParser
+from functools import partial
+from math import pi, sin
+from random import Random
+from tempfile import TemporaryDirectory
+
+from . import *
+from . import gauge
+from .budget import ROUNDS, _elapsed, layout_scenes
+
+# Rate of the synthetic trigger reports, in hertz, and seconds of them
+RATE = 1000
+SECONDS = 2
+# Trigger pulls per second and noise of the synthetic reports
+PULLS = 4
+NOISE = 0.004
+
+
+def pull_events(rate=RATE, seconds=SECONDS, seed=0):
+    """
+    Build the arguments of trigger reports at `rate` hertz pulling the
+    right trigger in and out, with the noise of an analog sensor
+
+    :param rate: Reports per second
+    :type rate: int
+    :param seconds: Seconds of reports
+    :type seconds: float
+    :param seed: Seed of the noise
+    :type seed: int
+    :return: Event arguments
+    :rtype: list
+    """
+    random = Random(seed)
+    events = []
+    for i in range(int(rate * seconds)):
+        pull = max(0.0, sin(2 * pi * PULLS * i / rate))
+        value = min(1.0, max(0.0, pull + random.gauss(0.0, NOISE)))
+        events.append((None, "righttrigger", value))
+    return events
+
+
+def main(argv=None):
+    """
+    Time the threshold, fill and ramp displays of the triggers on a
+    synthetic 1 kHz pull
+
+    :param argv: Command line arguments
+    :type argv: list
+    :return: Return code
+    :rtype: int
+    """
+    parser = ArgumentParser(
+        prog="fightsticker.triggers",
+        description="Fightsticker - Time the trigger displays"
+    )
+    parser.add_argument(
+        "--rate",
+        action="store",
+        type=int,
+        help="Trigger reports per second",
+        dest="RATE",
+        default=RATE
+    )
+    parser.add_argument(
+        "-r", "--rounds",
+        action="store",
+        type=int,
+        help="Rounds timed for each display",
+        dest="ROUNDS",
+        default=ROUNDS
+    )
+    option = parser.parse_args(argv)
+
+    events = pull_events(option.RATE)
+    index = BUTTON_INDEX["righttrigger"]
+    print(
+        f"{'Layout':<13}{'Display':<11}{'ns':>8}{'CPU':>9}"
+        f"{'Writes':>9}{'Skipped':>9}"
+    )
+    # Run against an empty configuration directory, as the budgets do
+    with TemporaryDirectory(ignore_cleanup_errors=True) as conf:
+        for layout, scene in layout_scenes(conf):
+            for mode in ("threshold", "fill", "ramp"):
+                scene.gauges = {}
+                if mode != "threshold":
+                    scene.gauges[index] = gauge.TriggerGauge(
+                        scene.button_table[index], mode,
+                        partial(scene._hold, index)
+                    )
+                gauge.stats["writes"] = gauge.stats["skipped"] = 0
+                ns = min(
+                    _elapsed(scene.on_trigger_motion, events)
+                    for _ in range(option.ROUNDS)
+                )
+                # Share of a core taken by the reports at their rate, and the
+                # gauge updates of a round
+                cpu = ns * option.RATE / 1e7
+                writes = gauge.stats["writes"] // option.ROUNDS
+                skipped = gauge.stats["skipped"] // option.ROUNDS
+                print(
+                    f"{layout:<13}{mode:<11}{ns:>8.0f}{cpu:>8.3f}%"
+                    f"{writes:>9}{skipped:>9}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,7 @@ from gi.repository import Gtk, Gio
 from . import *
 from .about import About
 from .preferences import Preferences
+from .settings import settings
 from .fightstick import run
 
 
@@ -103,9 +104,6 @@ class Window(Gtk.ApplicationWindow):
         # Add grid
         self.set_child(grid)
 
-        # Open stored preferences
-        self.config = read_config("settings.json")
-
     def on_prefs_clicked(self, action, param):
         """
         Open preferences window
@@ -138,4 +136,8 @@ class Window(Gtk.ApplicationWindow):
         :type button: Gtk.Button
         """
         option = self.dropdown.props.selected_item.props.string
-        run(layout=option.lower(), config=self.config, parent=self)
+        # Keep the exit status of the layout window, such as a failed soak
+        # test, for the application to exit with
+        self.get_application().status = run(
+            layout=option.lower(), config=settings.read(), parent=self
+        )
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pyglet
+import pytest
+
+# Without a display, draw offscreen where EGL is available
+if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+    pyglet.options["headless"] = True
+
+
+@pytest.fixture(scope="session")
+def window():
+    """
+    Hidden window providing a GL context, skipping tests without one
+    """
+    try:
+        window = pyglet.window.Window(visible=False)
+    except Exception as e:
+        pytest.skip(f"No GL context: {e}")
+    yield window
+    window.close()
+
+
+class Scene:
+    """
+    Scene recording the events it is passed
+    """
+    def __init__(self):
+        self.events = []
+
+    def on_button_press(self, controller, button):
+        self.events.append(("press", button))
+
+    def on_button_release(self, controller, button):
+        self.events.append(("release", button))
+
+    def on_trigger_motion(self, controller, trigger, value):
+        self.events.append((trigger, value))
+
+    def on_stick_motion(self, controller, stick, vector):
+        self.events.append((stick, vector.x, vector.y))
+
+    def on_dpad_motion(self, controller, vector):
+        self.events.append(("dpad", vector.x, vector.y))
+
+
+@pytest.fixture
+def scene():
+    """
+    Scene recording the events it is passed
+    """
+    return Scene()
@@ -0,0 +1,44 @@
+import pytest
+
+from fightsticker import budget
+
+
+def test_check_flags_handlers_over_budget():
+    budgets = {"Pad": {"on_button_press": {"bytes": 100, "ns": 1000}}}
+    results = {
+        "Pad": {
+            "on_button_press": {"bytes": 120.0, "ns": 500.0},
+            "on_dpad_motion": {"bytes": 0.0, "ns": 0.0}
+        }
+    }
+    failures = budget.check(results, budgets)
+    assert len(failures) == 2
+    assert failures[0].startswith("Pad.on_button_press: 120 B")
+    assert failures[1] == "Pad.on_dpad_motion: no budget"
+
+
+def test_measure_counts_memory_kept():
+    kept = []
+
+    class LeakyScene(budget._IdleScene):
+        def on_button_press(self, controller, button):
+            kept.append(bytearray(1000))
+
+    events = budget.synthetic_events(16)
+    results = budget.measure(LeakyScene(), events, rounds=2)
+    assert results["on_button_press"]["bytes"] >= 1000
+    assert results["on_button_release"]["bytes"] < 100
+
+
+def test_layout_handlers_within_budget(window, tmp_path):
+    scenes = budget.layout_scenes(str(tmp_path))
+    try:
+        layout, scene = next(scenes)
+    except Exception as e:
+        pytest.skip(f"No layout scenes: {e}")
+    events = budget.synthetic_events(budget.EVENTS)
+    results = {layout: budget.measure(scene, events)}
+    for layout, scene in scenes:
+        results[layout] = budget.measure(scene, events)
+    assert tuple(results) == budget.LAYOUTS
+    assert budget.check(results) == []
@@ -0,0 +1,45 @@
+import pytest
+
+from fightsticker.catalog import AssetCatalog
+
+
+def test_added_and_removed_files_are_seen(tmp_path):
+    root = tmp_path / "images"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.png").touch()
+    catalog = AssetCatalog((str(root),), str(tmp_path / "catalog.json"))
+    assert catalog.locate("a.png") == str(root / "a.png")
+
+    (root / "sub" / "b.png").touch()
+    catalog.refresh()
+    assert catalog.locate("sub/b.png") == str(root / "sub" / "b.png")
+
+    (root / "a.png").unlink()
+    catalog.refresh()
+    with pytest.raises(FileNotFoundError):
+        catalog.locate("a.png")
+
+
+def test_first_root_takes_precedence(tmp_path):
+    user = tmp_path / "user"
+    bundled = tmp_path / "bundled"
+    for root in (user, bundled):
+        root.mkdir()
+        (root / "a.png").touch()
+    (bundled / "b.png").touch()
+    catalog = AssetCatalog(
+        (str(user), str(bundled)), str(tmp_path / "catalog.json")
+    )
+    assert catalog.locate("a.png") == str(user / "a.png")
+    assert catalog.locate("b.png") == str(bundled / "b.png")
+
+
+def test_unchanged_directories_are_not_indexed_again(tmp_path):
+    root = tmp_path / "images"
+    root.mkdir()
+    (root / "a.png").touch()
+    catalog = AssetCatalog((str(root),), str(tmp_path / "catalog.json"))
+    catalog.refresh()
+    index = catalog._index
+    catalog.refresh()
+    assert catalog._index is index
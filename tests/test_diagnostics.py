@@ -0,0 +1,18 @@
+from fightsticker.diagnostics import _InputStats
+
+
+def report(times):
+    stats = _InputStats()
+    for i, timestamp in enumerate(times):
+        stats.add(timestamp, i)
+    return stats.summary()
+
+
+def test_lost_reports_are_dropped():
+    times = [i * 0.001 for i in range(100)] + [0.102]
+    assert report(times)["dropped"] == 2
+
+
+def test_idle_gaps_are_not_dropped():
+    times = [i * 0.001 for i in range(100)] + [5.0]
+    assert report(times)["dropped"] == 0
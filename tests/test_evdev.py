@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from fightsticker import evdev
+
+# Axis ranges of the replayed device
+ABSINFO = {0x00: (-32768, 32767), 0x01: (-32768, 32767), 0x05: (0, 255)}
+
+
+def event(ev_type, code, value):
+    return evdev.INPUT_EVENT.pack(0, 0, ev_type, code, value)
+
+
+def report():
+    return event(evdev.EV_SYN, evdev.SYN_REPORT, 0)
+
+
+@pytest.fixture
+def replay():
+    """
+    Controller reading input_event structs written to a pipe, and the
+    list of events it dispatched
+    """
+    read_end, write_end = os.pipe()
+    controller = evdev.EvdevController(
+        f"/dev/fd/{read_end}", guid="replay", absinfo=ABSINFO
+    )
+    controller.open()
+    dispatched = []
+    controller.push_handlers(
+        on_button_press=lambda c, b: dispatched.append(("press", b)),
+        on_button_release=lambda c, b: dispatched.append(("release", b)),
+        on_stick_motion=lambda c, s, v: dispatched.append((s, v.x, v.y)),
+        on_trigger_motion=lambda c, t, v: dispatched.append((t, v))
+    )
+
+    def feed(*events):
+        os.write(write_end, b"".join(events))
+        controller.select()
+        return dispatched
+
+    yield controller, feed
+    controller.close()
+    os.close(write_end)
+    os.close(read_end)
+
+
+def test_sticks_dispatch_once_per_report(replay):
+    controller, feed = replay
+    dispatched = feed(
+        event(evdev.EV_ABS, 0x00, 32767),
+        event(evdev.EV_ABS, 0x01, -32768),
+        event(evdev.EV_KEY, 0x130, 1),
+        report()
+    )
+    assert dispatched[0] == ("press", "a")
+    assert dispatched[1:] == [
+        ("leftstick", pytest.approx(1.0), pytest.approx(1.0))
+    ]
+
+
+def test_dropped_report_is_discarded(replay):
+    controller, feed = replay
+    dispatched = feed(
+        event(evdev.EV_KEY, 0x130, 1),
+        report(),
+        event(evdev.EV_SYN, evdev.SYN_DROPPED, 0),
+        event(evdev.EV_KEY, 0x131, 1),
+        event(evdev.EV_ABS, 0x05, 255),
+        event(evdev.EV_ABS, 0x00, 32767),
+        report(),
+        event(evdev.EV_KEY, 0x134, 1),
+        report()
+    )
+    assert dispatched == [("press", "a"), ("press", "x")]
+    assert controller.dropped == 1
+
+
+def test_dropped_report_resyncs_state(replay, monkeypatch):
+    controller, feed = replay
+    feed(event(evdev.EV_KEY, 0x130, 1), report())
+
+    def ioctl(fileno, request, buffer):
+        # B held and the right trigger fully pulled
+        if request == evdev.EVIOCGKEY:
+            keys = bytearray(len(buffer))
+            keys[0x131 >> 3] |= 1 << (0x131 & 7)
+            return bytes(keys)
+        value = 255 if request == evdev._ioc_read(0x40 + 0x05, 24) else 0
+        return evdev.pack("6i", value, 0, 0, 0, 0, 0)
+
+    monkeypatch.setattr(evdev, "ioctl", ioctl)
+    dispatched = feed(
+        event(evdev.EV_SYN, evdev.SYN_DROPPED, 0),
+        event(evdev.EV_KEY, 0x130, 0),
+        report()
+    )
+    assert dispatched[1:3] == [("release", "a"), ("press", "b")]
+    assert ("righttrigger", pytest.approx(1.0)) in dispatched
+    assert ("leftstick", pytest.approx(0.0, abs=1e-4),
+            pytest.approx(0.0, abs=1e-4)) in dispatched
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+from pyglet.math import Vec2
+
+from fightsticker import filters
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Clock of the filter, advanced by hand
+    """
+    now = [100.0]
+    monkeypatch.setattr(filters, "perf_counter", lambda: now[0])
+    return now
+
+
+def make_filter(scene, **kwargs):
+    manager = SimpleNamespace(
+        frame_lock=None,
+        _current_scene=scene,
+        trigger_deadzone=0.5,
+        stick_deadzone=0.5,
+        triggers="threshold"
+    )
+    return filters.InputFilter(manager, **kwargs)
+
+
+def test_trigger_hysteresis(scene):
+    input_filter = make_filter(scene, hysteresis={"triggers": 0.05})
+    for value in (0.52, 0.56, 0.6, 0.48, 0.44):
+        input_filter.on_trigger_motion(None, "righttrigger", value)
+    assert scene.events == [("righttrigger", 0.56), ("righttrigger", 0.44)]
+    # Without the band, 0.52 would have turned it on and 0.48 off
+    assert input_filter.suppressed["triggers"] == 2
+
+
+def test_button_debounce(clock, scene):
+    input_filter = make_filter(scene, debounce={"buttons": 0.01})
+    input_filter.on_button_press(None, "a")
+    clock[0] += 0.004
+    input_filter.on_button_release(None, "a")
+    input_filter.on_button_press(None, "a")
+    input_filter.on_button_release(None, "a")
+    assert scene.events == [("press", "a")]
+    assert input_filter.suppressed["buttons"] == 2
+    # The latest value is applied once the debounce time elapsed
+    clock[0] += 0.006
+    input_filter._settle(0.006)
+    assert scene.events == [("press", "a"), ("release", "a")]
+    input_filter.close()
+
+
+def test_stick_axis_held_back(scene):
+    input_filter = make_filter(scene, hysteresis={"sticks": 0.1})
+    input_filter.on_stick_motion(None, "leftstick", Vec2(0.8, 0.0))
+    # The y axis is not past the band yet, so it stays where it was
+    input_filter.on_stick_motion(None, "leftstick", Vec2(0.8, 0.55))
+    assert scene.events == [
+        ("leftstick", 0.8, 0.0),
+        ("leftstick", 0.8, 0.0)
+    ]
+    assert input_filter.suppressed["sticks"] == 1
+
+
+def test_analog_trigger_displays_are_not_filtered(scene):
+    input_filter = make_filter(scene, hysteresis={"triggers": 0.05})
+    input_filter.manager.triggers = "fill"
+    input_filter.on_trigger_motion(None, "lefttrigger", 0.52)
+    input_filter.on_trigger_motion(None, "lefttrigger", 0.53)
+    assert scene.events == [("lefttrigger", 0.52), ("lefttrigger", 0.53)]
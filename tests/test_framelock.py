@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+from pyglet.math import Vec2
+
+from fightsticker.framelock import FrameLock
+
+
+@pytest.fixture
+def frame_lock(window, scene):
+    manager = SimpleNamespace(
+        _current_scene=scene,
+        transparent=False,
+        overlay=None,
+        window=SimpleNamespace(draw=lambda dt: None)
+    )
+    frame_lock = FrameLock(manager)
+    yield frame_lock
+    frame_lock.close()
+    frame_lock.label.delete()
+
+
+def test_tap_lasts_a_frame(frame_lock, scene):
+    frame_lock.on_button_press(None, "a")
+    frame_lock.on_button_release(None, "a")
+    frame_lock.tick(1 / 60)
+    assert scene.events == [("press", "a")]
+    frame_lock.tick(1 / 60)
+    assert scene.events == [("press", "a"), ("release", "a")]
+    frame_lock.tick(1 / 60)
+    assert len(scene.events) == 2
+
+
+def test_frame_shows_last_value(frame_lock, scene):
+    for x in (0.2, 0.9, 0.5):
+        frame_lock.on_stick_motion(None, "leftstick", Vec2(x, 0.0))
+    frame_lock.on_button_press(None, "b")
+    frame_lock.tick(1 / 60)
+    assert scene.events == [("leftstick", 0.5, 0.0), ("press", "b")]
+    assert frame_lock.label.text == "4 events/frame"
+
+
+def test_tap_shows_furthest_value(frame_lock, scene):
+    for x in (0.4, 1.0, 0.6, 0.0):
+        frame_lock.on_stick_motion(None, "leftstick", Vec2(x, 0.0))
+    frame_lock.tick(1 / 60)
+    assert scene.events == [("leftstick", 1.0, 0.0)]
+    frame_lock.tick(1 / 60)
+    assert scene.events[1:] == [("leftstick", 0.0, 0.0)]
+
+
+def test_trigger_dip_lasts_a_frame(frame_lock, scene):
+    frame_lock.on_trigger_motion(None, "lefttrigger", 0.7)
+    frame_lock.tick(1 / 60)
+    frame_lock.on_trigger_motion(None, "lefttrigger", 0.3)
+    frame_lock.on_trigger_motion(None, "lefttrigger", 0.7)
+    frame_lock.tick(1 / 60)
+    assert scene.events == [("lefttrigger", 0.7), ("lefttrigger", 0.3)]
+    frame_lock.tick(1 / 60)
+    assert scene.events[2:] == [("lefttrigger", 0.7)]
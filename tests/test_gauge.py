@@ -0,0 +1,59 @@
+import pyglet
+import pytest
+
+from fightsticker import gauge
+
+
+@pytest.fixture
+def sprite(window):
+    image = pyglet.image.SolidColorImagePattern((255, 0, 0, 255))
+    sprite = pyglet.sprite.Sprite(
+        image.create_image(10, 40).get_texture(), x=5, y=5
+    )
+    sprite.visible = False
+    yield sprite
+    sprite.delete()
+
+
+def holder(sprite):
+    """
+    Hold function showing `sprite` while held, as a scene does
+    """
+    def hold(held):
+        if sprite.visible != held:
+            sprite.visible = held
+    return hold
+
+
+def top(sprite):
+    return sprite._vertex_list.position[7], sprite._vertex_list.tex_coords[7]
+
+
+def test_fill_from_rest_is_cropped(sprite):
+    trigger = gauge.TriggerGauge((sprite,), "fill", holder(sprite), steps=4)
+    full_v = sprite._texture.tex_coords[7]
+    trigger.update(0.5)
+    assert sprite.visible
+    y, v = top(sprite)
+    assert y == pytest.approx(20)
+    assert v == pytest.approx(full_v / 2)
+
+
+def test_release_restores_the_whole_sprite(sprite):
+    trigger = gauge.TriggerGauge((sprite,), "fill", holder(sprite), steps=4)
+    trigger.update(0.5)
+    trigger.update(0.0)
+    assert not sprite.visible
+    # Shown by a button, the sprite is drawn whole
+    sprite.visible = True
+    assert top(sprite) == pytest.approx(
+        (40, sprite._texture.tex_coords[7])
+    )
+
+
+def test_texture_change_keeps_the_crop(sprite):
+    trigger = gauge.TriggerGauge((sprite,), "fill", holder(sprite), steps=4)
+    trigger.update(0.25)
+    sprite.image = sprite.image
+    trigger.apply()
+    assert top(sprite)[0] == pytest.approx(10)
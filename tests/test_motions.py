@@ -0,0 +1,89 @@
+from fightsticker.motions import MotionMatcher
+
+MOTIONS = {"236P": 15, "623P": 15, "214K": 15, "41236P": 30, "[4]6K": 10}
+
+
+def play(inputs, motions=MOTIONS, charge=30):
+    """
+    Feed (frame, direction or button) inputs, returning the motions
+    recognized
+    """
+    matcher = MotionMatcher(motions, charge)
+    recognized = []
+    for frame, value in inputs:
+        if isinstance(value, int):
+            matched = matcher.direction(value, frame)
+        else:
+            matched = matcher.feed(value, frame)
+        if matched:
+            recognized.append(matched)
+    return recognized
+
+
+def test_quarter_circle():
+    assert play([(0, 2), (2, 3), (4, 6), (5, "P")]) == ["236P"]
+
+
+def test_quarter_circle_through_neutral():
+    assert play([(0, 2), (1, 5), (2, 3), (3, 6), (5, "P")]) == ["236P"]
+
+
+def test_dragon_punch_rolled_through_diagonals():
+    path = [(0, 6), (2, 3), (4, 2), (6, 3), (8, "P")]
+    assert play(path) == ["623P"]
+
+
+def test_dragon_punch_shortcut():
+    assert play([(0, 6), (2, 2), (4, 3), (6, "P")]) == ["623P"]
+    assert play([(0, 6), (2, 5), (3, 2), (4, 3), (6, "P")]) == ["623P"]
+
+
+def test_charge_through_neutral():
+    path = [(0, 4), (40, 5), (42, 6), (44, "K")]
+    assert play(path) == ["[4]6K"]
+
+
+def test_charge_from_down_back():
+    path = [(0, 1), (40, 3), (42, 6), (44, "K")]
+    assert play(path) == ["[4]6K"]
+
+
+def test_charge_too_short():
+    assert play([(0, 4), (10, 5), (12, 6), (14, "K")]) == []
+
+
+def test_window_exceeded():
+    assert play([(0, 2), (10, 3), (20, 6), (30, "P")]) == []
+
+
+def test_wrong_direction():
+    assert play([(0, 2), (2, 1), (4, 4), (6, "P")]) == []
+    assert play([(0, 2), (2, 1), (4, 4), (6, "K")]) == ["214K"]
+
+
+def test_longest_motion_wins():
+    path = [(0, 4), (2, 1), (4, 2), (6, 3), (8, 6), (10, "P")]
+    assert play(path) == ["41236P"]
+
+
+def test_partial_motions_expire():
+    matcher = MotionMatcher(MOTIONS)
+    matcher.direction(2, 0)
+    assert matcher._active
+    matcher.direction(5, 100)
+    assert not matcher._active
+
+
+def test_shared_prefix_is_one_partial_motion():
+    one = MotionMatcher({"236P": 15})
+    many = MotionMatcher({"236P": 15, "236K": 15, "2369P": 20})
+    for frame, direction in ((0, 2), (2, 3), (4, 6)):
+        one.direction(direction, frame)
+        many.direction(direction, frame)
+    assert set(many._active) == set(one._active)
+
+
+
+def test_partial_motion_keeps_latest_start():
+    path = [(0, 2), (5, 5), (10, 2), (12, 3), (14, 6), (24, "P")]
+    assert play(path) == ["236P"]
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from fightsticker.plugins import PluginHost
+
+RAISING = {
+    "inline.py": (
+        "def on_frame(snapshot, events):\n"
+        "    raise RuntimeError('on_frame')\n"
+    ),
+    "result.py": (
+        "WORKER = 'thread'\n"
+        "def on_frame(snapshot, events):\n"
+        "    return len(events)\n"
+        "def on_result(result):\n"
+        "    raise RuntimeError('on_result')\n"
+    )
+}
+
+
+@pytest.fixture
+def host(tmp_path):
+    for name, source in RAISING.items():
+        (tmp_path / name).write_text(source)
+    host = PluginHost(None, str(tmp_path))
+    yield host
+    host.close()
+
+
+def test_raising_plugins_are_disabled(host):
+    assert [plugin.name for plugin in host.plugins] == ["inline", "result"]
+    host.on_button_press(None, "a")
+    host.update()
+    inline, result = host.plugins
+    assert not inline.enabled
+    # The worker result is handed over on a later frame
+    deadline = time.monotonic() + 5
+    while result._future and time.monotonic() < deadline:
+        host.update()
+        time.sleep(0.01)
+    assert not result.enabled
+    # Disabled plugins are no longer run
+    host.on_button_press(None, "b")
+    host.update()
+    assert inline.stats["frames"] == 0
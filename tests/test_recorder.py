@@ -0,0 +1,52 @@
+import pytest
+from pyglet.math import Vec2
+
+from fightsticker.recorder import INPUT_INDEX, INPUTS, Recorder
+
+np = pytest.importorskip("numpy")
+from fightsticker.analytics import analyze
+
+
+def test_inputs_are_unique():
+    assert len(INPUT_INDEX) == len(INPUTS)
+
+
+def test_stick_buttons_are_counted(tmp_path):
+    session = tmp_path / "session.bin"
+    recorder = Recorder(str(session))
+    presses = ("a", "leftstick", "rightstick", "leftstick", "x")
+    for button in presses:
+        recorder.on_button_press(None, button)
+        recorder.on_stick_motion(None, "leftstick", Vec2(1.0, 0.0))
+        recorder.on_stick_motion(None, "rightstick", Vec2(0.0, -1.0))
+        recorder.on_button_release(None, button)
+    recorder.close()
+
+    stats = analyze(str(session))
+    assert stats["presses"] == len(presses)
+    assert sum(stats["press_counts"].values()) == len(presses)
+    assert stats["press_counts"]["leftstick"] == 2
+    assert stats["press_counts"]["rightstick"] == 1
+    assert stats["hold_mean"]["leftstick"] > 0
+    # Only the left stick moves through its direction heatmap
+    assert stats["direction_counts"]["leftstick"]["6"] == 1
+    assert stats["direction_counts"]["leftstick"]["2"] == 0
+    assert sum(stats["direction_counts"]["dpad"].values()) == 0
+
+
+def test_dpad_and_stick_directions_are_apart(tmp_path):
+    session = tmp_path / "session.bin"
+    recorder = Recorder(str(session))
+    recorder.on_stick_motion(None, "leftstick", Vec2(1.0, 0.0))
+    recorder.on_dpad_motion(None, Vec2(0.0, -1.0))
+    recorder.on_stick_motion(None, "leftstick", Vec2(1.0, 0.1))
+    recorder.on_dpad_motion(None, Vec2(0.0, 0.0))
+    recorder.on_stick_motion(None, "leftstick", Vec2(1.0, 0.0))
+    recorder.close()
+
+    stats = analyze(str(session))
+    # Held right on the stick throughout, and tapped down on the dpad
+    stick = stats["direction_counts"]["leftstick"]
+    dpad = stats["direction_counts"]["dpad"]
+    assert stick["6"] == 1 and sum(stick.values()) == 1
+    assert dpad["2"] == 1 and dpad["5"] == 1 and sum(dpad.values()) == 2